@@ -7,6 +7,8 @@ from pathlib import Path
 import numpy as np
 
 from scripts.predict_matches import MatchPredictor
+from src.reporting.metrics import compute_metrics
+from src.utils.arrow_cache import load_matches
 
 REPORTS = Path("reports")
 PROC = Path("data/processed")
@@ -18,7 +20,7 @@ page = st.sidebar.radio("Navegación", ["📊 Backtesting", "🔮 Predicciones p
 
 st.sidebar.header("📂 Dataset")
 if (PROC/"matches.parquet").exists():
-    dfp = pd.read_parquet(PROC/"matches.parquet")
+    dfp = load_matches(columns=['Date'])
     st.sidebar.write(f"Partidos: {len(dfp)}")
     st.sidebar.write(f"Desde: {dfp['Date'].min().date()}")
     st.sidebar.write(f"Hasta: {dfp['Date'].max().date()}")
@@ -30,19 +32,21 @@ if page == "📊 Backtesting":
     if not (REPORTS/"backtest_log.csv").exists():
         st.warning("⚠️ No encuentro backtest_log.csv. Ejecuta el pipeline primero.")
     else:
-        log = pd.read_csv(REPORTS/"backtest_log.csv", parse_dates=['date'])
+        @st.cache_data
+        def load_log_metrics(mtime):
+            log = pd.read_csv(REPORTS/"backtest_log.csv", parse_dates=['date'])
+            return log, compute_metrics(log)
+
+        log, mets = load_log_metrics((REPORTS/"backtest_log.csv").stat().st_mtime)
+        kpis = mets['summary']
         st.subheader("📈 KPIs Generales")
-        c1,c2,c3,c4,c5 = st.columns(5)
-        kpi_turn = log['stake'].sum()
-        kpi_pnl  = log['pnl'].sum()
-        kpi_roi  = (kpi_pnl/kpi_turn) if kpi_turn>0 else 0.0
-        kpi_bets = len(log)
-        kpi_hr   = (log['result']=='WIN').mean() if len(log)>0 else 0.0
-        c1.metric("Turnover", f"{kpi_turn:,.2f}")
-        c2.metric("PNL", f"{kpi_pnl:,.2f}", delta=f"{kpi_roi*100:.1f}%")
-        c3.metric("ROI", f"{100*kpi_roi:.2f}%")
-        c4.metric("Apuestas", f"{kpi_bets}")
-        c5.metric("Hit-rate", f"{100*kpi_hr:.2f}%")
+        c1,c2,c3,c4,c5,c6 = st.columns(6)
+        c1.metric("Turnover", f"{kpis['turnover']:,.2f}")
+        c2.metric("PNL", f"{kpis['pnl']:,.2f}", delta=f"{kpis['roi']*100:.1f}%")
+        c3.metric("ROI", f"{100*kpis['roi']:.2f}%")
+        c4.metric("Apuestas", f"{kpis['n_bets']}")
+        c5.metric("Hit-rate", f"{100*kpis['hit_rate']:.2f}%")
+        c6.metric("Max DD", f"{100*kpis['max_drawdown_pct']:.1f}%", delta=f"{kpis['max_drawdown_duration']} apuestas", delta_color="off")
 
         st.subheader("📉 Curva de Equity")
         fig = px.line(log.reset_index(), x=log.index, y="equity", 
@@ -50,11 +54,15 @@ if page == "📊 Backtesting":
         st.plotly_chart(fig, use_container_width=True)
 
         st.subheader("📊 Desglose por Mercado")
-        per_market = log.groupby("market", as_index=False).agg(
-            turnover=("stake","sum"), pnl=("pnl","sum"), bets=("stake","count"))
-        per_market["roi"] = (per_market["pnl"]/per_market["turnover"]*100).round(2)
+        per_market = mets['per_market'].copy()
+        per_market["roi"] = (per_market["roi"]*100).round(2)
         st.dataframe(per_market, use_container_width=True)
 
+        st.subheader("🏆 Desglose por Liga y Banda de Cuota")
+        c1, c2 = st.columns(2)
+        c1.dataframe(mets['per_league'], use_container_width=True)
+        c2.dataframe(mets['per_odds_band'], use_container_width=True)
+
         st.subheader("🔍 Explorador de Apuestas")
         leagues = ["(todas)"] + sorted(log["league"].dropna().unique().tolist())
         sel_league = st.selectbox("Filtrar por Liga", leagues)
@@ -0,0 +1,292 @@
+"""
+Suite de benchmarks del pipeline (DC, pricing, Elo, features, calibración,
+walk-forward y ruta Flask /predict) sobre datos sintéticos.
+
+Uso:
+    python -m benchmarks.run_benchmarks --leagues 2 --seasons 1
+    python -m benchmarks.run_benchmarks --only dc_fit elo --repeat 5
+
+Cada ejecución se guarda en reports/benchmarks/<timestamp>_<commit>.json y se
+compara con la ejecución anterior del mismo tamaño: los casos más lentos que
+--threshold se marcan como regresión (código de salida 1 con --fail-on-regression).
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+ROOT = Path(__file__).resolve().parent.parent
+sys.path.insert(0, str(ROOT))
+
+from benchmarks.synthetic import generate_matches, generate_fixtures
+from src.models.poisson_dc import DixonColes
+from src.models.calibration import ProbabilityCalibrator
+from src.models.ensemble import BlendPipeline
+from src.features.ratings import add_elo
+from src.features.rolling import add_form
+from src.features.reglas_dinamicas import calcular_h2h_ultimos_5
+from src.features.feature_store import FeatureStore
+from src.features.eficiencia_conversion import AnalizadorEficiencia
+from src.models.feature_matrix import build_feature_matrix
+from src.utils.odds import market_probs_1x2_frame
+
+OUT_DIR = ROOT / "reports" / "benchmarks"
+DC_TRAIN = 400     # mismo tamaño de ventana que el walk-forward
+PRICE_ROWS = 200
+H2H_PAIRS = 200
+
+
+def timeit(fn, repeat: int = 3, warmup: int = 0) -> dict:
+    """Ejecuta `fn` `repeat` veces y devuelve min/mediana/media en segundos."""
+    for _ in range(warmup):
+        fn()
+    times = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - t0)
+    return dict(min=min(times), median=statistics.median(times), mean=statistics.fmean(times), repeat=repeat)
+
+
+def git_commit() -> str:
+    try:
+        out = subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT, capture_output=True, text=True, timeout=10)
+        return out.stdout.strip() or "unknown"
+    except Exception:
+        return "unknown"
+
+
+# ------------------------------------------------------------------
+# Casos
+# ------------------------------------------------------------------
+def bench_dc_fit(df, repeat):
+    train = add_elo(df.iloc[:DC_TRAIN])
+    return timeit(lambda: DixonColes().fit(train), repeat)
+
+
+def bench_score_matrix(df, repeat):
+    """Pricing completo por partido: 1X2 + OU 2.5 + AH (ambos lados), como en el backtest."""
+    train = add_elo(df.iloc[:DC_TRAIN])
+    dc = DixonColes().fit(train)
+    rows = train.iloc[:PRICE_ROWS]
+    def run():
+        dc.predict_1x2(rows)
+        for _, r in rows.iterrows():
+            dc.prob_over_under(r, line=2.5)
+            dc.ah_probabilities(r, line=r['AHh'], side='home')
+            dc.ah_probabilities(r, line=r['AHh'], side='away')
+    return timeit(run, repeat)
+
+
+def bench_elo(df, repeat):
+    return timeit(lambda: add_elo(df), repeat)
+
+
+def bench_rolling_form(df, repeat):
+    return timeit(lambda: add_form(df), repeat)
+
+
+def bench_h2h(df, repeat):
+    rng = np.random.default_rng(0)
+    idx = rng.choice(len(df), size=min(H2H_PAIRS, len(df)), replace=False)
+    pairs = df.iloc[idx][['HomeTeam', 'AwayTeam']].to_numpy()
+    def run():
+        for h, a in pairs:
+            calcular_h2h_ultimos_5(df, h, a)
+    return timeit(run, repeat)
+
+
+def bench_feature_store(df, repeat):
+    """Construcción del store + join point-in-time + lecturas de reglas por pareja (ruta del dashboard)."""
+    rng = np.random.default_rng(0)
+    idx = rng.choice(len(df), size=min(H2H_PAIRS, len(df)), replace=False)
+    pairs = df.iloc[idx][['HomeTeam', 'AwayTeam', 'League']].to_numpy()
+    def run():
+        store = FeatureStore().fit(df)
+        store.point_in_time(df)
+        for h, a, lg in pairs:
+            store.reglas(h, a, lg)
+    return timeit(run, repeat)
+
+
+def bench_eficiencia(df, repeat):
+    """Índices de eficiencia (equipo + H2H) desde cero y lecturas por pareja (ruta de predicción)."""
+    rng = np.random.default_rng(0)
+    idx = rng.choice(len(df), size=min(H2H_PAIRS, len(df)), replace=False)
+    pairs = df.iloc[idx][['HomeTeam', 'AwayTeam']].to_numpy()
+    def run():
+        analizador = AnalizadorEficiencia()
+        for h, a in pairs:
+            analizador.calcular_eficiencia_equipo(df, h)
+            analizador.calcular_eficiencia_equipo(df, a)
+            analizador.calcular_eficiencia_head_to_head(df, h, a)
+    return timeit(run, repeat)
+
+
+def bench_feature_matrix(df, repeat):
+    """Matriz float32 de Elo + forma y folds walk-forward como vistas de filas."""
+    data = add_form(add_elo(df))
+    columns = ['EloHome', 'EloAway'] + [c for c in data.columns if 'roll5' in c]
+    def run():
+        X = build_feature_matrix(data, columns, fill=0.0)
+        for end in range(DC_TRAIN, len(X), DC_TRAIN):
+            X.rows(slice(0, end)), X.rows(slice(end, end + DC_TRAIN))
+    return timeit(run, repeat)
+
+
+def bench_calibration(df, repeat):
+    """Ajuste isotónico + kernel de transformación y blend LR modelo/mercado."""
+    q = market_probs_1x2_frame(df)
+    rng = np.random.default_rng(1)
+    P = 0.8 * q + 0.2 * rng.dirichlet(np.ones(3) * 4, size=len(df))   # "modelo" = mercado con ruido
+    y = df['y'].to_numpy()
+    def run():
+        cal = ProbabilityCalibrator().fit(y, P)
+        cal.transform_array(P)
+        BlendPipeline().fit(P, q, y).transform(P, q)
+    return timeit(run, repeat)
+
+
+def bench_walk_forward(df, repeat):
+    from scripts.backtest_all_markets import run_walk_forward
+    return timeit(lambda: run_walk_forward(df, verbose=False), repeat)
+
+
+def bench_flask_predict(df, repeat):
+    """
+    GET /predict/<league>/<idx> de app_argon_con_reglas con el cliente de test de Flask.
+    La app entrena su predictor con data/processed al importarse; los fixtures se
+    sustituyen por partidos sintéticos entre equipos de su propio histórico.
+    """
+    os.environ.setdefault('PORT', '0')  # evita la actualización de fixtures por subprocess al importar
+    import contextlib, io
+    with contextlib.redirect_stdout(io.StringIO()):
+        import app_argon_con_reglas as web
+    fixtures = generate_fixtures(web.predictor.df_historico, n=10)
+    web.upcoming_fixtures = fixtures
+    client = web.app.test_client()
+    league = fixtures['League'].iloc[0]
+    n = int((fixtures['League'] == league).sum())
+    def run():
+        with contextlib.redirect_stdout(io.StringIO()):
+            for i in range(n):
+                r = client.get(f"/predict/{league}/{i}")
+                if r.status_code != 200:
+                    raise RuntimeError(f"/predict/{league}/{i} -> {r.status_code}")
+    res = timeit(run, repeat, warmup=1)
+    res['requests'] = n
+    return res
+
+
+BENCHMARKS = {
+    'dc_fit': bench_dc_fit,
+    'score_matrix': bench_score_matrix,
+    'elo': bench_elo,
+    'rolling_form': bench_rolling_form,
+    'h2h': bench_h2h,
+    'feature_store': bench_feature_store,
+    'eficiencia': bench_eficiencia,
+    'feature_matrix': bench_feature_matrix,
+    'calibration': bench_calibration,
+    'walk_forward': bench_walk_forward,
+    'flask_predict': bench_flask_predict,
+}
+
+
+# ------------------------------------------------------------------
+# Persistencia y comparación
+# ------------------------------------------------------------------
+def previous_run(config: dict):
+    """Última ejecución guardada con la misma configuración (ligas, temporadas, equipos)."""
+    if not OUT_DIR.exists():
+        return None
+    for path in sorted(OUT_DIR.glob("*.json"), reverse=True):
+        try:
+            data = json.loads(path.read_text(encoding='utf-8'))
+        except Exception:
+            continue
+        if data.get('config', {}).get('size') == config['size']:
+            return data
+    return None
+
+
+def compare(current: dict, previous: dict, threshold: float) -> list:
+    """Filas (nombre, antes, ahora, ratio, regresión) comparando medianas."""
+    rows = []
+    for name, res in current['results'].items():
+        prev = (previous or {}).get('results', {}).get(name)
+        if not prev or 'median' not in res or 'median' not in prev:
+            rows.append((name, None, res.get('median'), None, False))
+            continue
+        ratio = res['median'] / prev['median'] if prev['median'] > 0 else float('nan')
+        rows.append((name, prev['median'], res['median'], ratio, ratio > 1.0 + threshold))
+    return rows
+
+
+def main():
+    ap = argparse.ArgumentParser(description="Benchmarks del pipeline sobre datos sintéticos")
+    ap.add_argument('--leagues', type=int, default=2, help='Número de ligas sintéticas')
+    ap.add_argument('--seasons', type=int, default=1, help='Temporadas por liga')
+    ap.add_argument('--teams', type=int, default=20, help='Equipos por liga')
+    ap.add_argument('--repeat', type=int, default=3, help='Repeticiones por caso')
+    ap.add_argument('--only', nargs='*', choices=list(BENCHMARKS), help='Ejecutar solo estos casos')
+    ap.add_argument('--skip', nargs='*', default=[], choices=list(BENCHMARKS), help='Omitir estos casos')
+    ap.add_argument('--threshold', type=float, default=0.20, help='Tolerancia de regresión (0.20 = +20%%)')
+    ap.add_argument('--fail-on-regression', action='store_true', help='Salir con código 1 si hay regresiones')
+    ap.add_argument('--no-save', action='store_true', help='No guardar el JSON de resultados')
+    args = ap.parse_args()
+
+    df = generate_matches(args.leagues, args.seasons, args.teams)
+    names = [n for n in (args.only or BENCHMARKS) if n not in args.skip]
+    # walk-forward pesado: siempre una sola repetición
+    repeats = {n: (1 if n == 'walk_forward' else args.repeat) for n in names}
+
+    config = dict(size=dict(leagues=args.leagues, seasons=args.seasons, teams=args.teams), n_matches=len(df), repeat=args.repeat)
+    print(f"Benchmarks sobre {len(df)} partidos sintéticos ({args.leagues} ligas × {args.seasons} temporadas)")
+    results = {}
+    for name in names:
+        print(f"  {name:<15}", end=' ', flush=True)
+        try:
+            res = BENCHMARKS[name](df, repeats[name])
+            print(f"{res['median']*1000:10.1f} ms (min {res['min']*1000:.1f})")
+        except Exception as e:
+            res = dict(error=f"{type(e).__name__}: {e}")
+            print(f"ERROR {res['error']}")
+        results[name] = res
+
+    current = dict(timestamp=datetime.now().isoformat(timespec='seconds'), commit=git_commit(), config=config,
+                   python=platform.python_version(), pandas=pd.__version__, numpy=np.__version__,
+                   machine=platform.machine(), results=results)
+    prev = previous_run(config)
+    rows = compare(current, prev, args.threshold)
+    regressions = [r for r in rows if r[4]]
+    if prev is not None:
+        print(f"\nComparación con {prev.get('commit')} ({prev.get('timestamp')}):")
+        for name, before, now, ratio, slow in rows:
+            if ratio is None:
+                continue
+            flag = "  <-- REGRESIÓN" if slow else ""
+            print(f"  {name:<15} {before*1000:10.1f} -> {now*1000:10.1f} ms  x{ratio:.2f}{flag}")
+    current['regressions'] = [r[0] for r in regressions]
+
+    if not args.no_save:
+        OUT_DIR.mkdir(parents=True, exist_ok=True)
+        out = OUT_DIR / f"{datetime.now().strftime('%Y%m%d_%H%M%S')}_{current['commit']}.json"
+        out.write_text(json.dumps(current, indent=2), encoding='utf-8')
+        print("\nResultados guardados:", out)
+
+    if regressions and args.fail_on_regression:
+        sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,139 @@
+"""
+Generador sintético de partidos para benchmarks.
+
+Produce un DataFrame con el mismo esquema que data/processed/matches.parquet
+(resultados, xG, cuotas de apertura y cierre 1X2 / OU 2.5 / AH) para un número
+configurable de ligas × temporadas, de modo que los tiempos sean comparables
+entre commits sin depender de descargas.
+"""
+import numpy as np
+import pandas as pd
+from scipy.stats import poisson
+
+LEAGUE_CODES = ['E0', 'SP1', 'D1', 'I1', 'F1', 'SC0', 'N1', 'B1', 'P1', 'T1']
+MARGIN_1X2 = 0.05
+MARGIN_2WAY = 0.06
+MAX_GOALS = 10
+
+
+def _double_round_robin(n_teams: int) -> list:
+    """Jornadas (lista de pares local/visitante) de una liga a doble vuelta."""
+    teams = list(range(n_teams))
+    rounds = []
+    for _ in range(n_teams - 1):
+        half = [(teams[i], teams[n_teams - 1 - i]) for i in range(n_teams // 2)]
+        rounds.append(half)
+        teams = [teams[0]] + [teams[-1]] + teams[1:-1]
+    return rounds + [[(a, h) for h, a in r] for r in rounds]
+
+
+def _with_margin(p: np.ndarray, margin: float, rng, noise: float) -> np.ndarray:
+    """Cuotas decimales a partir de probabilidades (N×k) con ruido y overround."""
+    q = p * np.exp(rng.normal(0.0, noise, p.shape))
+    q = q / q.sum(axis=1, keepdims=True) * (1.0 + margin)
+    return np.round(1.0 / q, 2)
+
+
+def _score_probs(lam: np.ndarray, mu: np.ndarray):
+    """pH/pD/pA, P(total>2.5) y distribución de la diferencia de goles (Poisson independiente)."""
+    g = np.arange(MAX_GOALS + 1)
+    ph = poisson.pmf(g[None, :], lam[:, None])
+    pa = poisson.pmf(g[None, :], mu[:, None])
+    m = ph[:, :, None] * pa[:, None, :]
+    diff = g[:, None] - g[None, :]
+    tot = g[:, None] + g[None, :]
+    p1x2 = np.stack([(m * (diff > 0)).sum((1, 2)), (m * (diff == 0)).sum((1, 2)), (m * (diff < 0)).sum((1, 2))], axis=1)
+    p_over = (m * (tot > 2.5)).sum((1, 2))
+    return p1x2, p_over, m, diff
+
+
+def _ah_home_prob(m: np.ndarray, diff: np.ndarray, line: np.ndarray) -> np.ndarray:
+    """P(local gana con hándicap `line`), sin repartir push ni medias apuestas (basta para fijar cuotas)."""
+    win = (m * (diff[None] + line[:, None, None] > 0)).sum((1, 2))
+    return np.clip(win, 0.05, 0.95)
+
+
+def generate_matches(n_leagues: int = 2, n_seasons: int = 1, n_teams: int = 20,
+                     start_year: int = 2018, seed: int = 42) -> pd.DataFrame:
+    """
+    Genera partidos sintéticos.
+
+    Parameters:
+    -----------
+    n_leagues : int
+        Número de ligas (códigos tomados de LEAGUE_CODES)
+    n_seasons : int
+        Temporadas por liga (doble vuelta, una jornada por semana)
+    n_teams : int
+        Equipos por liga (par)
+    start_year : int
+        Año de inicio de la primera temporada
+    seed : int
+        Semilla del generador
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        Partidos ordenados por fecha con el esquema de matches.parquet
+    """
+    rng = np.random.default_rng(seed)
+    rounds = _double_round_robin(n_teams)
+    blocks = []
+    for li in range(n_leagues):
+        code = LEAGUE_CODES[li % len(LEAGUE_CODES)] + ('' if li < len(LEAGUE_CODES) else str(li))
+        names = np.array([f"{code}_Team{t:02d}" for t in range(n_teams)], dtype=object)
+        attack = rng.normal(0.0, 0.25, n_teams)
+        defense = rng.normal(0.0, 0.20, n_teams)
+        for s in range(n_seasons):
+            attack = 0.8 * attack + rng.normal(0.0, 0.1, n_teams)
+            defense = 0.8 * defense + rng.normal(0.0, 0.08, n_teams)
+            season_start = pd.Timestamp(year=start_year + s, month=8, day=10) + pd.Timedelta(days=li)
+            home = np.array([h for r in rounds for h, _ in r]); away = np.array([a for r in rounds for _, a in r])
+            rnd = np.repeat(np.arange(len(rounds)), n_teams // 2)
+            dates = season_start + pd.to_timedelta(rnd * 7 + rng.integers(0, 3, len(rnd)), unit='D')
+            blocks.append(pd.DataFrame({'League': code, 'Date': dates, 'HomeTeam': names[home], 'AwayTeam': names[away],
+                                        '_lam': np.exp(0.25 + attack[home] - defense[away]),
+                                        '_mu': np.exp(0.05 + attack[away] - defense[home])}))
+    df = pd.concat(blocks, ignore_index=True).sort_values(['Date', 'League'], kind='stable').reset_index(drop=True)
+    n = len(df)
+    lam = df.pop('_lam').to_numpy(); mu = df.pop('_mu').to_numpy()
+
+    df['FTHG'] = rng.poisson(lam); df['FTAG'] = rng.poisson(mu)
+    df['FTR'] = np.select([df['FTHG'] > df['FTAG'], df['FTHG'] == df['FTAG']], ['H', 'D'], 'A')
+    df['y'] = df['FTR'].map({'H': 0, 'D': 1, 'A': 2}).astype(int)
+    df['xG_home'] = np.round(lam * np.exp(rng.normal(0, 0.15, n)), 2)
+    df['xG_away'] = np.round(mu * np.exp(rng.normal(0, 0.15, n)), 2)
+    df['Div'] = df['League']; df['Time'] = '15:00'
+
+    p1x2, p_over, m, diff = _score_probs(lam, mu)
+    p_ou = np.stack([p_over, 1 - p_over], axis=1)
+    exp_diff = lam - mu
+    ah_open = -np.round(exp_diff * 4) / 4
+    ah_close = np.where(rng.random(n) < 0.7, ah_open, ah_open + rng.choice([-0.25, 0.25], n))
+    for prefix, noise, line in [('', 0.08, ah_open), ('C', 0.04, ah_close)]:
+        o1 = _with_margin(p1x2, MARGIN_1X2, rng, noise)
+        ps = _with_margin(p1x2, MARGIN_1X2 * 0.5, rng, noise)
+        avg = _with_margin(p1x2, MARGIN_1X2 * 1.2, rng, noise)
+        ou = _with_margin(p_ou, MARGIN_2WAY, rng, noise)
+        p_ah = _ah_home_prob(m, diff, line)
+        ah = _with_margin(np.stack([p_ah, 1 - p_ah], axis=1), MARGIN_2WAY, rng, noise)
+        for i, o in enumerate('HDA'):
+            df[f'B365{prefix}{o}'] = o1[:, i]
+            df[f'PS{prefix}{o}'] = ps[:, i]
+            df[f'Avg{prefix}{o}'] = avg[:, i]
+        df[f'B365{prefix}>2.5'] = ou[:, 0]; df[f'B365{prefix}<2.5'] = ou[:, 1]
+        df[f'P{prefix}>2.5'] = ou[:, 0]; df[f'P{prefix}<2.5'] = ou[:, 1]
+        df[f'AH{prefix}h'] = line
+        df[f'B365{prefix}AHH'] = ah[:, 0]; df[f'B365{prefix}AHA'] = ah[:, 1]
+        df[f'P{prefix}AHH'] = ah[:, 0]; df[f'P{prefix}AHA'] = ah[:, 1]
+    return df
+
+
+def generate_fixtures(matches: pd.DataFrame, n: int = 20, seed: int = 0) -> pd.DataFrame:
+    """Próximos partidos sintéticos (esquema de upcoming_fixtures.parquet) entre equipos de `matches`."""
+    rng = np.random.default_rng(seed)
+    rows = matches.iloc[rng.choice(len(matches), size=min(n, len(matches)), replace=False)]
+    last = pd.Timestamp(matches['Date'].max())
+    return pd.DataFrame({'League': rows['League'].to_numpy(), 'HomeTeam': rows['HomeTeam'].to_numpy(),
+                         'AwayTeam': rows['AwayTeam'].to_numpy(),
+                         'Date': (last + pd.Timedelta(days=7)).strftime('%Y-%m-%d'), 'Time': '15:00'})
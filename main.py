@@ -17,6 +17,9 @@ if not os.environ.get('FOOTBALL_API_KEY'):
 try:
     from api.real_fixtures_api import RealFixturesAPI
     from models.real_prediction_system import RealPredictionSystem
+    from utils.response_cache import get_response_cache
+    # Caché HTTP en disco compartida por los workers: un solo refresco por endpoint y TTL
+    response_cache = get_response_cache()
     real_api = RealFixturesAPI()
     prediction_system = RealPredictionSystem()
     print("✅ API de partidos reales y sistema de predicción cargados correctamente")
@@ -25,6 +28,7 @@ except ImportError as e:
     print(f"⚠️ No se pudo cargar los sistemas reales: {e}")
     real_api = None
     prediction_system = None
+    response_cache = None
 
 app = Flask(__name__)
 app.secret_key = os.environ.get('SECRET_KEY', 'sistema_precision_maxima_2025')
@@ -354,7 +358,7 @@ def get_dynamic_fixtures():
                     'status': 'SCHEDULED'
                 }
                 
-                response = requests.get(pl_url, headers=headers, params=params, timeout=10)
+                response = response_cache.get(pl_url, headers=headers, params=params, timeout=10)
                 print(f"📡 Premier League response: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -382,7 +386,7 @@ def get_dynamic_fixtures():
                 print("🔍 Obteniendo La Liga dinámicamente...")
                 pd_url = f"{real_api.base_url}/competitions/PD/matches"
                 
-                response = requests.get(pd_url, headers=headers, params=params, timeout=10)
+                response = response_cache.get(pd_url, headers=headers, params=params, timeout=10)
                 print(f"📡 La Liga response: {response.status_code}")
                 
                 if response.status_code == 200:
@@ -799,7 +803,7 @@ def sync():
                     'status': 'TIMED'  # Partidos programados
                 }
                 
-                response = requests.get(pl_url, headers=headers, params=params, timeout=10)
+                response = response_cache.get(pl_url, headers=headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -823,7 +827,7 @@ def sync():
                 print("🔍 Obteniendo La Liga...")
                 pd_url = f"{real_api.base_url}/competitions/PD/matches"
                 
-                response = requests.get(pd_url, headers=headers, params=params, timeout=10)
+                response = response_cache.get(pd_url, headers=headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
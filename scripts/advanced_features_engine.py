@@ -19,6 +19,9 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.features.standings import StandingsEngine
+from src.features.team_timeline import TeamTimeline
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -29,6 +32,7 @@ class AdvancedFeaturesEngine:
     
     def __init__(self):
         self.feature_cache = {}
+        self.standings = None  # StandingsEngine del último build (tabla actual para partidos próximos)
         
     def add_temporal_context_features(self, df):
         """Añadir features de contexto temporal"""
@@ -67,17 +71,10 @@ class AdvancedFeaturesEngine:
             return 5  # Final de temporada
     
     def _add_rest_days_features(self, df):
-        """Añadir features de días de descanso"""
-        df = df.sort_values(['HomeTeam', 'Date']).reset_index(drop=True)
-        
-        # Días de descanso para equipo local
-        df['home_rest_days'] = df.groupby('HomeTeam')['Date'].diff().dt.days.fillna(7)
-        df['home_rest_days'] = df['home_rest_days'].clip(1, 14)  # Limitar entre 1-14 días
-        
-        # Días de descanso para equipo visitante
-        df = df.sort_values(['AwayTeam', 'Date']).reset_index(drop=True)
-        df['away_rest_days'] = df.groupby('AwayTeam')['Date'].diff().dt.days.fillna(7)
-        df['away_rest_days'] = df['away_rest_days'].clip(1, 14)
+        """Añadir features de días de descanso (desde el partido anterior del equipo, local o visitante)"""
+        timeline = TeamTimeline(df)
+        rest = np.clip(np.nan_to_num(timeline.days_since_previous(), nan=7.0), 1, 14)  # Limitar entre 1-14 días
+        df['home_rest_days'], df['away_rest_days'] = timeline.to_matches(rest)
         
         # Diferencia de descanso
         df['rest_days_diff'] = df['home_rest_days'] - df['away_rest_days']
@@ -90,26 +87,9 @@ class AdvancedFeaturesEngine:
     
     def _add_calendar_congestion_features(self, df):
         """Añadir features de congestión de calendario"""
-        # Partidos en últimos 7 días para cada equipo
-        df['home_matches_7d'] = 0
-        df['away_matches_7d'] = 0
-        
-        for idx, row in df.iterrows():
-            # Partidos del equipo local en últimos 7 días
-            home_team_matches = df[
-                ((df['HomeTeam'] == row['HomeTeam']) | (df['AwayTeam'] == row['HomeTeam'])) &
-                (df['Date'] < row['Date']) &
-                (df['Date'] >= row['Date'] - pd.Timedelta(days=7))
-            ]
-            df.loc[idx, 'home_matches_7d'] = len(home_team_matches)
-            
-            # Partidos del equipo visitante en últimos 7 días
-            away_team_matches = df[
-                ((df['HomeTeam'] == row['AwayTeam']) | (df['AwayTeam'] == row['AwayTeam'])) &
-                (df['Date'] < row['Date']) &
-                (df['Date'] >= row['Date'] - pd.Timedelta(days=7))
-            ]
-            df.loc[idx, 'away_matches_7d'] = len(away_team_matches)
+        # Partidos en últimos 7 días para cada equipo (búsqueda binaria sobre su línea temporal)
+        timeline = TeamTimeline(df)
+        df['home_matches_7d'], df['away_matches_7d'] = timeline.to_matches(timeline.count_in_window(7))
         
         # Congestión relativa
         df['congestion_diff'] = df['home_matches_7d'] - df['away_matches_7d']
@@ -134,19 +114,12 @@ class AdvancedFeaturesEngine:
         return df
     
     def _add_table_position_features(self, df):
-        """Añadir features de posición en tabla"""
-        # Calcular tabla acumulativa para cada fecha
-        df['home_table_position'] = 0
-        df['away_table_position'] = 0
-        
-        for idx, row in df.iterrows():
-            # Tabla hasta esta fecha
-            table_data = self._calculate_table_position(df, row['Date'])
-            
-            if row['HomeTeam'] in table_data:
-                df.loc[idx, 'home_table_position'] = table_data[row['HomeTeam']]
-            if row['AwayTeam'] in table_data:
-                df.loc[idx, 'away_table_position'] = table_data[row['AwayTeam']]
+        """Añadir features de posición en tabla (clasificación as-of por liga-temporada)"""
+        # Una sola pasada: la posición de cada partido usa solo jornadas anteriores
+        self.standings = StandingsEngine().fit(df)
+        positions = self.standings.match_positions()
+        df['home_table_position'] = positions['home_table_position']
+        df['away_table_position'] = positions['away_table_position']
         
         # Diferencia de posición
         df['position_diff'] = df['home_table_position'] - df['away_table_position']
@@ -157,83 +130,27 @@ class AdvancedFeaturesEngine:
         
         return df
     
-    def _calculate_table_position(self, df, date):
-        """Calcular posición en tabla hasta una fecha específica"""
-        # Filtrar partidos hasta la fecha
-        matches_until_date = df[df['Date'] < date].copy()
-        
-        if len(matches_until_date) == 0:
-            return {}
-        
-        # Calcular puntos por equipo
-        team_points = {}
-        
-        for _, match in matches_until_date.iterrows():
-            home_team = match['HomeTeam']
-            away_team = match['AwayTeam']
-            
-            if home_team not in team_points:
-                team_points[home_team] = {'points': 0, 'played': 0}
-            if away_team not in team_points:
-                team_points[away_team] = {'points': 0, 'played': 0}
-            
-            team_points[home_team]['played'] += 1
-            team_points[away_team]['played'] += 1
-            
-            # Asignar puntos
-            if match['FTHG'] > match['FTAG']:  # Victoria local
-                team_points[home_team]['points'] += 3
-            elif match['FTHG'] < match['FTAG']:  # Victoria visitante
-                team_points[away_team]['points'] += 3
-            else:  # Empate
-                team_points[home_team]['points'] += 1
-                team_points[away_team]['points'] += 1
-        
-        # Ordenar por puntos y asignar posición
-        sorted_teams = sorted(team_points.items(), 
-                            key=lambda x: (x[1]['points'], x[1]['played']), 
-                            reverse=True)
-        
-        positions = {}
-        for i, (team, _) in enumerate(sorted_teams):
-            positions[team] = i + 1
-        
-        return positions
-    
     def _add_season_objectives_features(self, df):
         """Añadir features de objetivos de temporada"""
         # Objetivos basados en posición en tabla
-        df['home_objective'] = df['home_table_position'].apply(self._get_team_objective)
-        df['away_objective'] = df['away_table_position'].apply(self._get_team_objective)
+        df['home_objective'] = self._get_team_objective(df['home_table_position'].to_numpy())
+        df['away_objective'] = self._get_team_objective(df['away_table_position'].to_numpy())
         
-        # Urgencia del partido
-        df['match_urgency'] = df.apply(self._calculate_match_urgency, axis=1)
+        # Urgencia del partido: alta si ambos equipos tienen objetivos similares
+        gap = np.abs(df['home_objective'] - df['away_objective'])
+        df['match_urgency'] = np.select([gap == 0, gap == 1], [3, 2], 1)
         
         return df
     
     def _get_team_objective(self, position):
-        """Determinar objetivo del equipo basado en posición"""
-        if position <= 4:
-            return 1  # Champions League
-        elif position <= 6:
-            return 2  # Europa League
-        elif position <= 17:
-            return 3  # Mantenerse en liga
-        else:
-            return 4  # Evitar descenso
-    
-    def _calculate_match_urgency(self, row):
-        """Calcular urgencia del partido"""
-        home_obj = row['home_objective']
-        away_obj = row['away_objective']
-        
-        # Mayor urgencia si ambos equipos tienen objetivos similares
-        if home_obj == away_obj:
-            return 3  # Alta urgencia
-        elif abs(home_obj - away_obj) == 1:
-            return 2  # Media urgencia
-        else:
-            return 1  # Baja urgencia
+        """Determinar objetivo del equipo basado en posición (escalar o array)"""
+        position = np.asarray(position)
+        objective = np.select(
+            [position <= 4, position <= 6, position <= 17],
+            [1, 2, 3],   # Champions League, Europa League, mantenerse en liga
+            4            # Evitar descenso
+        )
+        return objective if objective.ndim else int(objective)
     
     def _add_result_pressure_features(self, df):
         """Añadir features de presión de resultados"""
@@ -247,63 +164,22 @@ class AdvancedFeaturesEngine:
     
     def _add_result_streak_features(self, df):
         """Añadir features de racha de resultados"""
-        df['home_streak'] = 0
-        df['away_streak'] = 0
-        
-        for idx, row in df.iterrows():
-            # Racha del equipo local
-            home_streak = self._calculate_team_streak(df, row['HomeTeam'], row['Date'], 'home')
-            df.loc[idx, 'home_streak'] = home_streak
-            
-            # Racha del equipo visitante
-            away_streak = self._calculate_team_streak(df, row['AwayTeam'], row['Date'], 'away')
-            df.loc[idx, 'away_streak'] = away_streak
+        # Racha = victorias - derrotas en los últimos 5 partidos del equipo
+        timeline = TeamTimeline(df)
+        streak = timeline.prev_sum(timeline.result, 5).astype(int)
+        df['home_streak'], df['away_streak'] = timeline.to_matches(streak)
         
         # Diferencia de racha
         df['streak_diff'] = df['home_streak'] - df['away_streak']
         
         return df
     
-    def _calculate_team_streak(self, df, team, date, team_type):
-        """Calcular racha de un equipo"""
-        # Partidos recientes del equipo
-        team_matches = df[
-            ((df['HomeTeam'] == team) | (df['AwayTeam'] == team)) &
-            (df['Date'] < date)
-        ].tail(5)  # Últimos 5 partidos
-        
-        if len(team_matches) == 0:
-            return 0
-        
-        streak = 0
-        for _, match in team_matches.iterrows():
-            if match['HomeTeam'] == team:
-                if match['FTHG'] > match['FTAG']:
-                    streak += 1
-                elif match['FTHG'] < match['FTAG']:
-                    streak -= 1
-            else:  # Away team
-                if match['FTHG'] < match['FTAG']:
-                    streak += 1
-                elif match['FTHG'] > match['FTAG']:
-                    streak -= 1
-        
-        return streak
-    
     def _add_negative_pressure_features(self, df):
         """Añadir features de presión por resultados negativos"""
-        # Partidos sin ganar
-        df['home_winless'] = 0
-        df['away_winless'] = 0
-        
-        for idx, row in df.iterrows():
-            # Partidos sin ganar del equipo local
-            home_winless = self._calculate_winless_matches(df, row['HomeTeam'], row['Date'])
-            df.loc[idx, 'home_winless'] = home_winless
-            
-            # Partidos sin ganar del equipo visitante
-            away_winless = self._calculate_winless_matches(df, row['AwayTeam'], row['Date'])
-            df.loc[idx, 'away_winless'] = away_winless
+        # Partidos consecutivos sin ganar (run-length de no-victorias, máximo 10)
+        timeline = TeamTimeline(df)
+        winless = np.minimum(timeline.prev_run_length(timeline.result < 1), 10)
+        df['home_winless'], df['away_winless'] = timeline.to_matches(winless)
         
         # Presión por resultados negativos
         df['home_negative_pressure'] = (df['home_winless'] >= 3).astype(int)
@@ -311,28 +187,6 @@ class AdvancedFeaturesEngine:
         
         return df
     
-    def _calculate_winless_matches(self, df, team, date):
-        """Calcular partidos consecutivos sin ganar"""
-        team_matches = df[
-            ((df['HomeTeam'] == team) | (df['AwayTeam'] == team)) &
-            (df['Date'] < date)
-        ].tail(10)  # Últimos 10 partidos
-        
-        winless = 0
-        for _, match in team_matches.iterrows():
-            if match['HomeTeam'] == team:
-                if match['FTHG'] <= match['FTAG']:  # No ganó
-                    winless += 1
-                else:
-                    break
-            else:  # Away team
-                if match['FTHG'] >= match['FTAG']:  # No ganó
-                    winless += 1
-                else:
-                    break
-        
-        return winless
-    
     def add_market_features(self, df):
         """Añadir features del mercado (odds)"""
         print("   Añadiendo features del mercado...")
@@ -400,7 +254,7 @@ def main():
     print("Probando motor de features avanzados...")
     
     # Cargar datos de ejemplo
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     
     # Crear motor de features
     feature_engine = AdvancedFeaturesEngine()
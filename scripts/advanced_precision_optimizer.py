@@ -23,6 +23,7 @@ from src.models.calibration import ProbabilityCalibrator
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
 from src.features.professional_features import add_all_professional_features
+from src.utils.arrow_cache import load_matches
 from sklearn.model_selection import TimeSeriesSplit
 from sklearn.metrics import log_loss, accuracy_score
 from sklearn.linear_model import LogisticRegression
@@ -52,7 +53,7 @@ class AdvancedPrecisionOptimizer:
         print("=" * 70)
         
         print("\n1. Cargando datos históricos...")
-        df = pd.read_parquet(PROC / "matches.parquet")
+        df = load_matches(writable=True)
         
         print(f"   Datos iniciales: {len(df)} partidos")
         
@@ -8,6 +8,7 @@ import requests
 from src.features.ratings import add_elo
 from src.models.poisson_dc import DixonColes
 from src.utils.odds import remove_overround, implied_probs_from_odds
+from src.utils.arrow_cache import load_matches
 
 API_HOST = os.getenv("API_FOOTBALL_HOST", "api-football-v1.p.rapidapi.com")
 API_KEY  = os.getenv("API_FOOTBALL_KEY", "")
@@ -74,7 +75,7 @@ def telegram_send(msg: str):
 
 def main():
     PROC = Path("data/processed"); REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
-    hist = pd.read_parquet(PROC / "matches.parquet")
+    hist = load_matches(writable=True)
     hist = add_elo(hist)
 
     # Train on all historical for Elo params in DC
@@ -9,20 +9,22 @@ from src.features.rolling import add_form
 from src.utils.odds import market_probs_1x2, implied_probs_from_odds, remove_overround
 from src.backtest.bankroll import kelly_fraction, bet_decision
 from src.backtest.settle import settle_1x2, settle_ou, settle_ah
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
 
-def main():
-    df0 = pd.read_parquet(PROC / "matches.parquet")
+def run_walk_forward(df0: pd.DataFrame, verbose: bool = True) -> pd.DataFrame:
+    """Walk-forward multi-mercado sobre `df0` (partidos históricos); devuelve el log de apuestas."""
     # features antes de split
     df = add_elo(df0); df = add_form(df)
     
     # FASE 2: Walk-Forward Validation
     # En lugar de split estático 70/30, usamos rolling window
-    print("=" * 60)
-    print("BACKTEST CON WALK-FORWARD VALIDATION + CALIBRACIÓN")
-    print("=" * 60)
+    if verbose:
+        print("=" * 60)
+        print("BACKTEST CON WALK-FORWARD VALIDATION + CALIBRACIÓN")
+        print("=" * 60)
     
     WINDOW_SIZE = 400  # Partidos para entrenar
     MIN_TRAIN = 300     # Mínimo de datos históricos
@@ -49,11 +51,12 @@ def main():
             p1x2_train = dc.predict_1x2(train)
             calibrator = ProbabilityCalibrator()
             calibrator.fit(train['y'].values, p1x2_train)
-            print(f"  Re-entrenado en partido {test_idx}/{len(df)} (train: {len(train)} partidos)")
+            if verbose:
+                print(f"  Re-entrenado en partido {test_idx}/{len(df)} (train: {len(train)} partidos)")
         
         # Predecir para este partido
         row_df = pd.DataFrame([row])
-        p1x2 = calibrator.transform(dc.predict_1x2(row_df))
+        p_row = calibrator.transform_array(dc.predict_1x2(row_df)[['pH','pD','pA']].to_numpy())[0]
         mkt = pd.DataFrame([market_probs_1x2(row)], columns=['pH_mkt','pD_mkt','pA_mkt'])
         cands = []
         
@@ -66,7 +69,6 @@ def main():
 
         # 1X2 - REACTIVADO CON CALIBRACIÓN FASE 2
         # Filtros MUY estrictos: edge 8%, odds >=2.20, prob >=0.50
-        p_row = p1x2.iloc[0][['pH','pD','pA']].to_numpy(float)
         q_row = mkt.iloc[0][['pH_mkt','pD_mkt','pA_mkt']].to_numpy(float)
         odds1 = row[['B365H','B365D','B365A']].to_numpy(float)
         idx = int(np.argmax(p_row - q_row))
@@ -141,13 +143,17 @@ def main():
                         market=best['market'], selection=best['selection'], line=best['line'], odds_open=best['odds'],
                         stake=stake, result=res, pnl=pnl, equity=bankroll, p_model=best['p_model'], p_mkt=best['p_mkt']))
 
-    print("=" * 60)
-    print(f"WALK-FORWARD COMPLETADO")
-    print(f"Total partidos evaluados: {len(df) - MIN_TRAIN}")
-    print(f"Apuestas realizadas: {len(log)}")
-    print("=" * 60)
-    
-    log_df = pd.DataFrame(log)
+    if verbose:
+        print("=" * 60)
+        print(f"WALK-FORWARD COMPLETADO")
+        print(f"Total partidos evaluados: {len(df) - MIN_TRAIN}")
+        print(f"Apuestas realizadas: {len(log)}")
+        print("=" * 60)
+    return pd.DataFrame(log)
+
+def main():
+    df0 = load_matches(writable=True)
+    log_df = run_walk_forward(df0)
     out = REPORTS / "backtest_log.csv"
     log_df.to_csv(out, index=False)
     print("Log guardado:", out)
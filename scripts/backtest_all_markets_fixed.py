@@ -21,6 +21,7 @@ from src.features.rolling import add_form
 from src.utils.odds import market_probs_1x2, implied_probs_from_odds, remove_overround
 from src.backtest.bankroll import kelly_fraction, bet_decision
 from src.backtest.settle import settle_1x2, settle_ou, settle_ah
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
@@ -35,7 +36,7 @@ def main():
     print("  OU2.5: Dixon-Coles mejorado con filtros estrictos")
     print("=" * 70)
     
-    df0 = pd.read_parquet(PROC / "matches.parquet")
+    df0 = load_matches(writable=True)
     
     # Features
     df = add_elo(df0)
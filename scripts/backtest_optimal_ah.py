@@ -21,6 +21,7 @@ from src.features.ratings import add_elo
 from src.features.rolling import add_form
 from src.backtest.bankroll import kelly_fraction, bet_decision
 from src.backtest.settle import settle_ah
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
@@ -38,7 +39,7 @@ def main():
     print("  - Drawdown management: Activo a 10%")
     print("=" * 70)
     
-    df0 = pd.read_parquet(PROC / "matches.parquet")
+    df0 = load_matches(writable=True)
     
     # Features
     df = add_elo(df0)
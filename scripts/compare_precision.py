@@ -14,6 +14,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.models.poisson_dc import DixonColes
 from src.features.ratings import add_elo
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -25,7 +26,7 @@ def compare_precision():
     
     # Cargar datos
     print("\n1. Cargando datos...")
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     df = add_elo(df)
     
     # Dividir datos temporalmente
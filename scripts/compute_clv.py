@@ -1,6 +1,7 @@
 from pathlib import Path
 import pandas as pd
-from src.reporting.clv import clv_from_open_close, choose_close_row
+import pyarrow.parquet as pq
+from src.reporting.clv import compute_clv, clv_summary, CLOSE_BLOCKS
 
 REPORTS = Path("reports")
 PROC    = Path("data/processed")
@@ -11,34 +12,23 @@ def main():
     if not log_fp.exists() or not ds_fp.exists():
         raise SystemExit("Faltan archivos: reports/backtest_log.csv o data/processed/matches.parquet")
     log = pd.read_csv(log_fp, parse_dates=['date'])
-    ds  = pd.read_parquet(ds_fp)
 
-    # Join back test rows to dataset to fetch closing odds columns (PSC*, B365C*, AvgC*)
+    # Sólo las columnas de cierre que usa el motor de CLV (evita cargar las 150+ columnas)
     key_cols = ['Date','HomeTeam','AwayTeam']
+    close_cols = {f"{p}{s}" for prefs, sufs, _ in CLOSE_BLOCKS.values() for p in prefs for s in sufs} | {'AHCh'}
+    avail = set(pq.read_schema(ds_fp).names)
+    ds  = pd.read_parquet(ds_fp, columns=key_cols + sorted(close_cols & avail))
     merged = log.merge(ds, left_on=['date','home','away'], right_on=key_cols, how='left', suffixes=('','_ds'))
 
-    clv_vals = []
-    for _, r in merged.iterrows():
-        if r['market'] != '1X2':
-            clv_vals.append(pd.NA); continue
-        open_odds = pd.Series([r.get('odds_open'), None, None], index=['H','D','A'])  # we only know placed selection price
-        # get full opening odds from dataset if present; else leave others NaN
-        try:
-            open_series = pd.Series([r.get('B365H'), r.get('B365D'), r.get('B365A')], index=['H','D','A'])
-            if open_series.notna().all():
-                open_odds = open_series
-        except Exception:
-            pass
-        close_vec = choose_close_row(r)
-        close_series = pd.Series(close_vec, index=['H','D','A'])
-        idx_pick = {'H':0,'D':1,'A':2}.get(r['selection'], None)
-        clv = clv_from_open_close(open_series, close_series, idx_pick) if idx_pick is not None else pd.NA
-        clv_vals.append(clv)
-
-    merged['clv'] = clv_vals
+    merged = compute_clv(merged)
     out = REPORTS / "backtest_log_with_clv.csv"
     merged.to_csv(out, index=False)
     print("CLV añadido en:", out)
 
+    summ = clv_summary(merged)
+    print(summ['total'].to_string(index=False))
+    pd.concat([t.assign(level=k) for k, t in summ.items()], ignore_index=True).to_csv(REPORTS / "clv_summary.csv", index=False)
+    print("Resumen CLV:", REPORTS / "clv_summary.csv")
+
 if __name__ == "__main__":
     main()
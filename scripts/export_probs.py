@@ -3,11 +3,12 @@ import pandas as pd
 from src.models.poisson_dc import DixonColes
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed"); REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
 
 # Cargar y crear features ANTES del split
-df0 = pd.read_parquet(PROC / "matches.parquet").sort_values("Date")
+df0 = load_matches(writable=True).sort_values("Date")
 df = add_elo(df0); df = add_form(df)
 
 split = df["Date"].quantile(0.7)
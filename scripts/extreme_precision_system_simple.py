@@ -15,8 +15,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.models.poisson_dc import DixonColes
 from src.models.xgboost_classifier import XGBoost1X2Classifier
+from src.models.feature_matrix import feature_matrix
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.utils.arrow_cache import load_matches
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, ExtraTreesClassifier, AdaBoostClassifier
 from sklearn.linear_model import LogisticRegression
 from sklearn.neural_network import MLPClassifier
@@ -46,7 +48,7 @@ class ExtremePrecisionSystem:
         
         # 1. Cargar datos
         print("\n1. Cargando datos históricos...")
-        df = pd.read_parquet(PROC / "matches.parquet")
+        df = load_matches(writable=True)
         df = add_elo(df)
         df = add_form(df)
         
@@ -297,8 +299,7 @@ class ExtremePrecisionSystem:
         # Filtrar columnas que existen
         available_cols = [col for col in feature_cols if col in df.columns]
         
-        X = df[available_cols].fillna(0)
-        return X
+        return feature_matrix(df, available_cols, fill=0.0)
     
     def _bayesian_optimize_ensemble(self, train_df, test_df):
         """Optimización bayesiana del ensemble"""
@@ -16,6 +16,8 @@ from dotenv import load_dotenv
 # Agregar el directorio raíz al path
 sys.path.append('.')
 
+from src.utils.arrow_cache import load_matches
+
 load_dotenv()
 
 PROC = Path("data/processed")
@@ -51,7 +53,7 @@ def get_current_elos():
     dict: {equipo: elo_rating}
     """
     print("Cargando ELO ratings actuales...")
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches()
     
     # Agregar ELO si no existe
     if 'EloHome' not in df.columns:
@@ -106,10 +108,11 @@ def get_team_stats(team_name, df):
     }
     
     if len(home_matches) > 0:
-        last_home = home_matches.iloc[-1]
-        stats['GD_roll5'] = last_home.get('Home_GD_roll5', 0)
-        stats['GF_roll5'] = last_home.get('Home_GF_roll5', 0)
-        stats['GA_roll5'] = last_home.get('Home_GA_roll5', 0)
+        # Forma previa al próximo partido: los últimos 5 como local, incluido el último
+        # (las columnas *_roll5 del histórico solo ven partidos anteriores a cada fila)
+        stats['GF_roll5'] = home_matches['FTHG'].sum()
+        stats['GA_roll5'] = home_matches['FTAG'].sum()
+        stats['GD_roll5'] = stats['GF_roll5'] - stats['GA_roll5']
     
     return stats
 
@@ -225,7 +228,7 @@ def prepare_fixtures_for_prediction():
     elos = get_current_elos()
     
     # Cargar dataset para stats
-    df_historical = pd.read_parquet(PROC / "matches.parquet")
+    df_historical = load_matches()
     
     # Descargar fixtures de todas las ligas
     all_fixtures = []
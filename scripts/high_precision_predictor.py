@@ -22,6 +22,7 @@ from src.models.calibration import ProbabilityCalibrator
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
 from src.features.reglas_dinamicas import calcular_reglas_dinamicas
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -46,7 +47,7 @@ class HighPrecisionPredictor:
         
         # Cargar datos
         print("\n1. Cargando datos históricos...")
-        self.df_historico = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historico = load_matches(writable=True)
         self.df_historico = add_elo(self.df_historico)
         self.df_historico = add_form(self.df_historico)
         
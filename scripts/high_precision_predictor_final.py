@@ -17,6 +17,7 @@ from src.models.poisson_dc import DixonColes
 from src.models.xgboost_classifier import XGBoost1X2Classifier
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.utils.arrow_cache import load_matches
 from sklearn.metrics import accuracy_score, log_loss
 import warnings
 warnings.filterwarnings('ignore')
@@ -43,7 +44,7 @@ class HighPrecisionPredictor:
         
         # 1. Cargar datos
         print("\n1. Cargando datos históricos...")
-        self.df_historico = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historico = load_matches(writable=True)
         self.df_historico = add_elo(self.df_historico)
         self.df_historico = add_form(self.df_historico)
         
@@ -16,6 +16,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.models.poisson_dc import DixonColes
 from src.features.ratings import add_elo
 from src.features.reglas_dinamicas import calcular_reglas_dinamicas
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -37,7 +38,7 @@ class ImprovedPredictor:
         
         # Cargar datos
         print("\n1. Cargando datos históricos...")
-        self.df_historico = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historico = load_matches(writable=True)
         self.df_historico = add_elo(self.df_historico)
         
         print(f"   Partidos cargados: {len(self.df_historico)}")
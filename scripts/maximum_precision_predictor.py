@@ -20,6 +20,7 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 from src.models.poisson_dc import DixonColes
 from src.models.xgboost_classifier import XGBoost1X2Classifier
 from src.models.calibration import ProbabilityCalibrator
+from src.utils.arrow_cache import load_matches
 from sklearn.linear_model import LogisticRegression
 from sklearn.isotonic import IsotonicRegression
 from sklearn.metrics import accuracy_score, log_loss
@@ -51,7 +52,7 @@ class MaximumPrecisionPredictor:
         
         # 1. Cargar datos
         print("\n1. Cargando datos históricos...")
-        df = pd.read_parquet(PROC / "matches.parquet")
+        df = load_matches(writable=True)
         print(f"   Datos iniciales: {len(df)} partidos")
         
         # 2. Añadir features avanzados
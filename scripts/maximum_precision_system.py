@@ -24,8 +24,10 @@ sys.path.insert(0, str(Path(__file__).parent.parent))
 
 from src.models.poisson_dc import DixonColes
 from src.models.xgboost_classifier import XGBoost1X2Classifier
+from src.models.feature_matrix import feature_matrix
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.utils.arrow_cache import load_matches
 from sklearn.ensemble import RandomForestClassifier, GradientBoostingClassifier, ExtraTreesClassifier, AdaBoostClassifier, VotingClassifier, BaggingClassifier
 from sklearn.linear_model import LogisticRegression, RidgeClassifier, ElasticNet, SGDClassifier
 from sklearn.neural_network import MLPClassifier
@@ -70,7 +72,7 @@ class MaximumPrecisionSystem:
         
         # 1. Cargar datos
         print("\n1. Cargando datos históricos...")
-        df = pd.read_parquet(PROC / "matches.parquet")
+        df = load_matches(writable=True)
         df = add_elo(df)
         df = add_form(df)
         
@@ -500,8 +502,7 @@ class MaximumPrecisionSystem:
         # Filtrar columnas que existen
         available_cols = [col for col in feature_cols if col in df.columns]
         
-        X = df[available_cols].fillna(0)
-        return X
+        return feature_matrix(df, available_cols, fill=0.0)
     
     def _maximum_bayesian_optimize(self, train_df, test_df):
         """Optimización bayesiana máxima del ensemble"""
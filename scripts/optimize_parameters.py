@@ -19,6 +19,7 @@ from src.features.rolling import add_form
 from src.utils.odds import market_probs_1x2, implied_probs_from_odds, remove_overround
 from src.backtest.bankroll import kelly_fraction, bet_decision
 from src.backtest.settle import settle_1x2, settle_ou, settle_ah
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -143,7 +144,7 @@ def main():
     print("="*70 + "\n")
     
     print("Cargando datos...")
-    df0 = pd.read_parquet(PROC / "matches.parquet")
+    df0 = load_matches(writable=True)
     
     print("Probando combinaciones de parámetros...\n")
     print("(Esto puede tomar 3-5 minutos)\n")
@@ -24,6 +24,7 @@ from src.models.xgboost_classifier import XGBoost1X2Classifier
 from src.models.calibration import ProbabilityCalibrator
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -43,7 +44,7 @@ class PrecisionOptimizer:
         """Cargar y preparar datos"""
         print("Cargando datos para optimización...")
         
-        df = pd.read_parquet(PROC / "matches.parquet")
+        df = load_matches(writable=True)
         df = add_elo(df)
         df = add_form(df)
         
@@ -23,6 +23,7 @@ from src.models.calibration import ProbabilityCalibrator
 from src.features.ratings import add_elo
 from src.features.rolling import add_form
 from src.utils.odds import remove_overround, implied_probs_from_odds
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
@@ -49,7 +50,7 @@ class MatchPredictor:
         
         # Cargar datos
         print("\n1. Cargando datos históricos...")
-        self.df_historical = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historical = load_matches(writable=True)
         
         # Features
         self.df_historical = add_elo(self.df_historical)
@@ -385,8 +386,8 @@ def main():
     else:
         # Buscar equipos en el dataset
         df = predictor.df_historical
-        home_matches = df[df['HomeTeam'] == args.home].tail(1)
-        away_matches = df[df['AwayTeam'] == args.away].tail(1)
+        home_matches = df[df['HomeTeam'] == args.home].tail(5)
+        away_matches = df[df['AwayTeam'] == args.away].tail(5)
         
         if len(home_matches) == 0 or len(away_matches) == 0:
             print(f"\nERROR: No se encontraron datos para {args.home} o {args.away}")
@@ -397,10 +398,12 @@ def main():
             'AwayTeam': args.away,
             'League': args.league,
             'Date': datetime.now().strftime('%Y-%m-%d'),
-            'EloHome': home_matches.iloc[0]['EloHome'],
-            'EloAway': away_matches.iloc[0]['EloAway'],
-            'Home_GD_roll5': home_matches.iloc[0].get('Home_GD_roll5', 0),
-            'Away_GD_roll5': away_matches.iloc[0].get('Away_GD_roll5', 0),
+            'EloHome': home_matches.iloc[-1]['EloHome'],
+            'EloAway': away_matches.iloc[-1]['EloAway'],
+            # Forma previa al próximo partido: los últimos 5 en la misma condición,
+            # incluido el último (las columnas *_roll5 solo ven partidos anteriores a su fila)
+            'Home_GD_roll5': (home_matches['FTHG'] - home_matches['FTAG']).sum(),
+            'Away_GD_roll5': (away_matches['FTAG'] - away_matches['FTHG']).sum(),
             'B365H': 2.00,
             'B365D': 3.40,
             'B365A': 3.80
@@ -26,6 +26,7 @@ from src.features.reglas_dinamicas import calcular_reglas_dinamicas
 from src.features.ratings import add_elo
 from src.features.mejoras_prediccion import AplicarMejorasCompletas
 from src.features.eficiencia_conversion import analizador_eficiencia
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -52,7 +53,7 @@ class PredictorCorregidoSimple:
         
         # 1. Cargar datos
         print("1. Cargando datos...")
-        self.df_historico = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historico = load_matches()
         print(f"   {len(self.df_historico)} partidos")
         
         # 2. ELO
@@ -28,6 +28,7 @@ from src.models.poisson_dc import DixonColes
 from src.models.xgboost_classifier import XGBoost1X2Classifier
 from src.features.reglas_dinamicas import calcular_reglas_dinamicas, preparar_features_para_prediccion
 from src.features.ratings import add_elo
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 
@@ -55,7 +56,7 @@ class PredictorReglasDinamicas:
         
         # 1. Cargar datos históricos base (sin features pre-calculados)
         print("1. Cargando datos históricos base...")
-        self.df_historico = pd.read_parquet(PROC / "matches.parquet")
+        self.df_historico = load_matches(writable=True)
         print(f"   {len(self.df_historico)} partidos cargados")
         
         # 2. Añadir ELO (necesario para el modelo)
@@ -23,7 +23,7 @@ sys.path.insert(0, str(ROOT))
 import pandas as pd
 from src.etl.prepare_dataset_pro import load_football_data, load_understat_xg, merge_xg
 from src.features.ratings import add_elo
-from src.features.reglas_analisis import add_reglas_analisis
+from src.features.feature_store import FeatureStore
 
 PROC = Path("data/processed")
 
@@ -61,7 +61,12 @@ def main():
     # 4. APLICAR REGLAS ESPECÍFICAS
     print("\n[PASO 4/4] Aplicando TUS 5 REGLAS...")
     print("-" * 70)
-    df = add_reglas_analisis(df)
+    # Mismas tablas de estado que usa el dashboard (calcular_reglas_dinamicas):
+    # cada partido recibe el estado de los días anteriores a su fecha
+    store = FeatureStore().fit(df)
+    df = df.join(store.point_in_time(df))
+    store.save()
+    print(f"✅ Feature store guardado en data/processed/feature_store ({len(store.tables)} tablas)")
     
     # 5. Guardar
     print("\n" + "=" * 70)
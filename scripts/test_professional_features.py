@@ -28,6 +28,7 @@ from src.features.professional_features import (
     add_motivation_context,
     add_xg_rolling_features
 )
+from src.utils.arrow_cache import load_matches
 
 PROC = Path("data/processed")
 REPORTS = Path("reports"); REPORTS.mkdir(parents=True, exist_ok=True)
@@ -42,7 +43,7 @@ def test_h2h_features():
     print("=" * 70)
     
     # Cargar datos
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     df = add_elo(df)
     df = add_head_to_head_features(df, n_matches=5)
     
@@ -95,7 +96,7 @@ def test_home_away_separation():
     print("=" * 70)
     
     # Cargar datos
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     df = add_elo(df)
     df = add_home_away_separated_form(df, window=5)
     
@@ -146,7 +147,7 @@ def test_multi_window():
     print("=" * 70)
     
     # Cargar datos
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     df = add_elo(df)
     df = add_multi_window_form(df, windows=[5, 10])
     
@@ -189,7 +190,7 @@ def test_xg_overperformance():
     print("=" * 70)
     
     # Cargar datos
-    df = pd.read_parquet(PROC / "matches.parquet")
+    df = load_matches(writable=True)
     
     if 'xG_home' not in df.columns or df['xG_home'].isna().all():
         print("⚠️  xG no disponible, saltando test")
@@ -238,7 +239,7 @@ def compare_with_without_features():
     print("=" * 70)
     
     # Cargar datos base
-    df_base = pd.read_parquet(PROC / "matches.parquet")
+    df_base = load_matches(writable=True)
     df_base = add_elo(df_base)
     df_base = add_form(df_base, window=5)
     
@@ -15,6 +15,11 @@ import json
 import os
 from pathlib import Path
 
+try:
+    from src.utils.arrow_cache import load_dataset
+except ImportError:  # main.py añade src/ al sys.path
+    from utils.arrow_cache import load_dataset
+
 
 @dataclass
 class ValueAlert:
@@ -308,7 +313,7 @@ def generate_daily_alerts() -> Dict:
     
     # Cargar fixtures próximos (esto debería conectarse con el sistema principal)
     try:
-        fixtures_df = pd.read_parquet('data/processed/upcoming_fixtures.parquet')
+        fixtures_df = load_dataset('upcoming_fixtures')
         
         # Aquí se procesarían las predicciones y análisis
         # Por ahora, retornamos un ejemplo
@@ -1,13 +1,63 @@
-import requests
 import json
+import threading
+import unicodedata
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
 from datetime import datetime, timedelta
 import time
 import os
 
+try:
+    from src.utils.http_client import get_client
+    from src.utils.names import normalize_name
+    from src.utils.response_cache import get_response_cache
+except ImportError:  # main.py añade src/ al sys.path
+    from utils.http_client import get_client
+    from utils.names import normalize_name
+    from utils.response_cache import get_response_cache
+
+
+class SourceStats:
+    """Latencia (EWMA) y tasa de éxito por fuente para priorizar las rápidas y fiables."""
+
+    def __init__(self, alpha=0.3):
+        self.alpha = alpha
+        self.calls = 0
+        self.successes = 0
+        self.timeouts = 0
+        self.latency = None
+        self.last_error = None
+        self.last_count = 0
+
+    def record(self, latency, n_fixtures=0, error=None, timed_out=False):
+        self.calls += 1
+        self.latency = latency if self.latency is None else self.alpha * latency + (1 - self.alpha) * self.latency
+        self.timeouts += int(timed_out)
+        self.last_count = n_fixtures
+        if error is None and n_fixtures > 0 and not timed_out:
+            self.successes += 1
+        self.last_error = error
+
+    @property
+    def success_rate(self):
+        return self.successes / self.calls if self.calls else 1.0
+
+    def score(self):
+        """Mayor es mejor: tasa de éxito penalizada por la latencia media."""
+        return self.success_rate / (1.0 + (self.latency or 0.0))
+
+    def to_dict(self):
+        return {'calls': self.calls, 'success_rate': round(self.success_rate, 3),
+                'latency_s': round(self.latency, 3) if self.latency is not None else None,
+                'timeouts': self.timeouts, 'last_count': self.last_count, 'last_error': self.last_error}
+
+
 class RealFixturesAPI:
     """API para obtener partidos reales de fútbol usando únicamente datos reales"""
     
-    def __init__(self):
+    # Prioridad base (menor = más fiable) usada al desduplicar y antes de tener estadísticas
+    SOURCE_PRIORITY = ['football-data', 'sportdb', 'rapidapi', 'footystats', 'calendar']
+    
+    def __init__(self, deadline=30.0):
         # Usar API gratuita de Football-Data.org con tu API key
         self.api_key = os.environ.get('FOOTBALL_API_KEY', '2b1693b0c9ba4a99bf8346cd0a9d27d0')  # Tu API key
         self.base_url = "https://api.football-data.org/v4"
@@ -25,71 +75,122 @@ class RealFixturesAPI:
             'F1': 'FL1'  # Ligue 1
         }
         
-        # Cache para evitar múltiples llamadas
-        self.cache = {}
-        self.last_request_time = 0
-        self.request_delay = 2  # Reducido a 2 segundos
+        # Cliente compartido: pool de conexiones + token bucket por host (10 req/min en football-data.org)
+        self.http = get_client()
+        # Caché en disco compartida por todos los workers (TTL por endpoint + stale-while-revalidate)
+        self.cache = get_response_cache()
+        self.fixtures_ttl = 300
+        
+        # Fuentes consultadas en paralelo bajo un deadline global
+        self.deadline = deadline
+        self.sources = {
+            'football-data': self._get_football_data_matches,
+            'sportdb': self._get_sportdb_matches,
+            'rapidapi': self._get_rapidapi_matches,
+            'footystats': self._get_footystats_matches,
+            'calendar': self._get_official_calendar_matches,
+        }
+        if not self.api_key:
+            self.sources.pop('football-data')
+        self.source_stats = {name: SourceStats() for name in self.sources}
+        self._stats_lock = threading.Lock()
+        self._round = 0
         
         print(f"🔑 API configurada con key: {self.api_key[:8]}...")
-        print(f"⏱️ Delay entre requests: {self.request_delay} segundos")
         print(f"📊 Ligas disponibles: {list(self.league_ids.values())}")
+    
+    def _ordered_sources(self):
+        """
+        Fuentes por prioridad: primero por score (éxito / latencia), luego por la
+        prioridad base. Las que fallan siempre o superan el deadline solo se
+        reintentan una de cada 5 rondas.
+        """
+        names = []
+        for name in self.sources:
+            st = self.source_stats[name]
+            degraded = st.calls >= 3 and (st.success_rate == 0 or (st.latency or 0) > self.deadline)
+            if degraded and self._round % 5 != 0:
+                continue
+            names.append(name)
+        return sorted(names, key=lambda n: (-self.source_stats[n].score(), self._source_rank(n)))
+    
+    def _run_source(self, name, days_ahead, deadline):
+        """Ejecuta una fuente y registra su latencia; si termina tras el deadline cuenta como timeout."""
+        t0 = time.perf_counter()
+        try:
+            fixtures = self.sources[name](days_ahead) or []
+            error = None
+        except Exception as e:
+            fixtures, error = [], str(e)
+        with self._stats_lock:
+            latency = time.perf_counter() - t0
+            self.source_stats[name].record(latency, len(fixtures), error, timed_out=latency > deadline)
+        return fixtures
+    
+    def _source_rank(self, name):
+        return self.SOURCE_PRIORITY.index(name) if name in self.SOURCE_PRIORITY else len(self.SOURCE_PRIORITY)
+    
+    def get_source_stats(self):
+        """Latencia/éxito por fuente (para /status y diagnósticos)."""
+        with self._stats_lock:
+            return {name: st.to_dict() for name, st in self.source_stats.items()}
         
-    def _respect_rate_limit(self):
-        """Respetar el límite de requests de la API"""
-        current_time = time.time()
-        time_since_last_request = current_time - self.last_request_time
-        
-        if time_since_last_request < self.request_delay:
-            wait_time = self.request_delay - time_since_last_request
-            print(f"⏳ Esperando {wait_time:.1f} segundos para respetar límite de API...")
-            time.sleep(wait_time)
-        
-        self.last_request_time = time.time()
+    def get_upcoming_matches(self, days_ahead=7, deadline=None):
+        """
+        Partidos próximos consultando todas las fuentes EN PARALELO bajo un deadline
+        global; los resultados se fusionan a medida que llegan y se desduplican por
+        clave normalizada (equipos + fecha), conservando la fuente más prioritaria.
+        """
+        try:
+            # Cache compartida: solo un worker consulta las fuentes por ventana de 5 minutos;
+            # el resto espera lo que dura el fan-out (deadline + margen) en vez de repetirlo
+            deadline = self.deadline if deadline is None else deadline
+            return self.cache.get_or_refresh(f"api_fixtures_{days_ahead}",
+                                             lambda: self._collect_upcoming(days_ahead, deadline),
+                                             ttl=self.fixtures_ttl,
+                                             wait_timeout=deadline + 10) or []
+        except Exception as e:
+            print(f"❌ Error obteniendo datos: {e}")
+            return []
     
-    def get_upcoming_matches(self, days_ahead=7):
-        """Obtener partidos próximos usando SOLO tu API key de Football-Data.org"""
+    def _collect_upcoming(self, days_ahead, deadline=None):
+        """Fan-out a las fuentes, fusión y desduplicado (sin cache)."""
         try:
-            # Verificar cache primero
-            cache_key = f"api_fixtures_{days_ahead}"
-            if cache_key in self.cache:
-                cache_time = self.cache[cache_key]['timestamp']
-                if time.time() - cache_time < 300:  # Cache válido por 5 minutos
-                    print(f"📋 Usando datos del cache para {days_ahead} días")
-                    return self.cache[cache_key]['data']
-            
-            print(f"🔍 Obteniendo partidos REALES con tu API key de Football-Data.org...")
-            
-            fixtures = []
+            deadline = self.deadline if deadline is None else deadline
+            names = self._ordered_sources()
+            self._round += 1
+            print(f"🔍 Consultando {len(names)} fuentes en paralelo (deadline {deadline:.0f}s): {', '.join(names)}")
             
-            # SOLO usar tu API key de Football-Data.org
-            if self.api_key:
-                try:
-                    print("📡 Usando SOLO tu API key de Football-Data.org...")
-                    self._respect_rate_limit()
-                    football_data_fixtures = self._get_football_data_matches(days_ahead)
-                    if len(football_data_fixtures) > 0:
-                        fixtures.extend(football_data_fixtures)
-                        print(f"✅ Obtenidos {len(football_data_fixtures)} partidos de tu API")
-                    else:
-                        print("⚠️ Tu API no devolvió partidos")
-                except Exception as e:
-                    print(f"❌ Error con tu API: {e}")
-            else:
-                print("❌ No hay API key configurada")
+            fixtures, ranks = [], []
+            t_end = time.monotonic() + deadline
+            pool = ThreadPoolExecutor(max_workers=max(1, len(names)))
+            futures = {pool.submit(self._run_source, n, days_ahead, deadline): n for n in names}
+            pending = set(futures)
+            try:
+                while pending:
+                    remaining = t_end - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    done, pending = wait(pending, timeout=remaining, return_when=FIRST_COMPLETED)
+                    for fut in done:
+                        name, got = futures[fut], fut.result()
+                        print(f"✅ {name}: {len(got)} partidos")
+                        fixtures.extend(got)
+                        ranks.extend([self._source_rank(name)] * len(got))
+            finally:
+                # las fuentes lentas siguen en segundo plano y registran su latencia al terminar
+                pool.shutdown(wait=False, cancel_futures=True)
+            for fut in pending:
+                print(f"⏱️ {futures[fut]} superó el deadline ({deadline:.0f}s)")
             
             # Eliminar duplicados
-            unique_fixtures = self._remove_duplicates(fixtures)
+            unique_fixtures = self._remove_duplicates(fixtures, ranks)
             
             if len(unique_fixtures) > 0:
-                # Guardar en cache
-                self.cache[cache_key] = {
-                    'data': unique_fixtures,
-                    'timestamp': time.time()
-                }
                 print(f"🎯 Total de partidos REALES obtenidos: {len(unique_fixtures)}")
                 return unique_fixtures
             else:
-                print("❌ No se pudieron obtener partidos de tu API")
+                print("❌ No se pudieron obtener partidos de ninguna fuente")
                 return []
             
         except Exception as e:
@@ -103,7 +204,7 @@ class RealFixturesAPI:
             
             # Probar endpoint de competencias
             url = f"{self.base_url}/competitions"
-            response = requests.get(url, headers=self.headers, timeout=10)
+            response = self.http.get(url, headers=self.headers, timeout=10)
             
             if response.status_code == 200:
                 competitions = response.json()
@@ -145,70 +246,69 @@ class RealFixturesAPI:
         date_to = today + timedelta(days=days_ahead)
         
         print(f"📡 Consultando API Football-Data.org desde {today} hasta {date_to}")
+        params = {
+            'dateFrom': today.isoformat(),
+            'dateTo': date_to.isoformat(),
+            'status': 'SCHEDULED'
+        }
         
-        for league_code, league_id in self.league_ids.items():
-            try:
-                print(f"🔍 Obteniendo partidos para {league_code} ({league_id})...")
-                
-                url = f"{self.base_url}/competitions/{league_id}/matches"
-                params = {
-                    'dateFrom': today.isoformat(),
-                    'dateTo': date_to.isoformat(),
-                    'status': 'SCHEDULED'
-                }
-                
-                # Headers correctos con X-Auth-Token
-                headers = {
-                    'X-Auth-Token': self.api_key,
-                    'Content-Type': 'application/json'
-                }
-                
-                response = requests.get(url, headers=headers, params=params, timeout=15)
-                
-                if response.status_code == 200:
-                    data = response.json()
-                    matches = data.get('matches', [])
-                    print(f"📊 Respuesta API: {len(matches)} partidos encontrados para {league_code}")
-                    
-                    for match in matches:
-                        if match['status'] == 'SCHEDULED':
-                            match_date = datetime.fromisoformat(match['utcDate'].replace('Z', '+00:00'))
-                            fixtures.append({
-                                'HomeTeam': match['homeTeam']['name'],
-                                'AwayTeam': match['awayTeam']['name'],
-                                'Date': match_date.strftime('%Y-%m-%d'),
-                                'Time': match_date.strftime('%H:%M'),
-                                'League': league_code,
-                                'Competition': match['competition']['name'],
-                                'Status': match['status'],
-                                'Source': 'Football-Data.org API'
-                            })
-                    
-                    print(f"✅ Agregados {len([m for m in matches if m['status'] == 'SCHEDULED'])} partidos programados para {league_code}")
-                    
-                elif response.status_code == 429:
-                    print(f"⚠️ Límite de requests alcanzado para {league_code}")
-                    print("⏳ Esperando 10 segundos antes de continuar...")
-                    time.sleep(10)
-                    continue
-                    
-                elif response.status_code == 403:
-                    print(f"❌ Acceso denegado para {league_code} - verifica tu API key")
-                    continue
-                    
-                else:
-                    print(f"⚠️ Error API {league_code}: {response.status_code} - {response.text}")
-                
-                # Respetar límite de requests entre ligas
-                time.sleep(2)
-                
-            except Exception as e:
-                print(f"❌ Error obteniendo partidos de {league_code}: {e}")
-                continue
+        # Las 5 ligas en paralelo: el token bucket del cliente mantiene las 10 req/min
+        for league_fixtures in self.http.map(lambda item: self._football_data_league(*item, params),
+                                             list(self.league_ids.items())):
+            fixtures.extend(league_fixtures)
         
         print(f"🎯 Total de partidos REALES obtenidos de API: {len(fixtures)}")
         return fixtures
     
+    def _football_data_league(self, league_code, league_id, params):
+        """Partidos programados de una competición de Football-Data.org"""
+        fixtures = []
+        try:
+            print(f"🔍 Obteniendo partidos para {league_code} ({league_id})...")
+    
+            url = f"{self.base_url}/competitions/{league_id}/matches"
+            # Headers correctos con X-Auth-Token
+            headers = {
+                'X-Auth-Token': self.api_key,
+                'Content-Type': 'application/json'
+            }
+    
+            response = self.cache.get(url, headers=headers, params=params, timeout=15)
+    
+            if response.status_code == 200:
+                data = response.json()
+                matches = data.get('matches', [])
+                print(f"📊 Respuesta API: {len(matches)} partidos encontrados para {league_code}")
+    
+                for match in matches:
+                    if match['status'] == 'SCHEDULED':
+                        match_date = datetime.fromisoformat(match['utcDate'].replace('Z', '+00:00'))
+                        fixtures.append({
+                            'HomeTeam': match['homeTeam']['name'],
+                            'AwayTeam': match['awayTeam']['name'],
+                            'Date': match_date.strftime('%Y-%m-%d'),
+                            'Time': match_date.strftime('%H:%M'),
+                            'League': league_code,
+                            'Competition': match['competition']['name'],
+                            'Status': match['status'],
+                            'Source': 'Football-Data.org API'
+                        })
+    
+                print(f"✅ Agregados {len([m for m in matches if m['status'] == 'SCHEDULED'])} partidos programados para {league_code}")
+    
+            elif response.status_code == 429:
+                print(f"⚠️ Límite de requests alcanzado para {league_code} (reintentos agotados)")
+    
+            elif response.status_code == 403:
+                print(f"❌ Acceso denegado para {league_code} - verifica tu API key")
+    
+            else:
+                print(f"⚠️ Error API {league_code}: {response.status_code} - {response.text}")
+    
+        except Exception as e:
+            print(f"❌ Error obteniendo partidos de {league_code}: {e}")
+        return fixtures
+    
     def _get_sportdb_matches(self, days_ahead):
         """Obtener partidos de The Sport DB - COMPLETAMENTE GRATUITO usando documentación oficial"""
         print("📡 Consultando The Sport DB (gratuito) usando endpoints oficiales...")
@@ -228,7 +328,7 @@ class RealFixturesAPI:
         print("🔍 Verificando ID de liga 4328...")
         test_url = f"https://www.thesportsdb.com/api/v1/json/123/lookupleague.php?id=4328"
         try:
-            test_response = requests.get(test_url, timeout=10)
+            test_response = self.cache.get(test_url, timeout=10)
             if test_response.status_code == 200:
                 test_data = test_response.json()
                 league_info = test_data.get('leagues', [{}])[0]
@@ -240,7 +340,7 @@ class RealFixturesAPI:
                     print("⚠️ ID 4328 no es Premier League, buscando ID correcto...")
                     # Buscar Premier League en la lista de ligas
                     all_leagues_url = "https://www.thesportsdb.com/api/v1/json/123/all_leagues.php"
-                    leagues_response = requests.get(all_leagues_url, timeout=10)
+                    leagues_response = self.cache.get(all_leagues_url, timeout=10)
                     if leagues_response.status_code == 200:
                         leagues_data = leagues_response.json()
                         all_leagues = leagues_data.get('leagues', [])
@@ -261,7 +361,7 @@ class RealFixturesAPI:
                 
                 # Endpoint oficial: Schedule League Next
                 url = f"https://www.thesportsdb.com/api/v1/json/123/eventsnextleague.php?id={league_id}"
-                response = requests.get(url, timeout=10)
+                response = self.cache.get(url, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -296,15 +396,11 @@ class RealFixturesAPI:
                     print(f"✅ Agregados {valid_events} partidos válidos de {league_code}")
                 
                 elif response.status_code == 429:
-                    print(f"⚠️ Límite de requests alcanzado para {league_code}")
-                    time.sleep(5)
+                    print(f"⚠️ Límite de requests alcanzado para {league_code} (reintentos agotados)")
                     continue
                 else:
                     print(f"⚠️ Error API {league_code}: {response.status_code}")
                 
-                # Respetar límite de requests (30 por minuto para usuarios gratuitos)
-                time.sleep(2)
-                
             except Exception as e:
                 print(f"❌ Error obteniendo {league_code} de The Sport DB: {e}")
                 continue
@@ -383,7 +479,7 @@ class RealFixturesAPI:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.cache.get(url, headers=headers, timeout=10)
             
             if response.status_code == 200:
                 data = response.json()
@@ -415,18 +511,36 @@ class RealFixturesAPI:
         
         return fixtures
     
-    def _remove_duplicates(self, fixtures):
-        """Eliminar partidos duplicados basado en equipos y fecha"""
-        unique_fixtures = []
-        seen = set()
-        
-        for fixture in fixtures:
-            # Crear clave única basada en equipos y fecha
-            key = f"{fixture['HomeTeam']}_{fixture['AwayTeam']}_{fixture['Date']}"
-            
-            if key not in seen:
-                seen.add(key)
-                unique_fixtures.append(fixture)
+    def _fixture_key(self, fixture):
+        """Clave normalizada: nombres sin acentos/puntuación/sufijos (FC, CF...) + fecha ISO."""
+        def team(name):
+            n = unicodedata.normalize('NFKD', str(name or '')).encode('ascii', 'ignore').decode('ascii')
+            n = normalize_name(n)
+            return ' '.join(w for w in n.split() if w not in self._NAME_NOISE)
+        date = str(fixture.get('Date', ''))[:10]
+        return (team(fixture.get('HomeTeam')), team(fixture.get('AwayTeam')), date)
+    
+    _NAME_NOISE = {'fc', 'cf', 'afc', 'sc', 'ac', 'ssc', 'as', 'ud', 'cd', 'rc', 'club', 'de', 'the'}
+    
+    def _remove_duplicates(self, fixtures, ranks=None):
+        """
+        Eliminar partidos duplicados por clave normalizada (liga + equipos + fecha).
+        `ranks` (prioridad de la fuente de cada partido, menor = mejor) decide cuál se
+        conserva; sin él, el primero. Se conservan todos los partidos no duplicados,
+        también los de ligas sin código conocido.
+        """
+        ranks = ranks if ranks is not None else [0] * len(fixtures)
+        best = {}
+        for fixture, rank in zip(fixtures, ranks):
+            # la liga entra en la clave por su código ("Premier League" y "E0" son la
+            # misma); si no se puede mapear se usa tal cual. El partido no se modifica.
+            league = fixture.get('League')
+            if league not in self.league_ids and league not in ('CL', 'EL'):
+                league = self._map_league_name_to_code(str(league or '')) or league
+            key = (league,) + self._fixture_key(fixture)
+            if key not in best or rank < best[key][0]:
+                best[key] = (rank, fixture)
+        unique_fixtures = [f for _, f in best.values()]
         
         print(f"🔄 Eliminados {len(fixtures) - len(unique_fixtures)} duplicados")
         return unique_fixtures
@@ -470,7 +584,7 @@ class RealFixturesAPI:
                     'next': 10  # Próximos 10 partidos
                 }
                 
-                response = requests.get(url, headers=headers, params=params, timeout=10)
+                response = self.cache.get(url, headers=headers, params=params, timeout=10)
                 
                 if response.status_code == 200:
                     data = response.json()
@@ -488,8 +602,6 @@ class RealFixturesAPI:
                             })
                     print(f"✅ Obtenidos {len(data.get('response', []))} partidos reales para {league_code}")
                 
-                time.sleep(2)  # Respetar límites de API gratuita
-                
             except Exception as e:
                 print(f"Error RapidAPI {league_code}: {e}")
                 continue
@@ -528,7 +640,7 @@ class RealFixturesAPI:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.cache.get(url, headers=headers, timeout=10)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
                 
@@ -573,7 +685,7 @@ class RealFixturesAPI:
                 'User-Agent': 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
             }
             
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self.cache.get(url, headers=headers, timeout=10)
             if response.status_code == 200:
                 soup = BeautifulSoup(response.content, 'html.parser')
                 
@@ -1,8 +1,10 @@
-import os, time, requests, math
+import os, math, re
 from pathlib import Path
 from typing import Dict, Any, List
 import pandas as pd
 
+from src.utils.http_client import get_client
+
 API_HOST = os.getenv("API_FOOTBALL_HOST", "api-football-v1.p.rapidapi.com")
 API_KEY  = os.getenv("API_FOOTBALL_KEY", "")
 BASE_URL = f"https://{API_HOST}/v3"
@@ -12,7 +14,7 @@ def _req(path: str, params: Dict[str, Any]) -> Dict[str, Any]:
         "x-rapidapi-key": API_KEY,
         "x-rapidapi-host": API_HOST
     }
-    r = requests.get(BASE_URL + path, headers=headers, params=params, timeout=30)
+    r = get_client().get(BASE_URL + path, headers=headers, params=params, timeout=30)
     r.raise_for_status()
     return r.json()
 
@@ -33,8 +35,8 @@ def find_colombia_primera_a_league_id() -> int:
 
 def fixtures_last_seasons(league_id: int, seasons: List[int]) -> pd.DataFrame:
     rows = []
-    for season in seasons:
-        data = _req("/fixtures", {"league": league_id, "season": season})
+    pages = get_client().map(lambda s: _req("/fixtures", {"league": league_id, "season": s}), seasons)
+    for season, data in zip(seasons, pages):
         for item in data.get("response", []):
             fx = item.get("fixture", {}); tm = item.get("teams", {}); go = item.get("goals", {})
             rows.append(dict(
@@ -47,65 +49,123 @@ def fixtures_last_seasons(league_id: int, seasons: List[int]) -> pd.DataFrame:
                 Season=season,
                 fixture_id=item.get("fixture",{}).get("id")
             ))
-        time.sleep(0.2)
     df = pd.DataFrame(rows)
     df["Date"] = pd.to_datetime(df["Date"], errors="coerce", utc=True).dt.tz_convert("America/Bogota").dt.tz_localize(None)
     return df
 
-def odds_for_fixture_ids(fixture_ids: List[int], bookmaker="Bet365") -> pd.DataFrame:
-    # Pull odds per fixture, pick Bet365 when available
-    rows = []
-    for fid in fixture_ids:
-        data = _req("/odds", {"fixture": fid, "bookmaker": bookmaker})
-        resp = data.get("response", [])
-        if not resp: 
-            continue
-        # Normalize: we need 1X2, Over/Under 2.5, AH line odds
-        markets = resp[0].get("bookmakers", [])
-        for bk in markets:
-            if bookmaker.lower() not in (bk.get("name","").lower()):
-                continue
-            for mkt in bk.get("bets", []):
-                name = (mkt.get("name") or "").lower()
-                # 1X2
-                if "match winner" in name or "1x2" in name:
-                    v = {o["value"]: o["odd"] for o in mkt.get("values", [])}
-                    rows.append(dict(fixture_id=fid, B365H=float(v.get("Home", "nan")), B365D=float(v.get("Draw","nan")), B365A=float(v.get("Away","nan"))))
-                # OU 2.5
-                if "over/under" in name:
-                    for v in mkt.get("values", []):
-                        if v.get("value") in ("Over 2.5","Under 2.5"):
-                            key = "B365>2.5" if "Over" in v["value"] else "B365<2.5"
-                            rows.append(dict(fixture_id=fid, **{key: float(v.get("odd","nan"))}))
-                # Asian Handicap main line (use 0.0 or listed AHh)
-                if "asian handicap" in name:
-                    # pick the closest to 0.0 line
-                    best = None; best_abs = 1e9
-                    for v in mkt.get("values", []):
-                        try:
-                            ln = float(v.get("handicap"))
-                        except Exception:
-                            continue
-                        if abs(ln) < best_abs:
-                            best_abs = abs(ln); best = v
-                    if best:
-                        # odds presented often as "Home" and "Away" at the handicap
-                        try:
-                            ln = float(best.get("handicap"))
-                            oh = float(best.get("odd"))  # this may not be structured; fallback below
-                        except Exception:
-                            ln = 0.0; oh = float("nan")
-                    # Fallback: build from full list if possible
-                    # (APIs vary; keeping minimal workable scaffold)
-    # Merge rows by fixture_id (wide)
-    if not rows:
-        return pd.DataFrame(columns=["fixture_id","B365H","B365D","B365A","B365>2.5","B365<2.5","AHh","B365AHH","B365AHA"])
-    df = pd.DataFrame(rows).groupby("fixture_id").agg("first").reset_index()
-    # Prepare AH columns if present (left as NaN by default since many feeds structure differently)
-    for c in ["B365>2.5","B365<2.5","AHh","B365AHH","B365AHA"]:
-        if c not in df.columns: df[c] = float("nan")
+ODDS_COLUMNS = ["fixture_id", "bookmaker", "market", "line", "side", "price", "timestamp"]
+WIDE_COLUMNS = ["fixture_id","B365H","B365D","B365A","B365>2.5","B365<2.5","AHh","B365AHH","B365AHA"]
+_MARKETS = {"match winner": "1X2", "goals over/under": "OU", "asian handicap": "AH"}
+_SIDES_1X2 = {"Home": "H", "Draw": "D", "Away": "A"}
+_LINE_RE = re.compile(r"^(.*?)\s*([+-]?\d+(?:\.\d+)?)$")
+
+def _split_value(value: str):
+    """'Over 2.5' -> ('Over', 2.5); 'Home -0.25' -> ('Home', -0.25); 'Home' -> ('Home', nan)."""
+    m = _LINE_RE.match((value or "").strip())
+    if m and m.group(1):
+        return m.group(1), float(m.group(2))
+    return (value or "").strip(), math.nan
+
+def parse_odds_response(items: List[Dict[str, Any]]) -> pd.DataFrame:
+    """
+    Aplana respuestas de /odds a formato largo (una fila por cuota):
+    fixture_id, bookmaker, market, line, side, price, timestamp.
+    Mercados normalizados: 1X2 (H/D/A), OU (Over/Under, escalera completa de líneas),
+    AH (Home/Away, línea tal como la publica API-Football: hándicap del local);
+    el resto se conserva con su nombre original.
+    """
+    fid, bk_col, mk_col, line_col, side_col, price_col, ts_col = ([] for _ in range(7))
+    for item in items:
+        f = (item.get("fixture") or {}).get("id")
+        ts = item.get("update")
+        for bk in item.get("bookmakers", []):
+            bname = bk.get("name")
+            for bet in bk.get("bets", []):
+                raw = bet.get("name") or ""
+                market = _MARKETS.get(raw.lower(), raw)
+                for v in bet.get("values", []):
+                    try:
+                        price = float(v.get("odd"))
+                    except (TypeError, ValueError):
+                        continue
+                    if market == "1X2":
+                        side, line = _SIDES_1X2.get(str(v.get("value")), str(v.get("value"))), math.nan
+                    else:
+                        side, line = _split_value(str(v.get("value")))
+                        if v.get("handicap") not in (None, ""):
+                            try:
+                                line = float(v.get("handicap"))
+                            except (TypeError, ValueError):
+                                pass
+                    fid.append(f); bk_col.append(bname); mk_col.append(market); line_col.append(line)
+                    side_col.append(side); price_col.append(price); ts_col.append(ts)
+    df = pd.DataFrame({"fixture_id": fid, "bookmaker": bk_col, "market": mk_col, "line": line_col,
+                       "side": side_col, "price": price_col, "timestamp": ts_col}, columns=ODDS_COLUMNS)
+    df["timestamp"] = pd.to_datetime(df["timestamp"], errors="coerce", utc=True)
     return df
 
+def _paged(path: str, params: Dict[str, Any]) -> List[Dict[str, Any]]:
+    """Primera página en serie y el resto en paralelo (el cliente marca el ritmo por host)."""
+    first = _req(path, dict(params, page=1))
+    total = int((first.get("paging") or {}).get("total") or 1)
+    pages = get_client().map(lambda p: _req(path, dict(params, page=p)), range(2, total + 1))
+    out = list(first.get("response", []))
+    for data in pages:
+        out.extend(data.get("response", []))
+    return out
+
+def odds_for_league_season(league_id: int, season: int, bookmaker_id: int = None) -> pd.DataFrame:
+    """Todas las cuotas de una liga/temporada vía /odds?league=&season= paginado, en formato largo."""
+    params = {"league": league_id, "season": season}
+    if bookmaker_id is not None:
+        params["bookmaker"] = bookmaker_id
+    return parse_odds_response(_paged("/odds", params))
+
+def odds_for_dates(dates: List[str], league_id: int = None, season: int = None) -> pd.DataFrame:
+    """Cuotas de varias fechas (YYYY-MM-DD) en paralelo vía /odds?date=, en formato largo."""
+    def one(d):
+        params = {"date": d}
+        if league_id is not None:
+            params.update(league=league_id, season=season)
+        return _paged("/odds", params)
+    items = [it for page in get_client().map(one, dates) for it in page]
+    return parse_odds_response(items)
+
+def odds_long_to_wide(long: pd.DataFrame, bookmaker: str = "Bet365") -> pd.DataFrame:
+    """
+    Columnas estilo Football-Data (B365H/D/A, B365>2.5/<2.5, AHh + B365AHH/AHA) desde el
+    formato largo. Línea AH principal = la más equilibrada (|cuota local - cuota visitante| mínima).
+    """
+    if long.empty:
+        return pd.DataFrame(columns=WIDE_COLUMNS)
+    bk = long[long["bookmaker"].str.lower() == bookmaker.lower()]
+    bk = bk.sort_values("timestamp").drop_duplicates(["fixture_id", "market", "line", "side"], keep="last")
+    fixtures = pd.Index(bk["fixture_id"].unique(), name="fixture_id")
+    out = pd.DataFrame(index=fixtures)
+
+    x = bk[bk["market"] == "1X2"].pivot_table(index="fixture_id", columns="side", values="price", aggfunc="last")
+    for s in "HDA":
+        out[f"B365{s}"] = x[s] if s in x.columns else math.nan
+
+    ou = bk[(bk["market"] == "OU") & (bk["line"] == 2.5)].pivot_table(index="fixture_id", columns="side", values="price", aggfunc="last")
+    out["B365>2.5"] = ou["Over"] if "Over" in ou.columns else math.nan
+    out["B365<2.5"] = ou["Under"] if "Under" in ou.columns else math.nan
+
+    ah = bk[bk["market"] == "AH"].pivot_table(index=["fixture_id", "line"], columns="side", values="price", aggfunc="last")
+    if {"Home", "Away"} <= set(ah.columns):
+        ah = ah.dropna(subset=["Home", "Away"]).assign(gap=lambda d: (d["Home"] - d["Away"]).abs())
+        main = ah.sort_values("gap").reset_index().drop_duplicates("fixture_id").set_index("fixture_id")
+        out["AHh"] = main["line"]; out["B365AHH"] = main["Home"]; out["B365AHA"] = main["Away"]
+    for c in WIDE_COLUMNS[1:]:
+        if c not in out.columns:
+            out[c] = math.nan
+    return out.reset_index()[WIDE_COLUMNS]
+
+def odds_for_fixture_ids(fixture_ids: List[int], bookmaker="Bet365") -> pd.DataFrame:
+    """Compatibilidad: /odds por fixture (en paralelo) y salida ancha estilo Football-Data."""
+    pages = get_client().map(lambda f: _req("/odds", {"fixture": f}).get("response", []), fixture_ids)
+    return odds_long_to_wide(parse_odds_response([it for p in pages for it in p]), bookmaker)
+
 def seasons_last_two():
     import datetime
     today = datetime.datetime.utcnow()
@@ -124,7 +184,12 @@ def main():
     lg_id = find_colombia_primera_a_league_id()
     seasons = seasons_last_two()
     fixtures = fixtures_last_seasons(lg_id, seasons)
-    odds = odds_for_fixture_ids(fixtures["fixture_id"].dropna().astype(int).tolist(), bookmaker="Bet365")
+    # cuotas por liga/temporada (paginadas) en lugar de una petición por fixture
+    long = pd.concat([odds_for_league_season(lg_id, s) for s in seasons], ignore_index=True)
+    fp_long = out / "colombia_primera_a_odds_long.csv"
+    long.to_csv(fp_long, index=False)
+    print(f"Guardado: {fp_long} ({len(long)} cuotas)")
+    odds = odds_long_to_wide(long, bookmaker="Bet365")
 
     df = fixtures.merge(odds, on="fixture_id", how="left")
     fp = out / "colombia_primera_a_fixtures_odds.csv"
@@ -13,15 +13,85 @@ Features disponibles:
 """
 
 import argparse
-import time
+import hashlib
+import pickle
+import re
+from datetime import date
+from io import StringIO
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Tuple
 import pandas as pd
 from tqdm import tqdm
 
+from src.utils.http_client import get_client
+
 # Rate limiting: FBref permite ~20 req/min
-# Usamos 15 req/min para estar seguros
-REQUEST_DELAY = 4.0  # segundos entre requests
+# Usamos 15 req/min para estar seguros (token bucket de fbref.com en src.utils.http_client)
+
+CACHE_DIR = Path("data/raw/fbref/_html")
+_COMMENT_RE = re.compile(r"<!--|-->")
+
+
+def parse_tables(html: str) -> List[pd.DataFrame]:
+    """
+    Tablas de una página FBref con el parser lxml. FBref oculta varias tablas
+    dentro de comentarios HTML: se eliminan los marcadores antes de parsear.
+    """
+    return pd.read_html(StringIO(_COMMENT_RE.sub("", html)), flavor="lxml")
+
+
+class HtmlPageCache:
+    """
+    Caché de páginas: HTML crudo por URL y fecha (una descarga por día) y tablas
+    parseadas por hash de contenido (una página que no cambió no se vuelve a parsear).
+    """
+
+    def __init__(self, root: Path = CACHE_DIR):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    @staticmethod
+    def _key(url: str) -> str:
+        return hashlib.sha1(url.encode("utf-8")).hexdigest()[:16]
+
+    def html(self, url: str, refresh: bool = False) -> Tuple[str, str]:
+        """(html, sha256) de `url`; descarga solo si no hay copia de hoy."""
+        key = self._key(url)
+        fp = self.root / f"{key}_{date.today().isoformat()}.html"
+        if fp.exists() and not refresh:
+            text = fp.read_text(encoding="utf-8")
+        else:
+            text = get_client().get_text(url)
+            fp.write_text(text, encoding="utf-8")
+            for old in self.root.glob(f"{key}_*.html"):
+                if old != fp:
+                    old.unlink()
+        return text, hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def tables(self, url: str, refresh: bool = False) -> List[pd.DataFrame]:
+        text, sha = self.html(url, refresh)
+        fp = self.root / f"{self._key(url)}_{sha[:16]}.tables.pkl"
+        if fp.exists():
+            with open(fp, "rb") as fh:
+                return pickle.load(fh)
+        tables = parse_tables(text)
+        with open(fp, "wb") as fh:
+            pickle.dump(tables, fh)
+        for old in self.root.glob(f"{self._key(url)}_*.tables.pkl"):
+            if old != fp:
+                old.unlink()
+        return tables
+
+
+_page_cache = None
+
+
+def read_html_tables(url: str) -> List[pd.DataFrame]:
+    """Tablas de `url` vía caché (descarga con el cliente compartido: rate limit + reintentos)."""
+    global _page_cache
+    if _page_cache is None:
+        _page_cache = HtmlPageCache()
+    return _page_cache.tables(url)
 
 LEAGUE_URLS = {
     "EPL": "https://fbref.com/en/comps/9/Premier-League-Stats",
@@ -42,10 +112,8 @@ def scrape_league_table(league_url: str) -> pd.DataFrame:
         DataFrame con: Squad, MP, W, D, L, GF, GA, GD, Pts, xG, xGA
     """
     print(f"Scraping: {league_url}")
-    time.sleep(REQUEST_DELAY)
-    
     try:
-        tables = pd.read_html(league_url)
+        tables = read_html_tables(league_url)
         # La tabla de posiciones generalmente es la primera
         df = tables[0]
         
@@ -76,10 +144,8 @@ def scrape_team_shooting_stats(league_url: str) -> pd.DataFrame:
     shooting_url = league_url.replace("-Stats", "-Shooting-Stats")
     
     print(f"Scraping shooting: {shooting_url}")
-    time.sleep(REQUEST_DELAY)
-    
     try:
-        tables = pd.read_html(shooting_url)
+        tables = read_html_tables(shooting_url)
         # Buscar tabla con estadísticas de tiros
         for df in tables:
             if 'Squad' in df.columns or ('Squad' in str(df.columns)):
@@ -103,10 +169,8 @@ def scrape_team_passing_stats(league_url: str) -> pd.DataFrame:
     passing_url = league_url.replace("-Stats", "-Passing-Stats")
     
     print(f"Scraping passing: {passing_url}")
-    time.sleep(REQUEST_DELAY)
-    
     try:
-        tables = pd.read_html(passing_url)
+        tables = read_html_tables(passing_url)
         for df in tables:
             if 'Squad' in df.columns or ('Squad' in str(df.columns)):
                 if isinstance(df.columns, pd.MultiIndex):
@@ -129,10 +193,8 @@ def scrape_team_defense_stats(league_url: str) -> pd.DataFrame:
     defense_url = league_url.replace("-Stats", "-Defense-Stats")
     
     print(f"Scraping defense: {defense_url}")
-    time.sleep(REQUEST_DELAY)
-    
     try:
-        tables = pd.read_html(defense_url)
+        tables = read_html_tables(defense_url)
         for df in tables:
             if 'Squad' in df.columns or ('Squad' in str(df.columns)):
                 if isinstance(df.columns, pd.MultiIndex):
@@ -172,21 +234,15 @@ def scrape_league_full(league_key: str, league_url: str, season: str = "current"
     print(f"Scraping {league_key} - Season: {season}")
     print(f"{'='*60}\n")
     
-    data = {}
-    
-    # 1. Tabla de posiciones
-    data['table'] = scrape_league_table(league_url)
-    
-    # 2. Estadísticas de tiros
-    data['shooting'] = scrape_team_shooting_stats(league_url)
-    
-    # 3. Estadísticas de pases
-    data['passing'] = scrape_team_passing_stats(league_url)
-    
-    # 4. Estadísticas defensivas
-    data['defense'] = scrape_team_defense_stats(league_url)
-    
-    return data
+    # Tabla, tiros, pases y defensa en paralelo (el bucket de fbref.com marca el ritmo)
+    scrapers = [
+        ('table', scrape_league_table),
+        ('shooting', scrape_team_shooting_stats),
+        ('passing', scrape_team_passing_stats),
+        ('defense', scrape_team_defense_stats),
+    ]
+    results = get_client().map(lambda kv: kv[1](league_url), scrapers)
+    return {name: df for (name, _), df in zip(scrapers, results)}
 
 
 def merge_all_stats(stats_dict: Dict[str, pd.DataFrame]) -> pd.DataFrame:
@@ -228,38 +284,49 @@ def main():
     out.mkdir(parents=True, exist_ok=True)
     
     print(f"\n{'#'*60}")
-    print(f"# FBref Scraper - Rate Limited (4s delay)")
+    print(f"# FBref Scraper - Rate Limited (15 req/min)")
     print(f"# Leagues: {', '.join(args.leagues)}")
     print(f"# Season: {args.season}")
     print(f"{'#'*60}\n")
     
-    for league in tqdm(args.leagues, desc="Ligas"):
+    global _page_cache
+    _page_cache = HtmlPageCache(out / "_html")
+    
+    leagues = []
+    for league in args.leagues:
         if league not in LEAGUE_URLS:
             print(f"⚠️  Liga '{league}' no soportada. Disponibles: {list(LEAGUE_URLS.keys())}")
             continue
-        
+        leagues.append(league)
+    
+    def scrape(league):
         try:
-            # Scrape all stats
-            stats = scrape_league_full(league, LEAGUE_URLS[league], args.season)
-            
-            # Guardar por separado
-            season_str = args.season if args.season != "current" else "latest"
-            for stat_type, df in stats.items():
-                if not df.empty:
-                    fp = out / f"{league}_{season_str}_{stat_type}.csv"
-                    df.to_csv(fp, index=False)
-                    print(f"✅ Guardado: {fp} ({len(df)} equipos)")
-            
-            # Guardar merged
-            merged = merge_all_stats(stats)
-            if not merged.empty:
-                fp_merged = out / f"{league}_{season_str}_full.csv"
-                merged.to_csv(fp_merged, index=False)
-                print(f"✅ Guardado merged: {fp_merged}\n")
-        
+            return scrape_league_full(league, LEAGUE_URLS[league], args.season)
         except Exception as e:
             print(f"❌ Error procesando {league}: {e}\n")
+            return None
+    
+    # Ligas en paralelo; las páginas sin cambios salen de la caché sin tocar la red
+    results = get_client().map(scrape, leagues)
+    
+    for league, stats in tqdm(list(zip(leagues, results)), desc="Ligas"):
+        if stats is None:
             continue
+        
+        # Guardar por separado
+        season_str = args.season if args.season != "current" else "latest"
+        for stat_type, df in stats.items():
+            if not df.empty:
+                fp = out / f"{league}_{season_str}_{stat_type}.csv"
+                df.to_csv(fp, index=False)
+                print(f"✅ Guardado: {fp} ({len(df)} equipos)")
+        
+        # Guardar merged
+        merged = merge_all_stats(stats)
+        if not merged.empty:
+            fp_merged = out / f"{league}_{season_str}_full.csv"
+            merged.to_csv(fp_merged, index=False)
+            print(f"✅ Guardado merged: {fp_merged}\n")
     
     print("\n" + "="*60)
     print("✅ Scraping completado!")
@@ -267,7 +334,7 @@ def main():
     print("="*60)
     print("\n⚠️  IMPORTANTE:")
     print("- FBref permite scraping educativo con rate limiting")
-    print("- Respeta el delay de 4s entre requests")
+    print("- Respeta el límite de 15 req/min (HOST_LIMITS['fbref.com'])")
     print("- NO uses esto en producción sin permiso explícito")
     print("- Atribuye la fuente en tus análisis: https://fbref.com/")
 
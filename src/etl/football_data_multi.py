@@ -1,10 +1,18 @@
 import argparse
+import hashlib
+import io
+import json
 from pathlib import Path
-import requests
 from datetime import datetime
+import pandas as pd
 from tqdm import tqdm
 
+from src.utils.http_client import get_client
+
 BASE_URL = "https://www.football-data.co.uk/mmz4281/{season}/{league}.csv"
+MANIFEST = ".fd_manifest.json"      # ETag / Last-Modified / sha256 por fichero
+DELTA_FILE = "_delta/fd_delta.csv"  # filas nuevas o modificadas en la última ejecución (fuera del glob *.csv)
+ROW_KEY = ["Div", "Date", "HomeTeam", "AwayTeam"]
 
 def season_codes_last_years(n_seasons=2):
     today = datetime.utcnow()
@@ -17,33 +25,147 @@ def season_codes_last_years(n_seasons=2):
         codes.append(f"{y1:02d}{y2:02d}")
     return list(reversed(codes))
 
-def download_league(league: str, season: str, out_dir: Path):
+def season_finished(season: str, today: datetime = None) -> bool:
+    """'2324' está cerrada a partir del 1 de julio de 2024 (el CSV ya no cambia)."""
+    today = today or datetime.utcnow()
+    end_year = 2000 + int(season[2:])
+    return today >= datetime(end_year, 7, 1)
+
+def load_manifest(out_dir: Path) -> dict:
+    fp = out_dir / MANIFEST
+    if fp.exists():
+        try:
+            return json.loads(fp.read_text(encoding="utf-8"))
+        except Exception:
+            return {}
+    return {}
+
+def save_manifest(out_dir: Path, manifest: dict):
+    fp = out_dir / MANIFEST
+    tmp = fp.with_suffix(".tmp")
+    tmp.write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding="utf-8")
+    tmp.replace(fp)
+
+def _read_csv_bytes(data: bytes) -> pd.DataFrame:
+    """CSV de Football-Data (UTF-8 con BOM, como read_fd_csv); latin-1 solo si no es UTF-8 válido."""
+    try:
+        return pd.read_csv(io.BytesIO(data), encoding="utf-8-sig", on_bad_lines="skip", dtype=str)
+    except UnicodeDecodeError:
+        return pd.read_csv(io.BytesIO(data), encoding="latin-1", on_bad_lines="skip", dtype=str)
+
+def diff_rows(old: pd.DataFrame, new: pd.DataFrame) -> pd.DataFrame:
+    """Filas de `new` que no existían en `old` (added) o cuyo contenido cambió (changed)."""
+    key = [c for c in ROW_KEY if c in new.columns]
+    new = new.dropna(how="all")
+    if old is None or old.empty or not key:
+        return new.assign(_change="added")
+    old = old.dropna(how="all").drop_duplicates(key, keep="last")
+    cols = [c for c in new.columns if c in old.columns]
+    m = new.merge(old[cols], on=key, how="left", suffixes=("", "__old"), indicator=True)
+    added = m["_merge"] == "left_only"
+    other = [c for c in cols if c not in key]
+    changed = pd.Series(False, index=m.index)
+    for c in other:
+        a = m[c].fillna(""); b = m[f"{c}__old"].fillna("")
+        changed |= (a != b)
+    m["_change"] = ""
+    m.loc[added, "_change"] = "added"
+    m.loc[~added & changed, "_change"] = "changed"
+    out = m[m["_change"] != ""]
+    return out[list(new.columns) + ["_change"]]
+
+def entry_sha(fp: Path, manifest: dict) -> str:
+    """sha256 registrado en el manifest (o calculado si falta)."""
+    sha = manifest.get(fp.name, {}).get("sha256")
+    return sha or hashlib.sha256(fp.read_bytes()).hexdigest()
+
+def download_league(league: str, season: str, out_dir: Path, manifest: dict = None, force: bool = False) -> dict:
+    """
+    Descarga condicional de un CSV (If-None-Match / If-Modified-Since).
+    Devuelve {file, status, delta} con status en downloaded|unchanged|skipped y
+    `delta` = filas nuevas/modificadas respecto a la copia local.
+    """
+    manifest = {} if manifest is None else manifest
     url = BASE_URL.format(season=season, league=league)
     out_dir.mkdir(parents=True, exist_ok=True)
     fp = out_dir / f"{league}_{season}.csv"
-    r = requests.get(url, timeout=30)
+    entry = manifest.get(fp.name, {})
+
+    if not force and fp.exists() and entry.get("finished"):
+        return dict(file=fp, status="skipped", delta=None, entry=entry)
+
+    headers = {}
+    if not force and fp.exists():
+        if entry.get("etag"):
+            headers["If-None-Match"] = entry["etag"]
+        if entry.get("last_modified"):
+            headers["If-Modified-Since"] = entry["last_modified"]
+    r = get_client().get(url, headers=headers, timeout=30)
+    now = datetime.utcnow().isoformat(timespec="seconds")
+    finished = season_finished(season)
+    if r.status_code == 304:
+        entry = dict(entry, checked_at=now, finished=finished)
+        return dict(file=fp, status="unchanged", delta=None, entry=entry)
     r.raise_for_status()
-    fp.write_bytes(r.content)
-    return fp
+
+    data = r.content
+    sha = hashlib.sha256(data).hexdigest()
+    entry = dict(url=url, etag=r.headers.get("ETag"), last_modified=r.headers.get("Last-Modified"),
+                 sha256=sha, checked_at=now, finished=finished)
+    if fp.exists() and entry_sha(fp, manifest) == sha:
+        return dict(file=fp, status="unchanged", delta=None, entry=dict(manifest.get(fp.name, {}), **entry))
+
+    old = _read_csv_bytes(fp.read_bytes()) if fp.exists() else None
+    delta = diff_rows(old, _read_csv_bytes(data))
+    fp.write_bytes(data)
+    entry.update(downloaded_at=now, rows_changed=int(len(delta)))
+    return dict(file=fp, status="downloaded", delta=delta, entry=entry)
+
+def download_all(leagues, seasons, out: Path, force: bool = False) -> pd.DataFrame:
+    """Descarga en paralelo todas las combinaciones liga×temporada y escribe manifest + delta."""
+    manifest = load_manifest(out)
+    jobs = [(lg, ss) for lg in leagues for ss in seasons]
+
+    def run(job):
+        lg, ss = job
+        try:
+            return download_league(lg, ss, out, manifest, force)
+        except Exception as e:
+            return dict(file=out / f"{lg}_{ss}.csv", status="error", error=str(e), delta=None)
+
+    results = get_client().map(run, jobs)
+    deltas = []
+    for (lg, ss), res in tqdm(zip(jobs, results), total=len(jobs), desc="Football-Data"):
+        name = res["file"].name
+        if res["status"] == "error":
+            print("ERROR:", lg, ss, res["error"])
+            continue
+        manifest[name] = res["entry"]
+        n = 0 if res["delta"] is None else len(res["delta"])
+        print(f"{res['status'].upper():<10} {name} ({n} filas nuevas/modificadas)")
+        if n:
+            deltas.append(res["delta"].assign(_file=name))
+    save_manifest(out, manifest)
+
+    delta = pd.concat(deltas, ignore_index=True) if deltas else pd.DataFrame(columns=ROW_KEY + ["_change", "_file"])
+    (out / DELTA_FILE).parent.mkdir(parents=True, exist_ok=True)
+    delta.to_csv(out / DELTA_FILE, index=False)
+    print(f"Delta: {len(delta)} filas -> {out / DELTA_FILE}")
+    return delta
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--leagues", nargs="+", required=True, help="Ej: E0 SP1 D1 I1 F1")
     ap.add_argument("--n_seasons", type=int, default=2, help="Últimas N temporadas (default: 2)")
     ap.add_argument("--out_dir", default="data/raw")
+    ap.add_argument("--force", action="store_true", help="Ignorar manifest y descargar todo")
     args = ap.parse_args()
 
     out = Path(args.out_dir)
+    out.mkdir(parents=True, exist_ok=True)
     seasons = season_codes_last_years(args.n_seasons)
     print("Temporadas:", seasons)
-
-    for lg in args.leagues:
-        for ss in tqdm(seasons, desc=f"Liga {lg}"):
-            try:
-                fp = download_league(lg, ss, out)
-                print("OK:", fp.name)
-            except Exception as e:
-                print("ERROR:", lg, ss, e)
+    download_all(args.leagues, seasons, out, force=args.force)
 
 if __name__ == "__main__":
     main()
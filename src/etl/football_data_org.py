@@ -10,7 +10,6 @@ Uso:
 """
 
 import os
-import time
 import argparse
 from pathlib import Path
 from typing import Dict, List, Any, Optional
@@ -19,12 +18,14 @@ import pandas as pd
 import requests
 from tqdm import tqdm
 
+from src.utils.http_client import get_client
+
 # Configuración
 API_KEY = os.getenv("FOOTBALL_DATA_ORG_KEY", "")
 BASE_URL = "https://api.football-data.org/v4"
 
 # Rate limiting: 10 requests/minuto en plan gratuito
-REQUEST_DELAY = 6.5  # 6.5 segundos = ~9 requests/minuto (seguro)
+# (token bucket de api.football-data.org en src.utils.http_client.HOST_LIMITS)
 
 # Mapeo de códigos de competición
 # Documentación: https://www.football-data.org/documentation/api
@@ -66,7 +67,7 @@ def get_headers() -> Dict[str, str]:
 
 def api_request(endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
     """
-    Request genérico a la API con rate limiting
+    Request genérico a la API (rate limiting y reintentos 429 en el cliente compartido)
     
     Args:
         endpoint: Path del endpoint (ej: "/competitions/PL/matches")
@@ -75,20 +76,17 @@ def api_request(endpoint: str, params: Optional[Dict] = None) -> Dict[str, Any]:
     Returns:
         JSON response
     """
-    time.sleep(REQUEST_DELAY)  # Rate limiting
-    
     url = f"{BASE_URL}{endpoint}"
     
     try:
-        response = requests.get(url, headers=get_headers(), params=params, timeout=30)
+        response = get_client().get(url, headers=get_headers(), params=params, timeout=30)
         response.raise_for_status()
         return response.json()
     
     except requests.exceptions.HTTPError as e:
         if e.response.status_code == 429:
-            print("[!] Rate limit excedido. Esperando 60s...")
-            time.sleep(60)
-            return api_request(endpoint, params)  # Retry
+            print("[!] Rate limit excedido tras reintentos")
+            return {}
         elif e.response.status_code == 403:
             print("[X] Token invalido o competicion no incluida en tu plan")
             print(f"   Endpoint: {endpoint}")
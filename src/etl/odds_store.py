@@ -0,0 +1,220 @@
+"""
+Almacén local de series de cuotas (SQLite, append-only).
+
+Cada fila es una cuota observada: (event_id, bookmaker, market, line, side, ts) -> price.
+Las inserciones son idempotentes (INSERT OR IGNORE sobre la clave) y nunca se
+actualiza ni borra nada, de modo que el histórico de movimientos queda completo.
+
+Consultas "as-of" (una fila por event/bookmaker/market/line/side):
+    opening()            primera cuota observada
+    as_of(when)          última cuota con ts <= when (escalar o por evento)
+    closing()            última cuota antes del inicio del partido
+    line_movement()      apertura, cierre, min/max, nº de cambios y deriva
+
+Uso:
+    from src.etl.odds_store import OddsStore
+    store = OddsStore()                       # data/odds/odds.sqlite
+    store.append(long_df)                     # columnas ODDS_COLUMNS
+    close = store.closing(market="1X2")
+"""
+import sqlite3
+from pathlib import Path
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DEFAULT_PATH = Path("data/odds/odds.sqlite")
+KEY = ["event_id", "bookmaker", "market", "line", "side"]
+ODDS_COLUMNS = KEY + ["price", "ts"]
+EVENT_COLUMNS = ["event_id", "commence_ts", "home", "away", "league", "source"]
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS odds (
+    event_id  TEXT    NOT NULL,
+    bookmaker TEXT    NOT NULL,
+    market    TEXT    NOT NULL,
+    line      REAL    NOT NULL DEFAULT 0,   -- 0 para mercados sin línea (1X2)
+    side      TEXT    NOT NULL,
+    ts        INTEGER NOT NULL,             -- epoch segundos UTC de la observación
+    price     REAL    NOT NULL,
+    PRIMARY KEY (event_id, bookmaker, market, line, side, ts)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS odds_ts ON odds (ts);
+CREATE TABLE IF NOT EXISTS events (
+    event_id    TEXT PRIMARY KEY,
+    commence_ts INTEGER,
+    home        TEXT,
+    away        TEXT,
+    league      TEXT,
+    source      TEXT
+);
+"""
+
+
+def _to_epoch(values) -> np.ndarray:
+    """
+    Fechas (str/datetime/epoch) -> epoch segundos UTC (float64, enteros exactos).
+    Las que no se pueden interpretar quedan como NaN (no como NaT -> año 1677).
+    """
+    s = pd.Series(values)
+    if pd.api.types.is_numeric_dtype(s):
+        return s.astype("float64").to_numpy()
+    dt = pd.to_datetime(s, utc=True, errors="coerce")
+    out = (dt.astype("int64") // 10**9).astype("float64").to_numpy()
+    out[dt.isna().to_numpy()] = np.nan
+    return out
+
+
+class OddsStore:
+    """Serie temporal de cuotas en SQLite con consultas as-of vectorizadas (window functions)."""
+
+    def __init__(self, path: Union[str, Path] = DEFAULT_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(self.path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ------------------------------------------------------------------
+    # Escritura
+    # ------------------------------------------------------------------
+    def append(self, df: pd.DataFrame, events: Optional[pd.DataFrame] = None) -> int:
+        """
+        Añade observaciones (columnas ODDS_COLUMNS; `ts` fecha o epoch). Las ya
+        presentes se ignoran. Devuelve el número de filas nuevas.
+        """
+        if df is None or df.empty:
+            return 0
+        d = df.copy()
+        d["line"] = pd.to_numeric(d.get("line", 0.0), errors="coerce").fillna(0.0)
+        d["ts"] = _to_epoch(d["ts"])
+        bad_ts = int(np.isnan(d["ts"].to_numpy()).sum())
+        if bad_ts:
+            # sin hora no se puede ordenar: ordenada como 1677 pasaría a ser la apertura
+            print(f"⚠️  OddsStore: {bad_ts} observaciones con timestamp no interpretable descartadas")
+        d = d.dropna(subset=["event_id", "price", "ts"])
+        rows = list(zip(d["event_id"].astype(str), d["bookmaker"].astype(str), d["market"].astype(str),
+                        d["line"].astype(float), d["side"].astype(str), d["ts"].astype(int), d["price"].astype(float)))
+        before = self.conn.total_changes
+        with self.conn:
+            self.conn.executemany("INSERT OR IGNORE INTO odds (event_id, bookmaker, market, line, side, ts, price) "
+                                  "VALUES (?, ?, ?, ?, ?, ?, ?)", rows)
+            added = self.conn.total_changes - before
+            if events is not None and not events.empty:
+                self.upsert_events(events, commit=False)
+        return added
+
+    def upsert_events(self, events: pd.DataFrame, commit: bool = True):
+        """Metadatos de evento (hora de inicio para `closing()`)."""
+        e = events.reindex(columns=EVENT_COLUMNS).drop_duplicates("event_id", keep="last")
+        ts = _to_epoch(e["commence_ts"]) if e["commence_ts"].notna().any() else [None] * len(e)
+        rows = [(str(i), int(t) if t is not None and t > 0 else None, h, a, lg, src)
+                for i, t, h, a, lg, src in zip(e["event_id"], ts, e["home"], e["away"], e["league"], e["source"])]
+        sql = ("INSERT INTO events (event_id, commence_ts, home, away, league, source) VALUES (?, ?, ?, ?, ?, ?) "
+               "ON CONFLICT(event_id) DO UPDATE SET commence_ts=COALESCE(excluded.commence_ts, commence_ts), "
+               "home=COALESCE(excluded.home, home), away=COALESCE(excluded.away, away), "
+               "league=COALESCE(excluded.league, league), source=COALESCE(excluded.source, source)")
+        if commit:
+            with self.conn:
+                self.conn.executemany(sql, rows)
+        else:
+            self.conn.executemany(sql, rows)
+
+    # ------------------------------------------------------------------
+    # Lectura
+    # ------------------------------------------------------------------
+    def _filters(self, event_ids=None, bookmaker=None, market=None, alias="o"):
+        where, params = [], []
+        if event_ids is not None:
+            ids = [str(i) for i in event_ids]
+            where.append(f"{alias}.event_id IN ({','.join('?' * len(ids))})"); params += ids
+        if bookmaker is not None:
+            where.append(f"{alias}.bookmaker = ?"); params.append(bookmaker)
+        if market is not None:
+            where.append(f"{alias}.market = ?"); params.append(market)
+        return where, params
+
+    def _pick(self, order: str, extra_where: Iterable[str] = (), extra_params=(), join: str = "",
+              event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        where, params = self._filters(event_ids, bookmaker, market)
+        where = list(extra_where) + where
+        sql = f"""
+            SELECT event_id, bookmaker, market, line, side, price, ts FROM (
+                SELECT o.*, ROW_NUMBER() OVER (PARTITION BY o.event_id, o.bookmaker, o.market, o.line, o.side
+                                               ORDER BY o.ts {order}) AS rn
+                FROM odds o {join}
+                {('WHERE ' + ' AND '.join(where)) if where else ''}
+            ) WHERE rn = 1"""
+        out = pd.read_sql_query(sql, self.conn, params=list(extra_params) + params)
+        out["ts"] = pd.to_datetime(out["ts"], unit="s", utc=True)
+        return out
+
+    def history(self, event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        """Todas las observaciones (orden temporal)."""
+        where, params = self._filters(event_ids, bookmaker, market)
+        sql = f"SELECT * FROM odds o {('WHERE ' + ' AND '.join(where)) if where else ''} ORDER BY o.ts"
+        out = pd.read_sql_query(sql, self.conn, params=params)
+        out["ts"] = pd.to_datetime(out["ts"], unit="s", utc=True)
+        return out
+
+    def opening(self, event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        """Primera cuota observada por event/bookmaker/market/line/side."""
+        return self._pick("ASC", event_ids=event_ids, bookmaker=bookmaker, market=market)
+
+    def as_of(self, when, event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        """
+        Última cuota con ts <= `when`. `when` puede ser una fecha (misma para todos)
+        o un DataFrame/Series {event_id -> instante de apuesta} para as-of por evento.
+        """
+        if isinstance(when, (pd.DataFrame, pd.Series)):
+            w = when.reset_index() if isinstance(when, pd.Series) else when
+            w = pd.DataFrame({"event_id": w.iloc[:, 0].astype(str), "as_of": _to_epoch(w.iloc[:, 1])})
+            w = w.dropna(subset=["as_of"]).astype({"as_of": "int64"})
+            with self.conn:
+                self.conn.execute("CREATE TEMP TABLE IF NOT EXISTS _as_of (event_id TEXT PRIMARY KEY, as_of INTEGER)")
+                self.conn.execute("DELETE FROM _as_of")
+                self.conn.executemany("INSERT OR REPLACE INTO _as_of VALUES (?, ?)", w.itertuples(index=False, name=None))
+            return self._pick("DESC", ["o.ts <= w.as_of"], join="JOIN _as_of w ON w.event_id = o.event_id",
+                              event_ids=event_ids, bookmaker=bookmaker, market=market)
+        t = _to_epoch([when])[0]
+        if np.isnan(t):
+            raise ValueError(f"Fecha no interpretable: {when!r}")
+        t = int(t)
+        return self._pick("DESC", ["o.ts <= ?"], [t], event_ids=event_ids, bookmaker=bookmaker, market=market)
+
+    def closing(self, event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        """Última cuota antes del inicio (events.commence_ts); sin hora de inicio, la última observada."""
+        return self._pick("DESC", ["(e.commence_ts IS NULL OR o.ts <= e.commence_ts)"],
+                          join="LEFT JOIN events e ON e.event_id = o.event_id",
+                          event_ids=event_ids, bookmaker=bookmaker, market=market)
+
+    def line_movement(self, event_ids=None, bookmaker=None, market=None) -> pd.DataFrame:
+        """
+        Agregados de movimiento por event/bookmaker/market/line/side: nº de observaciones,
+        apertura, cierre, mínimo, máximo, deriva de cuota (close/open - 1) y cambio de
+        probabilidad implícita (1/close - 1/open).
+        """
+        where, params = self._filters(event_ids, bookmaker, market)
+        sql = f"""
+            SELECT o.event_id, o.bookmaker, o.market, o.line, o.side,
+                   COUNT(*) AS n_obs, MIN(o.ts) AS first_ts, MAX(o.ts) AS last_ts,
+                   MIN(o.price) AS min_price, MAX(o.price) AS max_price
+            FROM odds o {('WHERE ' + ' AND '.join(where)) if where else ''}
+            GROUP BY o.event_id, o.bookmaker, o.market, o.line, o.side"""
+        agg = pd.read_sql_query(sql, self.conn, params=params)
+        op = self.opening(event_ids, bookmaker, market).rename(columns={"price": "open_price"}).drop(columns="ts")
+        cl = self.closing(event_ids, bookmaker, market).rename(columns={"price": "close_price", "ts": "close_ts"})
+        out = agg.merge(op, on=KEY, how="left").merge(cl, on=KEY, how="left")
+        out["drift"] = out["close_price"] / out["open_price"] - 1.0
+        out["implied_move"] = 1.0 / out["close_price"] - 1.0 / out["open_price"]
+        for c in ("first_ts", "last_ts"):
+            out[c] = pd.to_datetime(out[c], unit="s", utc=True)
+        return out
+
+    def count(self) -> int:
+        return int(self.conn.execute("SELECT COUNT(*) FROM odds").fetchone()[0])
@@ -1,36 +1,133 @@
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.parquet as pq
 import yaml
 from pathlib import Path
 from src.utils.names import normalize_name
+from src.utils.arrow_cache import arrow_path, write_arrow
+from src.utils.entity_ids import add_ids
 
 RAW = Path("data/raw")
 PROC = Path("data/processed")
 CFG  = Path("config")
+FD_DATASET = PROC / "fd_dataset"      # un fragmento parquet por CSV (Arrow dataset)
 
-def load_football_data():
+# Columnas del CSV de Football-Data que usa el pipeline
+NEEDED = ['Date','HomeTeam','AwayTeam','FTHG','FTAG','B365H','B365D','B365A']
+BASE_COLUMNS = ['Div','Date','Time','HomeTeam','AwayTeam','FTHG','FTAG','FTR','HTHG','HTAG']
+STAT_COLUMNS = ['HS','AS','HST','AST','HC','AC','HY','AY','HR','AR']
+# Bloques de cuotas a conservar (1X2, O/U 2.5 y hándicap asiático, apertura y cierre).
+# Pinnacle usa 'PS' en 1X2 y 'P' en O/U y AH.
+ODDS_BOOKMAKERS = ('B365', 'PS', 'Avg', 'Max')
+DATE_FORMATS = ('%d/%m/%Y', '%d/%m/%y')
+
+def odds_columns(bookmakers=ODDS_BOOKMAKERS):
+    cols = ['AHh', 'AHCh']
+    for bk in bookmakers:
+        ou = 'P' if bk == 'PS' else bk
+        cols += [f'{bk}{s}' for s in 'HDA'] + [f'{bk}C{s}' for s in 'HDA']
+        cols += [f'{ou}{c}{m}' for c in ('', 'C') for m in ('>2.5', '<2.5', 'AHH', 'AHA')]
+    return cols
+
+def _schema(cols):
+    """Tipos compactos: equipos/liga como diccionario, goles int8, cuotas y estadísticas float32."""
+    fields = []
+    for c in cols:
+        if c in ('Div','League','HomeTeam','AwayTeam','FTR'):
+            t = pa.dictionary(pa.int32(), pa.string())
+        elif c == 'Date':
+            t = pa.timestamp('ns')
+        elif c == 'Time':
+            t = pa.string()
+        elif c in ('FTHG','FTAG','y'):
+            t = pa.int8()
+        else:
+            t = pa.float32()
+        fields.append(pa.field(c, t))
+    return pa.schema(fields)
+
+def _parse_dates(s: pd.Series) -> pd.Series:
+    """Fechas dd/mm/yyyy (temporadas antiguas dd/mm/yy) con formato explícito."""
+    out = pd.to_datetime(s, format=DATE_FORMATS[0], errors='coerce')
+    for fmt in DATE_FORMATS[1:]:
+        miss = out.isna() & s.notna()
+        if miss.any():
+            out[miss] = pd.to_datetime(s[miss], format=fmt, errors='coerce')
+    return out
+
+def read_fd_csv(fp: Path, bookmakers=ODDS_BOOKMAKERS):
+    """Lee un CSV de Football-Data con solo las columnas necesarias y tipos compactos (None si no sirve)."""
+    header = pd.read_csv(fp, nrows=0, encoding='utf-8-sig').columns
+    miss = [c for c in NEEDED if c not in header]
+    if miss:
+        print("Omitiendo por columnas faltantes:", fp.name, miss)
+        return None
+    wanted = BASE_COLUMNS + STAT_COLUMNS + odds_columns(bookmakers)
+    cols = [c for c in wanted if c in header]
+    odds = [c for c in cols if c not in BASE_COLUMNS and c not in STAT_COLUMNS]
+    dtypes = {c: 'float32' for c in odds + STAT_COLUMNS + ['FTHG','FTAG','HTHG','HTAG'] if c in cols}  # pueden venir vacías
+    dtypes.update({c: 'string' for c in ('Div','Date','Time','HomeTeam','AwayTeam','FTR') if c in cols})
+    df = pd.read_csv(fp, usecols=cols, dtype=dtypes, encoding='utf-8-sig', on_bad_lines='skip')
+    df = df.dropna(subset=['HomeTeam','AwayTeam','FTHG','FTAG'])
+    df['Date'] = _parse_dates(df['Date'])
+    df['y'] = np.select([df['FTHG'] > df['FTAG'], df['FTHG'] == df['FTAG']], [0, 1], 2).astype('int8')
+    df['League'] = fp.stem.split('_')[0]
+    df[['FTHG','FTAG']] = df[['FTHG','FTAG']].astype('int8')   # sin nulos tras el dropna
+    return df
+
+def _fragment_fresh(frag: Path, fp: Path, schema: pa.Schema) -> bool:
+    """Fragmento reutilizable: posterior al CSV y con el mismo esquema (solo se lee el footer)."""
+    if not frag.exists() or frag.stat().st_mtime < fp.stat().st_mtime:
+        return False
+    try:
+        return pq.read_schema(frag).equals(schema, check_metadata=False)
+    except (OSError, pa.ArrowInvalid):
+        return False
+
+def build_fd_dataset(files, out_dir: Path = FD_DATASET, bookmakers=ODDS_BOOKMAKERS, force: bool = False):
+    """
+    Convierte cada CSV en un fragmento parquet del dataset (fichero a fichero, memoria
+    acotada por el CSV más grande). Solo se reprocesan los CSV más nuevos que su fragmento
+    o cuyo fragmento se escribió con otro esquema (p. ej. otras `bookmakers`).
+    """
+    out_dir.mkdir(parents=True, exist_ok=True)
+    wanted = BASE_COLUMNS + STAT_COLUMNS + odds_columns(bookmakers)
+    schema = _schema(wanted + ['y','League'])
+    written = set()
+    for fp in files:
+        frag = out_dir / f"{fp.stem}.parquet"
+        if not force and _fragment_fresh(frag, fp, schema):
+            written.add(frag.name)
+            continue
+        df = read_fd_csv(fp, bookmakers)
+        if df is None:
+            continue
+        table = pa.Table.from_pandas(df.reindex(columns=schema.names), schema=schema, preserve_index=False)
+        pq.write_table(table, frag)
+        written.add(frag.name)
+        del df, table
+    for stale in out_dir.glob("*.parquet"):      # CSV eliminados
+        if stale.name not in written:
+            stale.unlink()
+    return out_dir
+
+def load_football_data(bookmakers=ODDS_BOOKMAKERS, columns=None):
     files = sorted(RAW.glob("*.csv"))
     if not files:
         raise SystemExit("No hay CSVs de Football-Data (ejecuta football_data_multi).")
-    dfs = []
-    for fp in files:
-        df = pd.read_csv(fp)
-        needed = ['Date','HomeTeam','AwayTeam','FTHG','FTAG','B365H','B365D','B365A']
-        miss = [c for c in needed if c not in df.columns]
-        if miss:
-            print("Omitiendo por columnas faltantes:", fp.name, miss)
-            continue
-        df['Date'] = pd.to_datetime(df['Date'], errors='coerce', dayfirst=True)
-        def lab(r):
-            if r['FTHG'] > r['FTAG']: return 0
-            if r['FTHG'] == r['FTAG']: return 1
-            return 2
-        df['y'] = df.apply(lab, axis=1)
-        df['League'] = fp.stem.split('_')[0]
-        dfs.append(df)
-    if not dfs:
+    build_fd_dataset(files, FD_DATASET, bookmakers=bookmakers)
+    fragments = sorted(FD_DATASET.glob("*.parquet"))
+    if not fragments:
         raise SystemExit("No se pudieron leer CSVs con columnas mínimas.")
-    out = pd.concat(dfs, ignore_index=True).sort_values('Date')
-    return out
+    dataset = ds.dataset(fragments, format="parquet")
+    out = dataset.to_table(columns=columns).to_pandas()
+    # columnas que no existen en ningún CSV (p.ej. cuotas de una casa no publicada)
+    out = out.dropna(axis=1, how='all')
+    out = out.sort_values('Date', kind='stable').reset_index(drop=True)
+    # ids enteros estables de equipo/liga (HomeId/AwayId/LeagueId) guardados con el dataset
+    return add_ids(out)
 
 def load_understat_xg():
     udir = RAW / "understat"
@@ -95,6 +192,7 @@ def main():
     uxg = load_understat_xg()
     df = merge_xg(fd, uxg)
     df.to_parquet(PROC / "matches.parquet", index=False)
+    write_arrow(df, arrow_path("matches", PROC))
     print("Dataset listo:", PROC / "matches.parquet")
 
 if __name__ == "__main__":
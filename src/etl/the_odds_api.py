@@ -1,25 +1,65 @@
-import os, time, requests
+import os
+from datetime import datetime, timezone
 from pathlib import Path
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple
 import pandas as pd
 
+from src.utils.http_client import get_client
+from src.etl.odds_store import OddsStore
+
 BASE = "https://api.the-odds-api.com/v4"
 API_KEY = os.getenv("THE_ODDS_API_KEY","")
+MARKET_KEYS = {"h2h": "1X2", "totals": "OU", "spreads": "AH"}
+
+def events_to_long(events: List[Dict[str, Any]], ts) -> Tuple[pd.DataFrame, pd.DataFrame]:
+    """
+    Eventos de The Odds API -> (observaciones, eventos) en el formato de OddsStore.
+    h2h -> 1X2 (H/D/A), totals -> OU (Over/Under, point), spreads -> AH (Home/Away, línea del local).
+    """
+    rows, evs = [], []
+    for ev in events:
+        idv = ev.get("id"); home = ev.get("home_team"); away = ev.get("away_team")
+        evs.append(dict(event_id=idv, commence_ts=ev.get("commence_time"), home=home, away=away,
+                        league=ev.get("sport_key"), source="the-odds-api"))
+        for bk in ev.get("bookmakers", []):
+            bkname = bk.get("title", "")
+            for mk in bk.get("markets", []):
+                market = MARKET_KEYS.get(mk.get("key"))
+                if market is None:
+                    continue
+                for o in mk.get("outcomes", []):
+                    name = o.get("name", ""); point = o.get("point")
+                    if market == "1X2":
+                        side, line = {home: "H", away: "A", "Draw": "D"}.get(name, name), 0.0
+                    elif market == "OU":
+                        side, line = name, float(point) if point is not None else 0.0
+                    else:
+                        side = "Home" if name == home else "Away"
+                        line = float(point) if point is not None else 0.0
+                        line = line if side == "Home" else -line
+                    rows.append(dict(event_id=idv, bookmaker=bkname, market=market, line=line, side=side,
+                                     price=float(o.get("price")), ts=mk.get("last_update") or ts))
+    return pd.DataFrame(rows), pd.DataFrame(evs)
 
 def list_sports():
-    r = requests.get(f"{BASE}/sports", params={"apiKey": API_KEY}, timeout=30)
+    r = get_client().get(f"{BASE}/sports", params={"apiKey": API_KEY}, timeout=30)
     r.raise_for_status()
     return r.json()
 
-def get_odds(sport_key: str, regions: str = "eu", markets: str = "h2h", bookmakers: str = "pinnacle,bet365") -> pd.DataFrame:
+def get_odds(sport_key: str, regions: str = "eu", markets: str = "h2h", bookmakers: str = "pinnacle,bet365",
+             store: Optional[OddsStore] = None) -> pd.DataFrame:
     """
     Current odds snapshot for upcoming events. Use for alerts and as a proxy if closing not available.
+    If `store` is given the snapshot is also appended to the odds time-series store.
     """
-    r = requests.get(f"{BASE}/sports/{sport_key}/odds", params={
+    r = get_client().get(f"{BASE}/sports/{sport_key}/odds", params={
         "apiKey": API_KEY, "regions": regions, "markets": markets, "bookmakers": bookmakers, "oddsFormat":"decimal"
     }, timeout=30)
     r.raise_for_status()
     data = r.json()
+    if store is not None:
+        obs, evs = events_to_long(data, datetime.now(timezone.utc))
+        store.append(obs, evs)
     rows = []
     for ev in data:
         commence = ev.get("commence_time")
@@ -37,20 +77,25 @@ def get_odds(sport_key: str, regions: str = "eu", markets: str = "h2h", bookmake
                                      H=price_map.get(home), D=price_map.get("Draw"), A=price_map.get(away)))
     return pd.DataFrame(rows)
 
-def get_historical_snapshot(sport_key: str, date_from: str, date_to: str, regions: str = "eu", markets: str = "h2h", bookmakers: str = "pinnacle,bet365") -> pd.DataFrame:
+def get_historical_snapshot(sport_key: str, date_from: str, date_to: str, regions: str = "eu", markets: str = "h2h", bookmakers: str = "pinnacle,bet365",
+                            store: Optional[OddsStore] = None) -> pd.DataFrame:
     """
     Historical snapshots require a paid plan; this function assumes access is enabled on the account.
+    If `store` is given every snapshot is appended to the odds time-series store (keyed by its timestamp).
     """
     url = f"{BASE}/historical/sports/{sport_key}/odds"
     params = {"apiKey": API_KEY, "dateFormat":"iso", "regions": regions, "markets": markets, "bookmakers": bookmakers,
               "from": date_from, "to": date_to}
-    r = requests.get(url, params=params, timeout=60)
+    r = get_client().get(url, params=params, timeout=60)
     r.raise_for_status()
     data = r.json()
     # Flatten similar to get_odds
     rows = []
     for snap in data:
         ts = snap.get("timestamp")
+        if store is not None:
+            obs, evs = events_to_long(snap.get("data", []), ts)
+            store.append(obs, evs)
         for ev in snap.get("data", []):
             idv = ev.get("id"); home = ev.get("home_team"); away = ev.get("away_team")
             for bk in ev.get("bookmakers", []):
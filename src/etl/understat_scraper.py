@@ -1,7 +1,20 @@
-import argparse, json, re, time
+"""
+Understat xG harvester (asyncio).
+
+- Descarga concurrente de las páginas de partido (semáforo --concurrency) sobre el
+  cliente HTTP compartido, que aplica el límite de understat.com (token bucket).
+- Checkpoint en disco de los ids ya descargados: una nueva ejecución solo pide
+  partidos nuevos o que fallaron.
+- Las filas se escriben en el CSV de la liga a medida que llegan (append + flush).
+- --base_url / UNDERSTAT_BASE_URL permite apuntar a un servidor local de fixtures.
+
+Uso:
+    python -m src.etl.understat_scraper --leagues EPL La_Liga --start_year auto
+"""
+import argparse, asyncio, csv, json, os, re
 from pathlib import Path
-import requests
-from tqdm import tqdm
+
+from src.utils.http_client import get_client
 
 LEAGUE_MAP = {
     "EPL": "EPL",
@@ -11,22 +24,41 @@ LEAGUE_MAP = {
     "Ligue_1": "Ligue_1"
 }
 
-def fetch_league_matches(league_key: str, start_year: int):
-    url = f"https://understat.com/league/{league_key}/{start_year}"
-    html = requests.get(url, timeout=30, headers={"User-Agent":"Mozilla/5.0"}).text
-    m = re.search(r"var\\s+matchesData\\s*=\\s*(\\[.*?\\]);", html, re.S)
-    if not m:
+BASE_URL = os.getenv("UNDERSTAT_BASE_URL", "https://understat.com")
+UA = {"User-Agent": "Mozilla/5.0"}
+CSV_COLUMNS = ["id", "league", "start_year", "date", "home", "away", "xG_home", "xG_away"]
+
+def _extract_json_var(html: str, name: str):
+    """Lee `var <name> = JSON.parse('...')` (escapes \\xNN) o un literal JSON directo."""
+    m = re.search(rf"var\s+{name}\s*=\s*JSON\.parse\('(.*?)'\)", html, re.S)
+    if m:
+        raw = m.group(1).encode("utf-8").decode("unicode_escape")
+        try:  # los \xNN son bytes UTF-8
+            raw = raw.encode("latin-1").decode("utf-8")
+        except UnicodeError:
+            pass
+        return json.loads(raw)
+    m = re.search(rf"var\s+{name}\s*=\s*(\[.*?\]|\{{.*?\}});", html, re.S)
+    if m:
+        return json.loads(m.group(1))
+    return None
+
+def fetch_league_matches(league_key: str, start_year: int, base_url: str = BASE_URL):
+    url = f"{base_url}/league/{league_key}/{start_year}"
+    html = get_client().get_text(url, timeout=30, headers=UA)
+    matches = _extract_json_var(html, "datesData")
+    if matches is None:
+        matches = _extract_json_var(html, "matchesData")
+    if matches is None:
         raise RuntimeError("No se encontró matchesData en Understat (estructura cambió?).")
-    matches = json.loads(m.group(1))
     return matches
 
-def fetch_match_xg(match_id: int):
-    url = f"https://understat.com/match/{match_id}"
-    html = requests.get(url, timeout=30, headers={"User-Agent":"Mozilla/5.0"}).text
-    m_h = re.search(r"var\\s+shotsData\\s*=\\s*(\\{.*?\\});", html, re.S)
-    if not m_h:
+def fetch_match_xg(match_id: int, base_url: str = BASE_URL):
+    url = f"{base_url}/match/{match_id}"
+    html = get_client().get_text(url, timeout=30, headers=UA)
+    data = _extract_json_var(html, "shotsData")
+    if data is None:
         raise RuntimeError("No se encontró shotsData en match page.")
-    data = json.loads(m_h.group(1))
     def sum_xg(arr):
         return sum(float(s.get("xG", 0.0)) for s in arr)
     xg_home = sum_xg(data.get("h", []))
@@ -38,40 +70,110 @@ def season_start_year_auto():
     today = datetime.datetime.utcnow()
     return today.year if today.month >= 7 else today.year - 1
 
+
+class Checkpoint:
+    """Ids de partido ya descargados (un id por línea, append-only)."""
+
+    def __init__(self, path: Path):
+        self.path = path
+        self.done = set()
+        if path.exists():
+            self.done = {int(x) for x in path.read_text().split() if x.strip().isdigit()}
+        self._fh = None
+
+    def add(self, match_id: int):
+        if self._fh is None:
+            self._fh = open(self.path, "a", encoding="utf-8")
+        self._fh.write(f"{match_id}\n"); self._fh.flush()
+        self.done.add(match_id)
+
+    def close(self):
+        if self._fh is not None:
+            self._fh.close(); self._fh = None
+
+
+async def harvest_league(key: str, start_year: int, out: Path, base_url: str = BASE_URL,
+                         concurrency: int = 8, only_played: bool = True) -> dict:
+    """
+    Descarga el xG de todos los partidos de una liga/temporada que no estén en el
+    checkpoint y los añade a `<key>_<year>_xg.csv` según terminan.
+    Devuelve un resumen {total, skipped, ok, failed}.
+    """
+    fp = out / f"{key}_{start_year}_xg.csv"
+    ckpt = Checkpoint(out / f"{key}_{start_year}_xg.checkpoint")
+    # CSV existente sin checkpoint (ejecuciones antiguas): sus ids cuentan como hechos
+    if fp.exists() and not ckpt.path.exists():
+        with open(fp, newline="", encoding="utf-8") as fh:
+            for r in csv.DictReader(fh):
+                if r.get("xG_home") not in (None, "") and str(r.get("id", "")).isdigit():
+                    ckpt.add(int(r["id"]))
+
+    matches = await asyncio.to_thread(fetch_league_matches, key, start_year, base_url)
+    if only_played:
+        matches = [m for m in matches if m.get("isResult", True) in (True, "true", 1)]
+    todo = [m for m in matches if int(m["id"]) not in ckpt.done]
+    print(f"{key} {start_year}: {len(matches)} partidos, {len(matches) - len(todo)} en checkpoint, {len(todo)} por descargar")
+
+    new_file = not fp.exists() or fp.stat().st_size == 0
+    fh = open(fp, "a", newline="", encoding="utf-8")
+    writer = csv.DictWriter(fh, fieldnames=CSV_COLUMNS, extrasaction="ignore")
+    if new_file:
+        writer.writeheader()
+    sem = asyncio.Semaphore(concurrency)
+    stats = dict(total=len(matches), skipped=len(matches) - len(todo), ok=0, failed=0)
+
+    async def one(m):
+        mid = int(m["id"])
+        async with sem:
+            try:
+                xg_h, xg_a = await asyncio.to_thread(fetch_match_xg, mid, base_url)
+            except Exception as e:
+                stats["failed"] += 1
+                print(f"  [x] {mid}: {e}")
+                return
+        # escritura en el hilo del event loop: sin carreras entre tareas
+        writer.writerow(dict(id=mid, league=key, start_year=start_year, date=m.get("datetime"),
+                             home=(m.get("h") or {}).get("title"), away=(m.get("a") or {}).get("title"),
+                             xG_home=xg_h, xG_away=xg_a))
+        fh.flush()
+        ckpt.add(mid)
+        stats["ok"] += 1
+
+    try:
+        await asyncio.gather(*(one(m) for m in todo))
+    finally:
+        fh.close(); ckpt.close()
+    print(f"Guardado: {fp} (+{stats['ok']} filas, {stats['failed']} fallidos)")
+    return stats
+
+async def harvest(leagues, start_year: int, out: Path, base_url: str = BASE_URL, concurrency: int = 8) -> dict:
+    """Todas las ligas en paralelo (comparten semáforo por liga y el bucket del host)."""
+    keys = [LEAGUE_MAP.get(lg, lg) for lg in leagues]
+    results = await asyncio.gather(*(harvest_league(k, start_year, out, base_url, concurrency) for k in keys),
+                                   return_exceptions=True)
+    out_stats = {}
+    for k, r in zip(keys, results):
+        if isinstance(r, Exception):
+            print(f"ERROR {k}: {r}")
+            out_stats[k] = dict(error=str(r))
+        else:
+            out_stats[k] = r
+    return out_stats
+
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--leagues", nargs="+", required=True, help="EPL La_Liga Bundesliga Serie_A Ligue_1")
     ap.add_argument("--start_year", default="auto", help="Ej: 2024; 'auto' usa temporada actual")
     ap.add_argument("--out_dir", default="data/raw")
+    ap.add_argument("--base_url", default=BASE_URL, help="Raíz del sitio (p. ej. servidor local de fixtures)")
+    ap.add_argument("--concurrency", type=int, default=8, help="Descargas simultáneas por liga")
     args = ap.parse_args()
 
     out = Path(args.out_dir) / "understat"
     out.mkdir(parents=True, exist_ok=True)
 
     start_year = season_start_year_auto() if args.start_year == "auto" else int(args.start_year)
-
-    for lg in args.leagues:
-        key = LEAGUE_MAP.get(lg, lg)
-        print(f"Descargando Understat: {key} {start_year}")
-        matches = fetch_league_matches(key, start_year)
-        rows = []
-        for m in tqdm(matches, desc=f"{key} {start_year}"):
-            mid = int(m["id"])
-            try:
-                xg_h, xg_a = fetch_match_xg(mid)
-                rows.append(dict(id=mid, league=key, start_year=start_year,
-                                 date=m.get("datetime"), home=m.get("h",{{}}).get("title"),
-                                 away=m.get("a",{{}}).get("title"), xG_home=xg_h, xG_away=xg_a))
-                time.sleep(0.4)
-            except Exception as e:
-                rows.append(dict(id=mid, league=key, start_year=start_year,
-                                 date=m.get("datetime"), home=m.get("h",{{}}).get("title"),
-                                 away=m.get("a",{{}}).get("title"), xG_home=None, xG_away=None, error=str(e)))
-        import pandas as pd
-        df = pd.DataFrame(rows)
-        fp = out / f"{key}_{start_year}_xg.csv"
-        df.to_csv(fp, index=False)
-        print("Guardado:", fp)
+    asyncio.run(harvest(args.leagues, start_year, out, args.base_url.rstrip("/"), args.concurrency))
 
 if __name__ == "__main__":
     main()
@@ -7,16 +7,124 @@ Esto ayuda a predecir mejor los resultados al considerar la calidad
 de finalización, no solo las oportunidades creadas.
 """
 
+import threading
+
 import pandas as pd
 import numpy as np
 from typing import Dict, Optional
 
+from src.features.feature_store import VENTANA as H2H_VENTANA, get_feature_store
+from src.features.team_timeline import TeamTimeline
+from src.utils.entity_ids import id_mask
+
+
+def _numero(v):
+    """Entero de Python si el valor es entero (como en la suma original fila a fila)."""
+    v = v.item() if hasattr(v, 'item') else v
+    return int(v) if isinstance(v, float) and v.is_integer() else v
+
+
+def _ventanas_eficiencia(df: pd.DataFrame, ventana: int):
+    """
+    Sumas de los últimos `ventana` partidos de cada equipo (todas las ligas y
+    condiciones) TERMINANDO en cada partido (incluido), sobre la línea temporal.
+
+    Devuelve (timeline, sumas) con sumas = goles, xg, tiros a puerta y partidos.
+    El xG que falta se estima con los goles, igual que en el análisis por petición.
+    """
+    tl = TeamTimeline(df)
+    rows, home = tl.row, tl.is_home
+
+    def por_equipo(col_home, col_away):
+        if col_home not in df.columns or col_away not in df.columns:
+            return np.full(len(rows), np.nan)
+        return np.where(home, df[col_home].to_numpy(dtype=float)[rows], df[col_away].to_numpy(dtype=float)[rows])
+
+    goles = tl.gf
+    xg = por_equipo('xG_home', 'xG_away')
+    xg = np.where(np.isnan(xg), goles, xg)
+    tiros = por_equipo('HST', 'AST')
+
+    idx = np.arange(len(rows))
+    start = np.maximum.accumulate(np.where(tl.first, idx, 0)) if len(rows) else idx
+    sumas = {'goles': np.zeros(len(rows)), 'xg': np.zeros(len(rows)),
+             'tiros_puerta': np.zeros(len(rows)), 'partidos': np.zeros(len(rows), dtype=np.int64)}
+    # del más reciente al más antiguo: mismo orden de suma que el bucle por filas
+    for k in range(ventana):
+        ok = idx - k >= start
+        src = np.maximum(idx - k, 0)
+        sumas['goles'] = np.where(ok, sumas['goles'] + goles[src], sumas['goles'])
+        sumas['xg'] = np.where(ok, sumas['xg'] + xg[src], sumas['xg'])
+        sumas['tiros_puerta'] = np.where(ok, sumas['tiros_puerta'] + np.nan_to_num(tiros[src]), sumas['tiros_puerta'])
+        sumas['partidos'] += ok
+    return tl, sumas
+
+
+def add_eficiencia_features(df: pd.DataFrame, ventana: int = 10) -> pd.DataFrame:
+    """
+    Añade la eficiencia de conversión rolling de cada equipo ANTES del partido.
+    
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos (FTHG/FTAG; xG_home/xG_away y HST/AST si existen)
+    ventana : int
+        Partidos previos del equipo a considerar (default: 10)
+    
+    Returns:
+    --------
+    df : pd.DataFrame
+        Dataset con columnas (Home_/Away_):
+        - goles_roll{v}: goles en los últimos v partidos
+        - xg_roll{v}: xG (o goles si no hay xG) en los últimos v partidos
+        - eficiencia_roll{v}: goles / xG (1.0 sin datos)
+        - conversion_tiros_roll{v}: goles / tiros a puerta (NaN sin tiros)
+    """
+    df = df.copy()
+    tl, sumas = _ventanas_eficiencia(df, ventana)
+    # estado previo: la ventana que termina en el partido anterior del equipo
+    previo = {c: np.where(tl.first, 0, np.r_[0, v[:-1]]) for c, v in sumas.items()}
+    with np.errstate(invalid='ignore', divide='ignore'):
+        ratio = np.where(previo['xg'] > 0, previo['goles'] / previo['xg'], 1.0)
+        conversion = np.where(previo['tiros_puerta'] > 0, previo['goles'] / previo['tiros_puerta'], np.nan)
+    for nombre, valores in (('goles', previo['goles']), ('xg', previo['xg']),
+                            ('eficiencia', ratio), ('conversion_tiros', conversion)):
+        df[f'Home_{nombre}_roll{ventana}'], df[f'Away_{nombre}_roll{ventana}'] = tl.to_matches(valores)
+    return df
+
 
 class AnalizadorEficiencia:
     """Analiza la eficiencia de conversión xG -> Goles"""
     
     def __init__(self):
         self.historial_eficiencia = {}
+        self._indices = {}
+        self._lock = threading.Lock()
+    
+    def _indice_equipos(self, df_historico: pd.DataFrame, ventana_partidos: int) -> Dict[str, Dict]:
+        """Estado actual (últimos N partidos) de cada equipo, calculado una vez por histórico y ventana."""
+        fecha = str(df_historico['Date'].iloc[-1]) if len(df_historico) else ''
+        clave = (id(df_historico), len(df_historico), fecha, ventana_partidos)
+        with self._lock:
+            indice = self._indices.get(clave)
+            if indice is None:
+                tl, sumas = _ventanas_eficiencia(df_historico, ventana_partidos)
+                ultimo = np.flatnonzero(np.r_[tl.team[1:] != tl.team[:-1], True]) if len(tl.team) else []
+                nombres = np.where(tl.is_home, df_historico['HomeTeam'].to_numpy()[tl.row],
+                                   df_historico['AwayTeam'].to_numpy()[tl.row])
+                indice = {}
+                for i in ultimo:
+                    goles, xg, n = _numero(sumas['goles'][i]), float(sumas['xg'][i]), int(sumas['partidos'][i])
+                    indice[nombres[i]] = {
+                        'goles_totales': goles,
+                        'xg_total': xg,
+                        'ratio_eficiencia': goles / xg if xg > 0 else 1.0,
+                        'partidos_analizados': n,
+                        'goles_por_partido': goles / n,
+                    }
+                self._indices = {k: v for k, v in self._indices.items() if k[:3] == clave[:3]}
+                self._indices[clave] = indice
+            return indice
     
     def calcular_eficiencia_equipo(
         self,
@@ -35,47 +143,10 @@ class AnalizadorEficiencia:
         Returns:
             Diccionario con métricas de eficiencia
         """
-        # Filtrar partidos del equipo
-        partidos_equipo = df_historico[
-            (df_historico['HomeTeam'] == equipo) | 
-            (df_historico['AwayTeam'] == equipo)
-        ].sort_values('Date', ascending=False).head(ventana_partidos)
-        
-        if len(partidos_equipo) == 0:
+        estado = self._indice_equipos(df_historico, ventana_partidos).get(equipo)
+        if estado is None:
             return self._eficiencia_default()
-        
-        goles_totales = 0
-        xg_total = 0.0
-        
-        for _, row in partidos_equipo.iterrows():
-            if row['HomeTeam'] == equipo:
-                goles_totales += row.get('FTHG', 0)
-                # Si no hay xG real, estimar desde datos disponibles
-                if 'xG_home' in row and pd.notna(row['xG_home']):
-                    xg_total += row['xG_home']
-                else:
-                    # Estimar xG aproximado
-                    xg_total += self._estimar_xg_desde_goles(row.get('FTHG', 0))
-            else:
-                goles_totales += row.get('FTAG', 0)
-                if 'xG_away' in row and pd.notna(row['xG_away']):
-                    xg_total += row['xG_away']
-                else:
-                    xg_total += self._estimar_xg_desde_goles(row.get('FTAG', 0))
-        
-        # Calcular ratio de eficiencia
-        if xg_total > 0:
-            ratio_eficiencia = goles_totales / xg_total
-        else:
-            ratio_eficiencia = 1.0
-        
-        return {
-            'goles_totales': goles_totales,
-            'xg_total': xg_total,
-            'ratio_eficiencia': ratio_eficiencia,
-            'partidos_analizados': len(partidos_equipo),
-            'goles_por_partido': goles_totales / len(partidos_equipo) if len(partidos_equipo) > 0 else 0
-        }
+        return dict(estado)
     
     def calcular_eficiencia_head_to_head(
         self,
@@ -96,12 +167,29 @@ class AnalizadorEficiencia:
         Returns:
             Diccionario con métricas H2H
         """
-        # Filtrar partidos entre estos dos equipos
+        if ventana_partidos == H2H_VENTANA:
+            # Índice H2H del feature store (últimos 5 enfrentamientos de la pareja)
+            home_primero = equipo_home <= equipo_away
+            a, b = (equipo_home, equipo_away) if home_primero else (equipo_away, equipo_home)
+            estado = get_feature_store(df_historico).state('h2h', f'{a}|{b}')
+            if estado is None:
+                return self._h2h_default()
+            goles_home = _numero(estado['a_goals'] if home_primero else estado['b_goals'])
+            goles_away = _numero(estado['b_goals'] if home_primero else estado['a_goals'])
+            return {
+                'goles_home': goles_home,
+                'goles_away': goles_away,
+                'diferencia_goles': goles_home - goles_away,
+                'partidos': int(estado['partidos']),
+                'ventaja_home': goles_home > goles_away
+            }
+        
+        # Otras ventanas: filtrar partidos entre estos dos equipos
         h2h_matches = df_historico[
-            ((df_historico['HomeTeam'] == equipo_home) & 
-             (df_historico['AwayTeam'] == equipo_away)) |
-            ((df_historico['HomeTeam'] == equipo_away) & 
-             (df_historico['AwayTeam'] == equipo_home))
+            (id_mask(df_historico, 'HomeTeam', equipo_home) &
+             id_mask(df_historico, 'AwayTeam', equipo_away)) |
+            (id_mask(df_historico, 'HomeTeam', equipo_away) &
+             id_mask(df_historico, 'AwayTeam', equipo_home))
         ].sort_values('Date', ascending=False).head(ventana_partidos)
         
         if len(h2h_matches) == 0:
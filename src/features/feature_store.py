@@ -0,0 +1,402 @@
+"""
+FEATURE STORE POINT-IN-TIME
+===========================
+
+Materializa el estado de cada equipo (y de cada enfrentamiento directo) DESPUÉS
+de cada partido, en tablas ordenadas por (clave, día):
+
+- forma_liga  : últimos 5 partidos en la liga (local o visitante) con peso por
+                recencia 1.0, 0.8, 0.6, 0.4, 0.2  (regla 1 de reglas_dinamicas)
+- local5      : últimos 5 como local en la liga    (regla 2)
+- visitante5  : últimos 5 como visitante en la liga (regla 3)
+- elo         : Elo tras el partido (todas las ligas)
+- xg          : xG a favor / en contra, media de los últimos 5 (si hay xG)
+- h2h         : últimos 5 enfrentamientos de la pareja, cualquier liga (regla 4)
+
+Lecturas:
+- `state(tabla, clave, hasta_fecha)`: estado as-of (O(1) para el último, búsqueda
+  binaria para una fecha); es lo que usa el dashboard vía calcular_reglas_dinamicas.
+- `point_in_time(df)`: join as-of masivo para entrenamiento, con el estado
+  ESTRICTAMENTE anterior al día de cada partido.
+
+Ambas lecturas salen de las mismas tablas: las features de entrenamiento y de
+servicio coinciden por construcción.
+
+Uso:
+    from src.features.feature_store import FeatureStore
+    store = FeatureStore().fit(df)
+    reglas = store.reglas('Arsenal', 'Chelsea', 'E0')      # servicio
+    X = store.point_in_time(df)                            # entrenamiento
+    store.save(); store = FeatureStore.load()
+"""
+
+import threading
+from datetime import date
+from pathlib import Path
+from typing import Dict, Optional
+
+import numpy as np
+import pandas as pd
+
+from src.features.ratings import Elo
+
+STORE_DIR = Path("data/processed/feature_store")
+PESOS_RECENCIA = (1.0, 0.8, 0.6, 0.4, 0.2)
+VENTANA = 5
+XG_WINDOW = 5
+_DAY_SPAN = 10 ** 6     # clave compuesta código * _DAY_SPAN + día
+
+
+def _days(dates) -> np.ndarray:
+    """Día calendario (días desde 1970) de cada fecha."""
+    return pd.to_datetime(pd.Series(dates)).to_numpy().astype('datetime64[D]').astype(np.int64)
+
+
+def _lags(first: np.ndarray, n: int):
+    """Para cada desfase k < n: (posición i - k, válida si no sale del grupo de i)."""
+    idx = np.arange(len(first))
+    start = np.maximum.accumulate(np.where(first, idx, 0)) if len(first) else idx
+    for k in range(n):
+        yield k, np.maximum(idx - k, 0), idx - k >= start
+
+
+class SnapshotTable:
+    """
+    Estados por clave ordenados por día. Una fila = estado tras un partido.
+
+    Parameters:
+    -----------
+    keys : array de str
+        Clave de cada fila ('equipo|liga', 'equipo' o 'a|b')
+    days : array int
+        Día del partido
+    data : pd.DataFrame
+        Columnas de estado
+    """
+
+    def __init__(self, keys, days, data: pd.DataFrame):
+        keys = np.asarray(keys, dtype=object)
+        self.index = pd.Index(pd.unique(keys))
+        codes = self.index.get_indexer(keys).astype(np.int64)
+        order = np.lexsort((np.arange(len(keys)), days, codes))
+        self.codes = codes[order]
+        self.days = np.asarray(days, dtype=np.int64)[order]
+        self.data = data.iloc[order].reset_index(drop=True)
+        self.columns = {c: self.data[c].to_numpy() for c in self.data.columns}
+        self._key = self.codes * _DAY_SPAN + self.days
+        # última fila de cada clave -> lectura O(1) del estado actual
+        last = np.flatnonzero(np.r_[self.codes[1:] != self.codes[:-1], True]) if len(order) else np.zeros(0, int)
+        self._last = dict(zip(self.index[self.codes[last]], last))
+
+    def positions(self, keys, days, inclusive: bool = True) -> np.ndarray:
+        """Fila del último estado con día <= (o <) `days` para cada clave; -1 si no hay."""
+        codes = self.index.get_indexer(pd.Index(np.asarray(keys, dtype=object))).astype(np.int64)
+        q = codes * _DAY_SPAN + np.asarray(days, dtype=np.int64)
+        pos = np.searchsorted(self._key, q, side='right' if inclusive else 'left') - 1
+        ok = (codes >= 0) & (pos >= 0)
+        ok[ok] &= self.codes[pos[ok]] == codes[ok]
+        return np.where(ok, pos, -1)
+
+    def row(self, key: str, day: Optional[int] = None, inclusive: bool = True) -> Optional[Dict]:
+        """Estado de una clave (el último si day es None)."""
+        if day is None:
+            pos = self._last.get(key, -1)
+        else:
+            pos = int(self.positions([key], [day], inclusive)[0])
+        if pos < 0:
+            return None
+        return {c: v[pos] for c, v in self.columns.items()}
+
+    def to_frame(self) -> pd.DataFrame:
+        return self.data.assign(_key=self.index[self.codes], _day=self.days)
+
+    @classmethod
+    def from_frame(cls, frame: pd.DataFrame) -> 'SnapshotTable':
+        return cls(frame['_key'].to_numpy(), frame['_day'].to_numpy(), frame.drop(columns=['_key', '_day']))
+
+
+class FeatureStore:
+    """Tablas de estado por equipo / liga / pareja construidas en una pasada vectorizada."""
+
+    def __init__(self):
+        self.tables: Dict[str, SnapshotTable] = {}
+        self.last_day: Optional[int] = None
+
+    # ------------------------------------------------------------------
+    # Construcción
+    # ------------------------------------------------------------------
+    def fit(self, df: pd.DataFrame) -> 'FeatureStore':
+        n = len(df)
+        days = _days(df['Date'])
+        home = df['HomeTeam'].astype(str).to_numpy(dtype=object)
+        away = df['AwayTeam'].astype(str).to_numpy(dtype=object)
+        league = df['League'].astype(str).to_numpy(dtype=object) if 'League' in df.columns else np.full(n, '', object)
+        hg = df['FTHG'].to_numpy(dtype=float); ag = df['FTAG'].to_numpy(dtype=float)
+        self.last_day = int(days.max()) if n else None
+
+        # línea temporal equipo-partido (cada partido dos veces)
+        team = np.concatenate([home, away])
+        gf = np.concatenate([hg, ag]); ga = np.concatenate([ag, hg])
+        t_days = np.concatenate([days, days])
+        is_home = np.r_[np.ones(n, bool), np.zeros(n, bool)]
+        team_league = team + '|' + np.concatenate([league, league])
+
+        self.tables['forma_liga'] = self._forma_ponderada(team_league, t_days, gf, ga)
+        self.tables['local5'] = self._ultimos_n(team_league[is_home], t_days[is_home], gf[is_home], ga[is_home])
+        self.tables['visitante5'] = self._ultimos_n(team_league[~is_home], t_days[~is_home], gf[~is_home], ga[~is_home])
+        self.tables['elo'] = self._elo(df, home, away, days)
+        if {'xG_home', 'xG_away'} <= set(df.columns):
+            xh = df['xG_home'].to_numpy(dtype=float); xa = df['xG_away'].to_numpy(dtype=float)
+            self.tables['xg'] = self._xg(team, t_days, np.concatenate([xh, xa]), np.concatenate([xa, xh]))
+        self.tables['h2h'] = self._h2h(home, away, days, hg, ag)
+        return self
+
+    @staticmethod
+    def _sorted(keys, days, *values):
+        codes = pd.factorize(keys)[0]
+        order = np.lexsort((np.arange(len(keys)), days, codes))
+        first = np.r_[True, codes[order][1:] != codes[order][:-1]] if len(order) else np.zeros(0, bool)
+        return order, first, [np.asarray(v)[order] for v in values]
+
+    def _forma_ponderada(self, keys, days, gf, ga) -> SnapshotTable:
+        """Regla 1: media ponderada por recencia de los últimos 5 (el más reciente pesa 1.0)."""
+        order, first, (gf, ga) = self._sorted(keys, days, gf, ga)
+        pts = np.where(gf > ga, 3, np.where(gf == ga, 1, 0))
+        s_gf = np.zeros(len(gf)); s_ga = np.zeros(len(gf)); s_pts = np.zeros(len(gf))
+        peso = np.zeros(len(gf)); partidos = np.zeros(len(gf), dtype=np.int64)
+        # mismo orden de suma que el bucle original (del más reciente al más antiguo)
+        for k, src, ok in _lags(first, VENTANA):
+            w = PESOS_RECENCIA[k]
+            s_gf = np.where(ok, s_gf + gf[src] * w, s_gf)
+            s_ga = np.where(ok, s_ga + ga[src] * w, s_ga)
+            s_pts = np.where(ok & (pts[src] > 0), s_pts + pts[src] * w, s_pts)
+            peso = np.where(ok, peso + w, peso)
+            partidos += ok
+        data = pd.DataFrame({'gf': s_gf / peso, 'ga': s_ga / peso})
+        data['gd'] = data['gf'] - data['ga']
+        data['pts'] = s_pts / peso
+        data['partidos'] = partidos
+        data['efectividad'] = data['pts'] / 3 * 100
+        return SnapshotTable(keys[order], days[order], data)
+
+    def _ultimos_n(self, keys, days, gf, ga) -> SnapshotTable:
+        """Reglas 2 y 3: sumas de los últimos 5 en una condición (los NaN no suman)."""
+        order, first, (gf, ga) = self._sorted(keys, days, gf, ga)
+        win = gf > ga
+        pts = np.where(win, 3, np.where(gf == ga, 1, 0))
+        gf0 = np.nan_to_num(gf); ga0 = np.nan_to_num(ga)
+        out = {c: np.zeros(len(gf)) for c in ('gf', 'ga', 'pts', 'wins', 'partidos')}
+        for k, src, ok in _lags(first, VENTANA):
+            out['gf'] += np.where(ok, gf0[src], 0)
+            out['ga'] += np.where(ok, ga0[src], 0)
+            out['pts'] += np.where(ok, pts[src], 0)
+            out['wins'] += np.where(ok, win[src], 0)
+            out['partidos'] += ok
+        data = pd.DataFrame({'gf': out['gf'], 'ga': out['ga'], 'gd': out['gf'] - out['ga'],
+                             'pts': out['pts'].astype(np.int64), 'partidos': out['partidos'].astype(np.int64)})
+        data['win_rate'] = out['wins'] / out['partidos'] * 100
+        return SnapshotTable(keys[order], days[order], data)
+
+    @staticmethod
+    def _elo(df, home, away, days) -> SnapshotTable:
+        """Elo de cada equipo DESPUÉS del partido (mismo modelo que ratings.add_elo)."""
+        from src.features.ratings import add_elo
+        d = add_elo(df.assign(_pos=np.arange(len(df))))
+        pos = d['_pos'].to_numpy()
+        elo = Elo()
+        r_h = d['EloHome'].to_numpy(); r_a = d['EloAway'].to_numpy()
+        s = np.where(d['FTHG'].to_numpy() > d['FTAG'].to_numpy(), 1.0,
+                     np.where(d['FTHG'].to_numpy() == d['FTAG'].to_numpy(), 0.5, 0.0))
+        e = 1.0 / (1.0 + 10 ** (-((r_h + elo.home_adv) - r_a) / 400.0))
+        post_h = np.empty(len(d)); post_a = np.empty(len(d))
+        post_h[pos] = r_h + elo.k * (s - e)
+        post_a[pos] = r_a + elo.k * ((1 - s) - (1 - e))
+        return SnapshotTable(np.concatenate([home, away]), np.concatenate([days, days]),
+                             pd.DataFrame({'elo': np.concatenate([post_h, post_a])}))
+
+    def _xg(self, keys, days, xg_for, xg_against) -> SnapshotTable:
+        """Media de xG a favor / en contra en los últimos XG_WINDOW partidos con dato."""
+        order, first, (xf, xa) = self._sorted(keys, days, xg_for, xg_against)
+        s_f = np.zeros(len(xf)); s_a = np.zeros(len(xf)); cnt = np.zeros(len(xf))
+        for k, src, ok in _lags(first, XG_WINDOW):
+            ok = ok & ~np.isnan(xf[src])
+            s_f += np.where(ok, xf[src], 0); s_a += np.where(ok, xa[src], 0); cnt += ok
+        with np.errstate(invalid='ignore', divide='ignore'):
+            data = pd.DataFrame({'xg_for': s_f / cnt, 'xg_against': s_a / cnt})
+        return SnapshotTable(keys[order], days[order], data)
+
+    def _h2h(self, home, away, days, hg, ag) -> SnapshotTable:
+        """Regla 4: últimos 5 enfrentamientos de la pareja (a, b) en orden alfabético."""
+        swap = home > away
+        a = np.where(swap, away, home); b = np.where(swap, home, away)
+        a_goals = np.where(swap, ag, hg); b_goals = np.where(swap, hg, ag)
+        keys = a + '|' + b
+        order, first, (ga_, gb_) = self._sorted(keys, days, a_goals, b_goals)
+        a_win = ga_ > gb_; b_win = gb_ > ga_; draw = ga_ == gb_
+        sin_resultado = ~(a_win | b_win | draw)     # NaN: el bucle original lo cuenta como victoria visitante
+        out = {c: np.zeros(len(ga_)) for c in ('a_wins', 'b_wins', 'draws', 'sin_resultado', 'a_goals', 'b_goals', 'partidos')}
+        for k, src, ok in _lags(first, VENTANA):
+            out['a_wins'] += np.where(ok, a_win[src], 0)
+            out['b_wins'] += np.where(ok, b_win[src], 0)
+            out['draws'] += np.where(ok, draw[src], 0)
+            out['sin_resultado'] += np.where(ok, sin_resultado[src], 0)
+            out['a_goals'] += np.where(ok, ga_[src], 0)
+            out['b_goals'] += np.where(ok, gb_[src], 0)
+            out['partidos'] += ok
+        data = pd.DataFrame({c: (v.astype(np.int64) if c not in ('a_goals', 'b_goals') else v) for c, v in out.items()})
+        return SnapshotTable(keys[order], days[order], data)
+
+    # ------------------------------------------------------------------
+    # Lectura puntual (servicio)
+    # ------------------------------------------------------------------
+    def state(self, table: str, key: str, hasta_fecha: Optional[date] = None, inclusive: bool = True) -> Optional[Dict]:
+        """Estado de `key` con partidos hasta `hasta_fecha` (incluida); el último si es None o posterior al histórico."""
+        if table not in self.tables:
+            return None
+        day = None if hasta_fecha is None else int(_days([hasta_fecha])[0])
+        if day is not None and self.last_day is not None and day >= self.last_day and inclusive:
+            day = None
+        return self.tables[table].row(key, day, inclusive)
+
+    def forma_liga(self, equipo: str, liga: str, hasta_fecha: Optional[date] = None) -> Dict:
+        s = self.state('forma_liga', f'{equipo}|{liga}', hasta_fecha)
+        if s is None:
+            return {'gf': 0, 'ga': 0, 'gd': 0, 'pts': 0, 'partidos': 0, 'efectividad': 0}
+        return {'gf': s['gf'], 'ga': s['ga'], 'gd': s['gd'], 'pts': s['pts'],
+                'partidos': int(s['partidos']), 'efectividad': s['efectividad']}
+
+    def ultimos_5(self, equipo: str, liga: str, condicion: str, hasta_fecha: Optional[date] = None) -> Dict:
+        """condicion: 'local' o 'visitante'."""
+        s = self.state('local5' if condicion == 'local' else 'visitante5', f'{equipo}|{liga}', hasta_fecha)
+        if s is None:
+            return {'gf': 0, 'ga': 0, 'gd': 0, 'pts': 0, 'partidos': 0, 'win_rate': 0}
+        return {'gf': s['gf'], 'ga': s['ga'], 'gd': s['gd'], 'pts': int(s['pts']),
+                'partidos': int(s['partidos']), 'win_rate': s['win_rate']}
+
+    def h2h(self, equipo_home: str, equipo_away: str, hasta_fecha: Optional[date] = None) -> Dict:
+        home_first = equipo_home <= equipo_away
+        a, b = (equipo_home, equipo_away) if home_first else (equipo_away, equipo_home)
+        s = self.state('h2h', f'{a}|{b}', hasta_fecha)
+        if s is None:
+            return {'home_wins': 0, 'draws': 0, 'away_wins': 0, 'home_goals_avg': 0.0,
+                    'away_goals_avg': 0.0, 'total_goals_avg': 0.0, 'partidos': 0}
+        return self._orient_h2h({k: np.asarray(v) for k, v in s.items()}, np.asarray(home_first), scalar=True)
+
+    @staticmethod
+    def _orient_h2h(s: Dict, home_first: np.ndarray, scalar: bool = False):
+        """Pasa el estado (a, b) a la perspectiva del local de la consulta."""
+        n = s['partidos']
+        home_wins = np.where(home_first, s['a_wins'], s['b_wins'])
+        away_wins = np.where(home_first, s['b_wins'], s['a_wins']) + s['sin_resultado']
+        with np.errstate(invalid='ignore', divide='ignore'):
+            hg = np.where(home_first, s['a_goals'], s['b_goals']) / n
+            ag = np.where(home_first, s['b_goals'], s['a_goals']) / n
+        out = {'home_wins': home_wins, 'draws': s['draws'], 'away_wins': away_wins,
+               'home_goals_avg': hg, 'away_goals_avg': ag, 'total_goals_avg': hg + ag,
+               'partidos': n, 'dominancia': (home_wins - away_wins) / np.maximum(n, 1)}
+        if scalar:
+            ints = ('home_wins', 'draws', 'away_wins', 'partidos')
+            return {k: (int(v) if k in ints else float(v)) for k, v in out.items()}
+        return out
+
+    def elo(self, equipo: str, hasta_fecha: Optional[date] = None) -> float:
+        s = self.state('elo', equipo, hasta_fecha)
+        return float(s['elo']) if s is not None else Elo().base
+
+    def reglas(self, equipo_home: str, equipo_away: str, liga: str, hasta_fecha: Optional[date] = None) -> Dict:
+        """Reglas 1-4 con el formato de calcular_reglas_dinamicas."""
+        return {
+            'ultimos_8_total': {'home': self.forma_liga(equipo_home, liga, hasta_fecha),
+                                'away': self.forma_liga(equipo_away, liga, hasta_fecha)},
+            'ultimos_5_local': self.ultimos_5(equipo_home, liga, 'local', hasta_fecha),
+            'ultimos_5_visitante': self.ultimos_5(equipo_away, liga, 'visitante', hasta_fecha),
+            'ultimos_5_h2h': self.h2h(equipo_home, equipo_away, hasta_fecha),
+        }
+
+    # ------------------------------------------------------------------
+    # Join masivo (entrenamiento)
+    # ------------------------------------------------------------------
+    def point_in_time(self, df: pd.DataFrame) -> pd.DataFrame:
+        """
+        Features de reglas, Elo y xG de cada partido con el estado de los días
+        ANTERIORES al partido (sin fuga). Mismas columnas que preparar_features_para_prediccion
+        más H2H completo, Elo, xG y los placeholders de bajas.
+        """
+        days = _days(df['Date'])
+        home = df['HomeTeam'].astype(str).to_numpy(dtype=object)
+        away = df['AwayTeam'].astype(str).to_numpy(dtype=object)
+        league = df['League'].astype(str).to_numpy(dtype=object) if 'League' in df.columns else np.full(len(df), '', object)
+        out = pd.DataFrame(index=df.index)
+
+        def take(table, keys, cols, fill):
+            t = self.tables[table]
+            pos = t.positions(keys, days, inclusive=False)
+            ok = pos >= 0
+            return {c: np.where(ok, t.columns[c][np.maximum(pos, 0)], fill) for c in cols}, ok
+
+        for prefix, team in (('Home', home), ('Away', away)):
+            vals, _ = take('forma_liga', team + '|' + league, ['gf', 'ga', 'gd', 'pts'], 0)
+            for c, name in (('gf', 'GF'), ('ga', 'GA'), ('gd', 'GD'), ('pts', 'Pts')):
+                out[f'{prefix}_{name}_ultimos8_liga'] = vals[c]
+        vals, _ = take('local5', home + '|' + league, ['gf', 'ga', 'gd'], 0)
+        for c in ('gf', 'ga', 'gd'):
+            out[f'Home_{c.upper()}_local5_liga'] = vals[c]
+        vals, _ = take('visitante5', away + '|' + league, ['gf', 'ga', 'gd'], 0)
+        for c in ('gf', 'ga', 'gd'):
+            out[f'Away_{c.upper()}_visitante5_liga'] = vals[c]
+
+        home_first = home <= away
+        pair = np.where(home_first, home + '|' + away, away + '|' + home)
+        h2h_cols = ['a_wins', 'b_wins', 'draws', 'sin_resultado', 'a_goals', 'b_goals', 'partidos']
+        vals, ok = take('h2h', pair, h2h_cols, 0)
+        h = self._orient_h2h(vals, home_first)
+        for c in ('home_wins', 'draws', 'away_wins', 'home_goals_avg', 'away_goals_avg', 'total_goals_avg'):
+            out[f'H2H5_{c}'] = np.where(ok, h[c], 0)
+        out['H2H5_matches'] = h['partidos'].astype(np.int64)
+
+        for prefix, team in (('Home', home), ('Away', away)):
+            vals, _ = take('elo', team, ['elo'], Elo().base)
+            out[f'{prefix}_elo'] = vals['elo']
+            if 'xg' in self.tables:
+                vals, _ = take('xg', team, ['xg_for', 'xg_against'], np.nan)
+                out[f'{prefix}_xG_for_roll{XG_WINDOW}'] = vals['xg_for']
+                out[f'{prefix}_xG_against_roll{XG_WINDOW}'] = vals['xg_against']
+
+        for col in ('Home_jugadores_clave_bajas', 'Away_jugadores_clave_bajas',
+                    'Home_jugadores_suspendidos', 'Away_jugadores_suspendidos'):
+            out[col] = 0
+        return out
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+    def save(self, path: Path = STORE_DIR):
+        path = Path(path)
+        path.mkdir(parents=True, exist_ok=True)
+        for name, table in self.tables.items():
+            table.to_frame().to_parquet(path / f"{name}.parquet", index=False)
+
+    @classmethod
+    def load(cls, path: Path = STORE_DIR) -> 'FeatureStore':
+        store = cls()
+        for fp in sorted(Path(path).glob("*.parquet")):
+            store.tables[fp.stem] = SnapshotTable.from_frame(pd.read_parquet(fp))
+        days = [t.days.max() for t in store.tables.values() if len(t.days)]
+        store.last_day = int(max(days)) if days else None
+        return store
+
+
+_stores: Dict[tuple, FeatureStore] = {}
+_stores_lock = threading.Lock()
+
+
+def get_feature_store(df: pd.DataFrame) -> FeatureStore:
+    """Store del histórico `df`, construido una vez por proceso (el histórico no cambia entre peticiones)."""
+    key = (id(df), len(df), str(df['Date'].iloc[-1]) if len(df) else '')
+    with _stores_lock:
+        store = _stores.get(key)
+        if store is None:
+            store = FeatureStore().fit(df)
+            _stores.clear()     # solo el histórico vigente
+            _stores[key] = store
+        return store
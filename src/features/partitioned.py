@@ -0,0 +1,203 @@
+"""
+CÁLCULO DE FEATURES POR LIGA EN PARALELO
+========================================
+
+Las ligas son independientes salvo por los equipos que cambian de competición
+(ascensos, descensos) y los H2H entre competiciones. Cada partición se calcula
+con su CONTEXTO: sus partidos más todos los partidos anteriores de sus equipos
+en cualquier liga. Así las features "previas al partido" por equipo o por
+pareja (forma, rachas, H2H, reglas por liga) salen idénticas al cálculo global.
+
+NO es válido para features globales por propagación (Elo): el rating de un
+rival depende de toda la red de partidos. Esas se calculan sin particionar.
+
+Las columnas de entrada se copian UNA vez a memoria compartida
+(multiprocessing.shared_memory); cada worker solo recibe posiciones y
+construye su sub-DataFrame leyendo de ahí, sin serializar el DataFrame.
+
+Uso:
+    from src.features.partitioned import compute_partitioned
+    from src.features.professional_features import add_head_to_head_features
+    df = compute_partitioned(df, add_head_to_head_features, params={'n_matches': 5}, max_workers=16)
+    df = compute_partitioned(df, func, by=('League', 'Season'), history_days=400)
+"""
+
+import os
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from multiprocessing import shared_memory
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+import pandas as pd
+
+from src.utils.entity_ids import team_codes
+
+FEATURE_WORKERS = int(os.environ.get("FEATURE_WORKERS", os.cpu_count() or 1))
+_ROW = '__row__'
+
+
+@dataclass
+class Partition:
+    """Filas propias de una partición y su contexto (propias + historial de sus equipos)."""
+    key: Tuple
+    rows: np.ndarray
+    context: np.ndarray
+
+
+def league_partitions(df: pd.DataFrame, by: Sequence[str] = ('League',),
+                      history_days: Optional[float] = None) -> List[Partition]:
+    """
+    Particiones por `by` con el contexto necesario para features por equipo.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos con Date, HomeTeam, AwayTeam y las columnas de `by`
+    by : lista de columnas
+        Clave de partición (default: League; ('League', 'Season') también es válido)
+    history_days : float, optional
+        Limita el contexto a los partidos de los `history_days` días anteriores al
+        primero de la partición. Solo válido si todas las features miran como
+        mucho ese tiempo atrás (None = todo el historial)
+    """
+    h_ids, a_ids = team_codes(df)
+    dates = pd.to_datetime(df['Date']).to_numpy()
+    groups = df.groupby(list(by), dropna=False, sort=True).indices
+    partitions = []
+    for key, rows in groups.items():
+        rows = np.sort(rows)
+        teams = np.union1d(h_ids[rows], a_ids[rows])
+        teams = teams[teams >= 0]
+        mask = np.isin(h_ids, teams) | np.isin(a_ids, teams)
+        mask &= dates <= dates[rows].max()
+        if history_days is not None:
+            mask &= dates >= dates[rows].min() - np.timedelta64(int(history_days * 86400), 's')
+        mask[rows] = True
+        partitions.append(Partition(key if isinstance(key, tuple) else (key,), rows, np.flatnonzero(mask)))
+    return partitions
+
+
+class SharedFrame:
+    """
+    Columnas de un DataFrame en bloques de memoria compartida.
+
+    Las columnas numéricas/fecha se guardan tal cual; el resto (equipos, liga)
+    como códigos int32 + categorías. `spec` es lo único que viaja a los workers.
+    """
+
+    def __init__(self, df: pd.DataFrame, columns: Iterable[str]):
+        self.blocks: List[shared_memory.SharedMemory] = []
+        self.spec = []
+        try:
+            for col in columns:
+                values = df[col].to_numpy()
+                categories = None
+                if values.dtype.kind not in 'biufM':
+                    codes, uniques = pd.factorize(df[col])
+                    values, categories = codes.astype(np.int32), np.asarray(uniques, dtype=object)
+                block = shared_memory.SharedMemory(create=True, size=max(values.nbytes, 1))
+                np.ndarray(values.shape, values.dtype, buffer=block.buf)[:] = values
+                self.blocks.append(block)
+                self.spec.append((col, block.name, values.dtype.str, len(values), categories))
+        except BaseException:
+            self.close()
+            raise
+
+    def close(self):
+        for block in self.blocks:
+            block.close()
+            block.unlink()
+        self.blocks = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def _take(spec, positions: np.ndarray) -> pd.DataFrame:
+    """Sub-DataFrame con las filas `positions` leídas de la memoria compartida."""
+    data = {}
+    for col, name, dtype, n, categories in spec:
+        block = shared_memory.SharedMemory(name=name)
+        values = np.ndarray((n,), np.dtype(dtype), buffer=block.buf)[positions]
+        block.close()
+        if categories is not None:
+            values = np.append(categories, np.nan)[values]     # código -1 -> NaN
+        data[col] = values
+    return pd.DataFrame(data)
+
+
+def _compute_partition(spec, func: Callable, params: Dict, context: np.ndarray, rows: np.ndarray,
+                       outputs: Optional[List[str]]) -> pd.DataFrame:
+    """Ejecuta func sobre el contexto y devuelve las salidas de las filas propias (índice = posición en df)."""
+    frame = _take(spec, context)
+    frame[_ROW] = context
+    result = func(frame, **params)
+    cols = outputs if outputs is not None else [c for c in result.columns if c not in frame.columns]
+    missing = [c for c in cols if c not in result.columns]
+    if missing:
+        raise ValueError(f"{getattr(func, '__name__', func)} no generó las columnas {missing}")
+    pos = result[_ROW].to_numpy()
+    own = np.isin(pos, rows)
+    out = result.loc[own, cols]
+    out.index = pos[own]
+    return out
+
+
+def compute_partitioned(df: pd.DataFrame, func: Callable, by: Sequence[str] = ('League',),
+                        params: Optional[Dict] = None, columns: Optional[Iterable[str]] = None,
+                        outputs: Optional[List[str]] = None, max_workers: Optional[int] = None,
+                        history_days: Optional[float] = None, pool: Optional[Executor] = None) -> pd.DataFrame:
+    """
+    Aplica un constructor de features por partición en un pool de procesos y une el resultado.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos; el orden de filas y el índice se conservan
+    func : callable
+        func(df_contexto, **params) -> DataFrame con las columnas nuevas
+        (importable a nivel de módulo, no lambdas)
+    by : lista de columnas
+        Clave de partición (default: League)
+    columns : lista, optional
+        Columnas de entrada que necesita func (default: todas las de df)
+    outputs : lista, optional
+        Columnas de salida (default: las que func añade)
+    max_workers : int, optional
+        Procesos (default: FEATURE_WORKERS o nº de CPUs)
+    history_days : float, optional
+        Ver league_partitions
+    pool : Executor, optional
+        Pool de procesos ya creado (se reutiliza y no se cierra)
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        Copia de df con las columnas de salida
+    """
+    params = dict(params or {})
+    columns = list(df.columns) if columns is None else list(dict.fromkeys(list(columns) + list(by)))
+    partitions = league_partitions(df, by, history_days)
+    workers = max_workers or FEATURE_WORKERS
+
+    with SharedFrame(df, columns) as shared:
+        tasks = [(shared.spec, func, params, p.context, p.rows, outputs) for p in partitions]
+        if pool is not None:
+            parts = [f.result() for f in [pool.submit(_compute_partition, *t) for t in tasks]]
+        elif workers <= 1 or len(partitions) <= 1:
+            parts = [_compute_partition(*t) for t in tasks]
+        else:
+            # las particiones grandes primero para equilibrar la carga
+            tasks.sort(key=lambda t: -len(t[3]))
+            with ProcessPoolExecutor(max_workers=min(workers, len(tasks))) as executor:
+                parts = [f.result() for f in [executor.submit(_compute_partition, *t) for t in tasks]]
+
+    stitched = pd.concat(parts).sort_index() if parts else pd.DataFrame(columns=outputs or [])
+    result = df.copy()
+    for col in stitched.columns:
+        result[col] = stitched[col].to_numpy()
+    return result
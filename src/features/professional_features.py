@@ -17,6 +17,11 @@ import pandas as pd
 import numpy as np
 from typing import Optional, Tuple, Dict
 
+from src.features.registry import FeatureExecutor, default_registry
+from src.features.rolling import shifted_rolling
+from src.features.streaks import venue_streak
+from src.utils.entity_ids import id_mask
+
 
 def add_head_to_head_features(df: pd.DataFrame, n_matches: int = 5) -> pd.DataFrame:
     """
@@ -85,8 +90,8 @@ def add_head_to_head_features(df: pd.DataFrame, n_matches: int = 5) -> pd.DataFr
         h2h_matches = df[
             (df['Date'] < date) &
             (
-                ((df['HomeTeam'] == home) & (df['AwayTeam'] == away)) |
-                ((df['HomeTeam'] == away) & (df['AwayTeam'] == home))
+                (id_mask(df, 'HomeTeam', home) & id_mask(df, 'AwayTeam', away)) |
+                (id_mask(df, 'HomeTeam', away) & id_mask(df, 'AwayTeam', home))
             )
         ].tail(n_matches)
         
@@ -149,6 +154,11 @@ def add_head_to_head_features(df: pd.DataFrame, n_matches: int = 5) -> pd.DataFr
     return df
 
 
+def _points(gf: np.ndarray, ga: np.ndarray) -> np.ndarray:
+    """Puntos del partido (3/1/0); sin resultado cuenta como 0."""
+    return np.select([gf > ga, gf == ga], [3, 1], 0)
+
+
 def add_home_away_separated_form(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
     """
     Añade forma reciente SEPARADA por contexto (casa vs fuera).
@@ -191,59 +201,18 @@ def add_home_away_separated_form(df: pd.DataFrame, window: int = 5) -> pd.DataFr
     - Away_as_away_win_rate_roll{window}: % victorias como visitante
     """
     df = df.sort_values('Date').copy()
-    
-    # ============================================================
-    # HOME TEAM - Rendimiento como LOCAL (solo partidos en casa)
-    # ============================================================
-    home_groups = df.groupby('HomeTeam')
-    
-    # Goles como local
-    df['Home_as_home_GF_roll' + str(window)] = home_groups['FTHG'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    df['Home_as_home_GA_roll' + str(window)] = home_groups['FTAG'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    df['Home_as_home_GD_roll' + str(window)] = df[f'Home_as_home_GF_roll{window}'] - df[f'Home_as_home_GA_roll{window}']
-    
-    # Puntos como local
-    def home_points(row):
-        if row['FTHG'] > row['FTAG']:
-            return 3
-        elif row['FTHG'] == row['FTAG']:
-            return 1
-        return 0
-    
-    df['_home_points'] = df.apply(home_points, axis=1)
-    df['Home_as_home_points_roll' + str(window)] = home_groups['_home_points'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    
-    # Win rate como local
-    df['_home_win'] = (df['FTHG'] > df['FTAG']).astype(int)
-    df['Home_as_home_win_rate_roll' + str(window)] = home_groups['_home_win'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    
-    # ============================================================
-    # AWAY TEAM - Rendimiento como VISITANTE (solo partidos fuera)
-    # ============================================================
-    away_groups = df.groupby('AwayTeam')
-    
-    # Goles como visitante
-    df['Away_as_away_GF_roll' + str(window)] = away_groups['FTAG'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    df['Away_as_away_GA_roll' + str(window)] = away_groups['FTHG'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    df['Away_as_away_GD_roll' + str(window)] = df[f'Away_as_away_GF_roll{window}'] - df[f'Away_as_away_GA_roll{window}']
-    
-    # Puntos como visitante
-    def away_points(row):
-        if row['FTAG'] > row['FTHG']:
-            return 3
-        elif row['FTAG'] == row['FTHG']:
-            return 1
-        return 0
-    
-    df['_away_points'] = df.apply(away_points, axis=1)
-    df['Away_as_away_points_roll' + str(window)] = away_groups['_away_points'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-    
-    # Win rate como visitante
-    df['_away_win'] = (df['FTAG'] > df['FTHG']).astype(int)
-    df['Away_as_away_win_rate_roll' + str(window)] = away_groups['_away_win'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    
-    # Limpiar columnas temporales
-    df = df.drop(columns=['_home_points', '_home_win', '_away_points', '_away_win'])
+    hg = df['FTHG'].to_numpy(dtype=float)
+    ag = df['FTAG'].to_numpy(dtype=float)
+    
+    # Ventanas previas al partido, solo partidos en la misma condición
+    for team_col, gf, ga, prefix in (('HomeTeam', hg, ag, 'Home_as_home'), ('AwayTeam', ag, hg, 'Away_as_away')):
+        stats = shifted_rolling(df[team_col], {'GF': gf, 'GA': ga, 'points': _points(gf, ga), 'win': gf > ga},
+                                [window], ('sum', 'mean'))
+        df[f'{prefix}_GF_roll{window}'] = stats[('GF', 'sum', window)]
+        df[f'{prefix}_GA_roll{window}'] = stats[('GA', 'sum', window)]
+        df[f'{prefix}_GD_roll{window}'] = df[f'{prefix}_GF_roll{window}'] - df[f'{prefix}_GA_roll{window}']
+        df[f'{prefix}_points_roll{window}'] = stats[('points', 'sum', window)]
+        df[f'{prefix}_win_rate_roll{window}'] = stats[('win', 'mean', window)]
     
     print(f"✅ Home/Away Separated Form añadido: ventana {window} partidos")
     print(f"   10 columnas nuevas (5 home context + 5 away context)")
@@ -284,41 +253,26 @@ def add_multi_window_form(df: pd.DataFrame, windows: list = [5, 10, 15]) -> pd.D
     - Home_points_roll{w}, Away_points_roll{w}
     - Home_win_rate_roll{w}, Away_win_rate_roll{w}
     """
-    from src.features.rolling import add_form
-    
     df = df.sort_values('Date').copy()
+    hg = df['FTHG'].to_numpy(dtype=float)
+    ag = df['FTAG'].to_numpy(dtype=float)
+    
+    # Todas las ventanas en una pasada por condición (goles con ventana completa, como add_form)
+    stats = {}
+    for team_col, gf, ga, prefix in (('HomeTeam', hg, ag, 'Home'), ('AwayTeam', ag, hg, 'Away')):
+        stats[prefix] = shifted_rolling(
+            df[team_col], {'GF': gf, 'GA': ga, 'GD': gf - ga, 'points': _points(gf, ga), 'win_rate': gf > ga},
+            windows, ('sum', 'mean'), min_periods={'GF': None, 'GA': None, 'GD': None})
     
     for window in windows:
         print(f"   Procesando ventana {window}...")
-        
-        # Usar función existente para goles
-        df = add_form(df, window=window)
-        
-        # Añadir puntos y win rate
-        def home_points(row):
-            if row['FTHG'] > row['FTAG']: return 3
-            elif row['FTHG'] == row['FTAG']: return 1
-            return 0
-        
-        def away_points(row):
-            if row['FTAG'] > row['FTHG']: return 3
-            elif row['FTAG'] == row['FTHG']: return 1
-            return 0
-        
-        df['_hp'] = df.apply(home_points, axis=1)
-        df['_ap'] = df.apply(away_points, axis=1)
-        df['_hw'] = (df['FTHG'] > df['FTAG']).astype(int)
-        df['_aw'] = (df['FTAG'] > df['FTHG']).astype(int)
-        
-        home_groups = df.groupby('HomeTeam')
-        away_groups = df.groupby('AwayTeam')
-        
-        df[f'Home_points_roll{window}'] = home_groups['_hp'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-        df[f'Away_points_roll{window}'] = away_groups['_ap'].rolling(window, min_periods=1).sum().reset_index(level=0, drop=True)
-        df[f'Home_win_rate_roll{window}'] = home_groups['_hw'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-        df[f'Away_win_rate_roll{window}'] = away_groups['_aw'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-        
-        df = df.drop(columns=['_hp', '_ap', '_hw', '_aw'])
+        for prefix in ('Home', 'Away'):
+            for s in ('GF', 'GA', 'GD'):
+                df[f'{prefix}_{s}_roll{window}'] = stats[prefix][(s, 'sum', window)]
+        for prefix in ('Home', 'Away'):
+            df[f'{prefix}_points_roll{window}'] = stats[prefix][('points', 'sum', window)]
+        for prefix in ('Home', 'Away'):
+            df[f'{prefix}_win_rate_roll{window}'] = stats[prefix][('win_rate', 'mean', window)]
     
     print(f"✅ Multi-Window Form añadido: {len(windows)} ventanas {windows}")
     
@@ -376,43 +330,11 @@ def add_motivation_context(df: pd.DataFrame) -> pd.DataFrame:
     # Por ahora, solo calculamos streaks (rachas)
     # Para posiciones reales, necesitaríamos standings de API
     
-    for team_col in ['HomeTeam', 'AwayTeam']:
-        is_home = (team_col == 'HomeTeam')
-        prefix = 'Home' if is_home else 'Away'
-        gf_col = 'FTHG' if is_home else 'FTAG'
-        ga_col = 'FTAG' if is_home else 'FTHG'
-        
-        for team in df[team_col].unique():
-            team_matches = df[df[team_col] == team].copy()
-            
-            streak = 0
-            streak_type = None  # 'W', 'D', 'L'
-            
-            for idx in team_matches.index:
-                match = df.loc[idx]
-                
-                # Resultado del partido
-                if match[gf_col] > match[ga_col]:
-                    result = 'W'
-                elif match[gf_col] == match[ga_col]:
-                    result = 'D'
-                else:
-                    result = 'L'
-                
-                # Actualizar racha
-                if result == 'W':
-                    if streak_type == 'W':
-                        streak += 1
-                    else:
-                        streak = 1
-                        streak_type = 'W'
-                else:
-                    streak = 0
-                    streak_type = result
-                
-                # Guardar racha
-                df.at[idx, f'{prefix}_streak_length'] = streak if streak_type == 'W' else 0
-                df.at[idx, f'{prefix}_on_winning_streak'] = (streak >= 3)  # 3+ victorias seguidas
+    # Racha de victorias por condición (incluye el partido actual), RLE por equipo
+    for venue, prefix in (('home', 'Home'), ('away', 'Away')):
+        streak = venue_streak(df, venue, 'win', include_current=True)
+        df[f'{prefix}_streak_length'] = streak
+        df[f'{prefix}_on_winning_streak'] = streak >= 3  # 3+ victorias seguidas
     
     print(f"✅ Motivation Context añadido: streaks y rachas calculadas")
     print(f"   NOTA: Para motivación real, integrar standings de API")
@@ -455,25 +377,19 @@ def add_xg_rolling_features(df: pd.DataFrame, window: int = 5) -> pd.DataFrame:
     
     df = df.sort_values('Date').copy()
     
-    # xG rolling promedio
-    home_groups = df.groupby('HomeTeam')
-    away_groups = df.groupby('AwayTeam')
-    
-    df[f'Home_xG_roll{window}'] = home_groups['xG_home'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    df[f'Away_xG_roll{window}'] = away_groups['xG_away'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    
-    # xG overperformance (suerte/finishing)
-    df['_home_xG_over'] = df['FTHG'] - df['xG_home'].fillna(df['FTHG'])
-    df['_away_xG_over'] = df['FTAG'] - df['xG_away'].fillna(df['FTAG'])
+    stats = {}
+    for team_col, goals, xg, prefix in (('HomeTeam', 'FTHG', 'xG_home', 'Home'), ('AwayTeam', 'FTAG', 'xG_away', 'Away')):
+        # overperformance = goles - xG (suerte/finishing); sin xG cuenta como 0
+        over = df[goals] - df[xg].fillna(df[goals])
+        stats[prefix] = shifted_rolling(df[team_col], {'xG': df[xg], 'over': over}, [window], ('mean', 'std'))
     
-    df[f'Home_xG_overperformance_roll{window}'] = home_groups['_home_xG_over'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    df[f'Away_xG_overperformance_roll{window}'] = away_groups['_away_xG_over'].rolling(window, min_periods=1).mean().reset_index(level=0, drop=True)
-    
-    # xG consistency
-    df[f'Home_xG_consistency_roll{window}'] = home_groups['xG_home'].rolling(window, min_periods=2).std().reset_index(level=0, drop=True).fillna(0)
-    df[f'Away_xG_consistency_roll{window}'] = away_groups['xG_away'].rolling(window, min_periods=2).std().reset_index(level=0, drop=True).fillna(0)
-    
-    df = df.drop(columns=['_home_xG_over', '_away_xG_over'])
+    for prefix in ('Home', 'Away'):
+        df[f'{prefix}_xG_roll{window}'] = stats[prefix][('xG', 'mean', window)]
+    for prefix in ('Home', 'Away'):
+        df[f'{prefix}_xG_overperformance_roll{window}'] = stats[prefix][('over', 'mean', window)]
+    # consistencia: desviación estándar del xG (0 con menos de 2 partidos)
+    for prefix in ('Home', 'Away'):
+        df[f'{prefix}_xG_consistency_roll{window}'] = np.nan_to_num(stats[prefix][('xG', 'std', window)])
     
     print(f"✅ xG Rolling Features añadidos: ventana {window}")
     
@@ -484,7 +400,8 @@ def add_all_professional_features(df: pd.DataFrame,
                                   h2h_matches: int = 5,
                                   form_window: int = 5,
                                   multi_windows: list = [5, 10, 15],
-                                  enable_xg: bool = True) -> pd.DataFrame:
+                                  enable_xg: bool = True,
+                                  n_jobs: int = 1) -> pd.DataFrame:
     """
     Añade TODAS las features profesionales de una vez.
     
@@ -503,6 +420,9 @@ def add_all_professional_features(df: pd.DataFrame,
         Ventanas para análisis temporal múltiple (default: [5,10,15])
     enable_xg : bool
         Activar features de xG (default: True)
+    n_jobs : int
+        Procesos; con n_jobs > 1 cada grupo se calcula por liga en paralelo
+        (mismo resultado, ver src.features.partitioned) (default: 1)
     
     Returns:
     --------
@@ -516,34 +436,22 @@ def add_all_professional_features(df: pd.DataFrame,
     3. ✅ Múltiples ventanas temporales
     4. ✅ Contexto de motivación
     5. ✅ xG rolling (si disponible)
+    6. ✅ Eficiencia de conversión (goles/xG, goles/tiros a puerta)
     """
     print("\n" + "=" * 70)
     print("  AÑADIENDO FEATURES PROFESIONALES")
     print("=" * 70)
     print(f"\nDataset inicial: {len(df)} partidos, {len(df.columns)} columnas\n")
     
-    # 1. Head-to-Head
-    print("[1/5] Head-to-Head (H2H)...")
-    df = add_head_to_head_features(df, n_matches=h2h_matches)
-    
-    # 2. Rendimiento Casa/Fuera separado
-    print(f"\n[2/5] Rendimiento Casa/Fuera separado...")
-    df = add_home_away_separated_form(df, window=form_window)
-    
-    # 3. Múltiples ventanas temporales
-    print(f"\n[3/5] Múltiples ventanas temporales...")
-    df = add_multi_window_form(df, windows=multi_windows)
-    
-    # 4. Motivación y contexto
-    print(f"\n[4/5] Motivación y contexto...")
-    df = add_motivation_context(df)
-    
-    # 5. xG rolling (si está disponible)
-    if enable_xg:
-        print(f"\n[5/5] xG Rolling features...")
-        df = add_xg_rolling_features(df, window=form_window)
-    else:
-        print(f"\n[5/5] xG features DESACTIVADO")
+    # Grupos registrados con caché por columnas: solo se recalcula lo que cambió
+    registry = default_registry(h2h_matches=h2h_matches, form_window=form_window,
+                                multi_windows=multi_windows, enable_xg=enable_xg)
+    targets = [name for name in registry.groups if name != 'elo']
+    partition_by = ['League'] if n_jobs > 1 and 'League' in df.columns else None
+    executor = FeatureExecutor(registry, partition_by=partition_by, partition_workers=n_jobs)
+    df = executor.run(df.sort_values('Date'), targets=targets)
+    print(f"\n   Calculados: {executor.stats['computed']}")
+    print(f"   Desde caché: {executor.stats['cached']}")
     
     print("\n" + "=" * 70)
     print(f"  COMPLETADO")
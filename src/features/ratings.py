@@ -1,5 +1,8 @@
+import numpy as np
 import pandas as pd
 
+from src.utils.entity_ids import team_codes
+
 class Elo:
     def __init__(self, k=20.0, home_adv=60.0, base=1500.0):
         self.k = k; self.home_adv = home_adv; self.base = base; self.table = {}
@@ -16,16 +19,15 @@ class Elo:
         self.table[away] = self.get(away) + self.k*((1 - s_home) - (1 - ea))
 
 def add_elo(df, home='HomeTeam', away='AwayTeam', hg='FTHG', ag='FTAG'):
+    """Elo previo al partido (EloHome/EloAway) recorriendo los partidos por fecha con ids enteros."""
+    d = df.sort_values('Date').reset_index(drop=True)
+    h_ids, a_ids = team_codes(d, home, away)
+    hg_v = d[hg].to_numpy(); ag_v = d[ag].to_numpy()
+    s_home = np.where(hg_v > ag_v, 1.0, np.where(hg_v == ag_v, 0.5, 0.0))
     elo = Elo()
-    outs = []
-    for _, r in df.sort_values('Date').iterrows():
-        h, a = r[home], r[away]
-        rH, rA = elo.get(h), elo.get(a)
-        if r[hg] > r[ag]: s = 1.0
-        elif r[hg] == r[ag]: s = 0.5
-        else: s = 0.0
+    r_home = np.empty(len(d)); r_away = np.empty(len(d))
+    for i, (h, a, s) in enumerate(zip(h_ids.tolist(), a_ids.tolist(), s_home.tolist())):
+        r_home[i] = elo.get(h); r_away[i] = elo.get(a)
         elo.update(h, a, s)
-        row = r.to_dict()
-        row['EloHome'] = rH; row['EloAway'] = rA
-        outs.append(row)
-    return pd.DataFrame(outs)
+    d['EloHome'] = r_home; d['EloAway'] = r_away
+    return d
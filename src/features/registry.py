@@ -0,0 +1,368 @@
+"""
+REGISTRO DE FEATURES CON GRAFO DE DEPENDENCIAS
+==============================================
+
+Cada grupo de features declara sus columnas de entrada, sus columnas de salida
+y sus parámetros. El ejecutor:
+
+1. Resuelve el grafo (un grupo depende de otro si consume alguna de sus salidas)
+   y calcula solo los grupos pedidos y sus ancestros.
+2. Ejecuta en paralelo los grupos independientes (hilos o procesos).
+3. Guarda las columnas de salida de cada grupo en data/cache/features/<grupo>/,
+   con clave = hash(columnas de entrada) + parámetros + versión. Cambiar un
+   grupo (o añadir uno nuevo) no recalcula el resto.
+
+Las funciones de grupo reciben un DataFrame con solo sus columnas de entrada
+y devuelven un DataFrame (pueden reordenar filas o reiniciar el índice: el
+ejecutor realinea por una columna interna de posición).
+
+Uso:
+    from src.features.registry import FeatureExecutor, default_registry
+    registry = default_registry(multi_windows=[5, 10])
+    registry.register('elo_diff', lambda d: d.assign(EloDiff=d['EloHome'] - d['EloAway']),
+                      inputs=['EloHome', 'EloAway'], outputs=['EloDiff'])
+    df = FeatureExecutor(registry).run(df)                # todo el grafo
+    df = FeatureExecutor(registry).run(df, ['elo_diff'])  # solo elo_diff y sus dependencias
+"""
+
+import hashlib
+import json
+import os
+from concurrent.futures import FIRST_COMPLETED, Executor, ProcessPoolExecutor, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field
+from graphlib import TopologicalSorter
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.features.partitioned import FEATURE_WORKERS, compute_partitioned
+
+FEATURE_CACHE_DIR = Path(os.environ.get("FEATURE_CACHE_DIR", "data/cache/features"))
+BASE_COLUMNS = ['Date', 'HomeTeam', 'AwayTeam', 'FTHG', 'FTAG']
+_ROW = '__row__'
+
+
+@dataclass
+class FeatureGroup:
+    """Grupo de features: func(df_entradas, **params) -> DataFrame con las salidas."""
+    name: str
+    func: Callable[..., pd.DataFrame]
+    inputs: List[str]
+    outputs: List[str]
+    params: Dict = field(default_factory=dict)
+    version: str = '1'      # súbela al cambiar la lógica de func para invalidar la caché
+    partitionable: bool = True  # False si depende de toda la red de partidos (Elo)
+
+
+class FeatureRegistry:
+    """Conjunto de grupos con salidas únicas (cada columna tiene un solo productor)."""
+
+    def __init__(self):
+        self.groups: Dict[str, FeatureGroup] = {}
+
+    def register(self, name: str, func: Callable, inputs: Iterable[str], outputs: Iterable[str],
+                 params: Optional[Dict] = None, version: str = '1', partitionable: bool = True) -> FeatureGroup:
+        group = FeatureGroup(name, func, list(inputs), list(outputs), dict(params or {}), version, partitionable)
+        owners = self.producers()
+        for col in group.outputs:
+            if owners.get(col, name) != name:
+                raise ValueError(f"La columna '{col}' ya la produce el grupo '{owners[col]}'")
+        self.groups[name] = group   # re-registrar un nombre lo reemplaza
+        return group
+
+    def producers(self) -> Dict[str, str]:
+        return {col: g.name for g in self.groups.values() for col in g.outputs}
+
+    def dependencies(self, name: str) -> List[str]:
+        owners = self.producers()
+        return sorted({owners[c] for c in self.groups[name].inputs if c in owners} - {name})
+
+    def graph(self, targets: Optional[Iterable[str]] = None) -> Dict[str, List[str]]:
+        """Subgrafo {grupo: dependencias} con los grupos pedidos y todos sus ancestros."""
+        pending = list(targets if targets is not None else self.groups)
+        graph = {}
+        while pending:
+            name = pending.pop()
+            if name in graph:
+                continue
+            if name not in self.groups:
+                raise KeyError(f"Grupo de features desconocido: {name}")
+            graph[name] = self.dependencies(name)
+            pending.extend(graph[name])
+        return graph
+
+    def order(self, targets: Optional[Iterable[str]] = None) -> List[str]:
+        return list(TopologicalSorter(self.graph(targets)).static_order())
+
+
+def _compute_group(func: Callable, frame: pd.DataFrame, params: Dict, outputs: List[str]) -> pd.DataFrame:
+    """Ejecuta un grupo y devuelve sus salidas en el orden de filas de `frame` (índice 0..n-1)."""
+    result = func(frame, **params)
+    missing = [c for c in outputs if c not in result.columns]
+    if missing:
+        raise ValueError(f"{getattr(func, '__name__', func)} no generó las columnas {missing}")
+    pos = result[_ROW].to_numpy()
+    if len(pos) != len(frame) or not np.array_equal(np.sort(pos), np.arange(len(frame))):
+        raise ValueError(f"{getattr(func, '__name__', func)} añadió o eliminó filas")
+    out = result[outputs].reset_index(drop=True)
+    return out.iloc[np.argsort(pos, kind='stable')].reset_index(drop=True)
+
+
+def _compute_group_partitioned(group: FeatureGroup, frame: pd.DataFrame, by: List[str],
+                               pool: Executor) -> pd.DataFrame:
+    """Como _compute_group pero calculado por partición (liga) en el pool de procesos."""
+    out = compute_partitioned(frame, group.func, by=by, params=group.params, columns=group.inputs,
+                              outputs=group.outputs, pool=pool)
+    return out[group.outputs].reset_index(drop=True)
+
+
+class FeatureExecutor:
+    """
+    Ejecuta un FeatureRegistry sobre un DataFrame.
+
+    Parameters:
+    -----------
+    registry : FeatureRegistry
+        Grupos a ejecutar
+    cache_dir : Path o None
+        Carpeta de la caché de columnas (None desactiva la caché)
+    max_workers : int
+        Grupos ejecutados a la vez (default: 4)
+    processes : bool
+        Procesos en lugar de hilos (las funciones deben ser importables, no lambdas)
+    partition_by : lista de columnas, optional
+        Calcula cada grupo particionable por liga (p. ej. ['League']) en un pool
+        de procesos compartido (ver src.features.partitioned). Los grupos se
+        ejecutan uno tras otro; el paralelismo es entre particiones
+    partition_workers : int, optional
+        Procesos del pool de particiones (default: FEATURE_WORKERS)
+    """
+
+    def __init__(self, registry: FeatureRegistry, cache_dir: Optional[Path] = FEATURE_CACHE_DIR,
+                 max_workers: int = 4, processes: bool = False,
+                 partition_by: Optional[Sequence[str]] = None, partition_workers: Optional[int] = None):
+        self.registry = registry
+        self.cache_dir = Path(cache_dir) if cache_dir is not None else None
+        self.max_workers = max_workers
+        self.processes = processes
+        self.partition_by = list(partition_by) if partition_by else None
+        self.partition_workers = partition_workers
+        self.stats = {'computed': [], 'cached': [], 'skipped': []}
+
+    # ------------------------------------------------------------------
+    def cache_key(self, group: FeatureGroup, frame: pd.DataFrame) -> str:
+        h = hashlib.sha256()
+        h.update(json.dumps({'name': group.name, 'version': group.version, 'outputs': group.outputs,
+                             'params': group.params}, sort_keys=True, default=str).encode('utf-8'))
+        h.update(pd.util.hash_pandas_object(frame[group.inputs], index=False).to_numpy().tobytes())
+        return h.hexdigest()[:32]
+
+    def _cache_path(self, group: FeatureGroup, key: str) -> Optional[Path]:
+        return None if self.cache_dir is None else self.cache_dir / group.name / f"{key}.parquet"
+
+    def _store(self, path: Optional[Path], out: pd.DataFrame):
+        if path is None:
+            return
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        out.to_parquet(tmp, index=False)
+        tmp.replace(path)
+
+    # ------------------------------------------------------------------
+    def run(self, df: pd.DataFrame, targets: Optional[Iterable[str]] = None,
+            reuse_existing: bool = True) -> pd.DataFrame:
+        """
+        Añade a df las salidas de los grupos pedidos (default: todos) y sus dependencias.
+
+        Parameters:
+        -----------
+        df : pd.DataFrame
+            Partidos; el orden de filas y el índice se conservan
+        targets : lista o None
+            Grupos a calcular
+        reuse_existing : bool
+            No recalcular un grupo si df ya trae todas sus columnas de salida
+        """
+        graph = self.registry.graph(targets)
+        sorter = TopologicalSorter(graph)
+        sorter.prepare()
+        index = df.index
+        work = df.reset_index(drop=True)
+        work[_ROW] = np.arange(len(work))
+        self.stats = {'computed': [], 'cached': [], 'skipped': []}
+        unavailable = set()
+
+        partitioned = self.partition_by is not None and all(c in work.columns for c in self.partition_by)
+        part_pool = ProcessPoolExecutor(self.partition_workers or FEATURE_WORKERS) if partitioned else None
+        pool_cls = ProcessPoolExecutor if self.processes else ThreadPoolExecutor
+        try:
+            with pool_cls(max_workers=self.max_workers) as pool:
+                running = {}
+                while sorter.is_active():
+                    for name in sorter.get_ready():
+                        group = self.registry.groups[name]
+                        if reuse_existing and all(c in work.columns for c in group.outputs):
+                            sorter.done(name)
+                            continue
+                        missing = [c for c in group.inputs if c not in work.columns]
+                        if missing or set(graph[name]) & unavailable:
+                            print(f"⚠️  Grupo '{name}' omitido: faltan columnas {missing or graph[name]}")
+                            unavailable.add(name)
+                            self.stats['skipped'].append(name)
+                            sorter.done(name)
+                            continue
+                        key = self.cache_key(group, work)
+                        path = self._cache_path(group, key)
+                        if path is not None and path.exists():
+                            work[group.outputs] = pd.read_parquet(path, columns=group.outputs)
+                            self.stats['cached'].append(name)
+                            sorter.done(name)
+                            continue
+                        if partitioned:
+                            # en el hilo principal: el pool de particiones hace fork y no debe
+                            # coincidir con otros hilos trabajando (bloqueos heredados)
+                            if group.partitionable:
+                                frame = work[list(dict.fromkeys(group.inputs + self.partition_by))]
+                                out = _compute_group_partitioned(group, frame, self.partition_by, part_pool)
+                            else:
+                                frame = work[list(dict.fromkeys(group.inputs + [_ROW]))].copy()
+                                out = _compute_group(group.func, frame, group.params, group.outputs)
+                            self._store(path, out)
+                            work[group.outputs] = out
+                            self.stats['computed'].append(name)
+                            sorter.done(name)
+                            continue
+                        frame = work[list(dict.fromkeys(group.inputs + [_ROW]))].copy()
+                        future = pool.submit(_compute_group, group.func, frame, group.params, group.outputs)
+                        running[future] = (name, path)
+                    if not running:
+                        continue
+                    finished, _ = wait(running, return_when=FIRST_COMPLETED)
+                    for future in finished:
+                        name, path = running.pop(future)
+                        out = future.result()
+                        self._store(path, out)
+                        work[self.registry.groups[name].outputs] = out
+                        self.stats['computed'].append(name)
+                        sorter.done(name)
+        finally:
+            if part_pool is not None:
+                part_pool.shutdown(cancel_futures=True)
+
+        # columnas en orden estable (entrada + salidas de cada grupo en orden topológico),
+        # independiente del orden en que terminen los grupos y de max_workers/n_jobs
+        columns = list(df.columns)
+        for name in self.registry.order(targets):
+            columns += [c for c in self.registry.groups[name].outputs if c in work.columns]
+        columns = list(dict.fromkeys(columns))
+        columns += [c for c in work.columns if c not in columns and c != _ROW]
+        work = work[columns]
+        work.index = index
+        return work
+
+
+# ----------------------------------------------------------------------
+# Registro por defecto con los grupos existentes del proyecto
+# ----------------------------------------------------------------------
+def _elo(df):
+    from src.features.ratings import add_elo
+    return add_elo(df)
+
+
+def _form(df, window):
+    from src.features.rolling import add_form
+    return add_form(df, window=window)
+
+
+def _head_to_head(df, n_matches):
+    from src.features.professional_features import add_head_to_head_features
+    return add_head_to_head_features(df, n_matches=n_matches)
+
+
+def _home_away_form(df, window):
+    from src.features.professional_features import add_home_away_separated_form
+    return add_home_away_separated_form(df, window=window)
+
+
+def _points_form(df, windows):
+    from src.features.professional_features import add_multi_window_form
+    return add_multi_window_form(df, windows=windows)
+
+
+def _motivation(df):
+    from src.features.professional_features import add_motivation_context
+    return add_motivation_context(df)
+
+
+def _xg_rolling(df, window):
+    from src.features.professional_features import add_xg_rolling_features
+    return add_xg_rolling_features(df, window=window)
+
+
+def _eficiencia(df, window):
+    from src.features.eficiencia_conversion import add_eficiencia_features
+    return add_eficiencia_features(df, ventana=window)
+
+
+def _reglas(df):
+    from src.features.reglas_analisis import add_reglas_analisis
+    return add_reglas_analisis(df)
+
+
+H2H_COLUMNS = ['H2H_home_wins', 'H2H_draws', 'H2H_away_wins', 'H2H_home_goals_avg', 'H2H_away_goals_avg',
+               'H2H_total_goals_avg', 'H2H_home_win_rate', 'H2H_home_dominance', 'H2H_matches_found']
+MOTIVATION_COLUMNS = ['Home_position_estimated', 'Away_position_estimated', 'Home_motivation_score',
+                      'Away_motivation_score', 'Home_on_winning_streak', 'Away_on_winning_streak',
+                      'Home_streak_length', 'Away_streak_length']
+REGLAS_COLUMNS = (
+    [f'{p}_{s}_ultimos8_liga' for p in ('Home', 'Away') for s in ('GF', 'GA', 'GD', 'Pts')]
+    + [f'Home_{s}_local5_liga' for s in ('GF', 'GA', 'GD')]
+    + [f'Away_{s}_visitante5_liga' for s in ('GF', 'GA', 'GD')]
+    + ['H2H5_home_wins', 'H2H5_draws', 'H2H5_away_wins', 'H2H5_home_goals_avg', 'H2H5_away_goals_avg',
+       'H2H5_total_goals_avg', 'H2H5_matches']
+    + ['Home_jugadores_clave_bajas', 'Away_jugadores_clave_bajas', 'Home_jugadores_suspendidos',
+       'Away_jugadores_suspendidos']
+)
+
+
+def default_registry(h2h_matches: int = 5, form_window: int = 5, multi_windows: Iterable[int] = (5, 10, 15),
+                     enable_xg: bool = True, reglas: bool = False, eficiencia_window: int = 10) -> FeatureRegistry:
+    """
+    Grupos de ratings, rolling, professional_features y (opcional) reglas_analisis.
+
+    Las ventanas de add_form se registran una vez por ventana, así la forma de
+    goles de la ventana 5 la comparten el rolling básico y la forma multi-ventana.
+    """
+    windows = sorted(set(multi_windows) | {form_window})
+    registry = FeatureRegistry()
+    registry.register('elo', _elo, BASE_COLUMNS, ['EloHome', 'EloAway'], partitionable=False)
+    for w in windows:
+        registry.register(f'form_{w}', _form, BASE_COLUMNS,
+                          [f'{p}_{s}_roll{w}' for p in ('Home', 'Away') for s in ('GF', 'GA', 'GD')],
+                          params={'window': w}, version='2')
+    registry.register('h2h', _head_to_head, BASE_COLUMNS, H2H_COLUMNS, params={'n_matches': h2h_matches})
+    registry.register('home_away_form', _home_away_form, BASE_COLUMNS,
+                      [f'{p}_as_{v}_{s}_roll{form_window}' for p, v in (('Home', 'home'), ('Away', 'away'))
+                       for s in ('GF', 'GA', 'GD', 'points', 'win_rate')],
+                      params={'window': form_window}, version='2')
+    registry.register('points_form', _points_form, BASE_COLUMNS,
+                      [f'{p}_{s}_roll{w}' for w in multi_windows for s in ('points', 'win_rate')
+                       for p in ('Home', 'Away')],
+                      params={'windows': list(multi_windows)}, version='2')
+    registry.register('motivation', _motivation, BASE_COLUMNS, MOTIVATION_COLUMNS)
+    if enable_xg:
+        registry.register('xg_rolling', _xg_rolling, BASE_COLUMNS + ['xG_home', 'xG_away'],
+                          [f'{p}_xG_{s}roll{form_window}' for p in ('Home', 'Away')
+                           for s in ('', 'overperformance_', 'consistency_')],
+                          params={'window': form_window}, version='2')
+    # sin xG la eficiencia usa los goles como estimación (igual que AnalizadorEficiencia)
+    registry.register('eficiencia', _eficiencia,
+                      BASE_COLUMNS + ['HST', 'AST'] + (['xG_home', 'xG_away'] if enable_xg else []),
+                      [f'{p}_{s}_roll{eficiencia_window}' for p in ('Home', 'Away')
+                       for s in ('goles', 'xg', 'eficiencia', 'conversion_tiros')],
+                      params={'window': eficiencia_window})
+    if reglas:
+        registry.register('reglas', _reglas, BASE_COLUMNS + ['League'], REGLAS_COLUMNS)
+    return registry
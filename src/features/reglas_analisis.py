@@ -17,6 +17,8 @@ import pandas as pd
 import numpy as np
 from typing import Dict, List, Optional
 
+from src.utils.entity_ids import id_mask
+
 
 def add_reglas_analisis(df: pd.DataFrame) -> pd.DataFrame:
     """
@@ -52,7 +54,7 @@ def add_reglas_analisis(df: pd.DataFrame) -> pd.DataFrame:
     
     # Por cada equipo en cada liga
     for league in df['League'].unique():
-        league_df = df[df['League'] == league].copy()
+        league_df = df[id_mask(df, 'League', league)].copy()
         
         for team_col, gf_col, ga_col, prefix in [
             ('HomeTeam', 'FTHG', 'FTAG', 'Home'),
@@ -61,8 +63,8 @@ def add_reglas_analisis(df: pd.DataFrame) -> pd.DataFrame:
             # Agrupar por equipo
             for team in league_df[team_col].unique():
                 # Obtener todos los partidos del equipo (como local O visitante)
-                team_home = league_df[league_df['HomeTeam'] == team].copy()
-                team_away = league_df[league_df['AwayTeam'] == team].copy()
+                team_home = league_df[id_mask(league_df, 'HomeTeam', team)].copy()
+                team_away = league_df[id_mask(league_df, 'AwayTeam', team)].copy()
                 
                 # Combinar y ordenar por fecha
                 all_matches = pd.concat([team_home, team_away]).sort_values('Date')
@@ -281,9 +283,9 @@ def get_analisis_partido(df: pd.DataFrame, home_team: str, away_team: str, leagu
     """
     # Buscar último partido entre estos equipos
     match = df[
-        (df['HomeTeam'] == home_team) &
-        (df['AwayTeam'] == away_team) &
-        (df['League'] == league)
+        id_mask(df, 'HomeTeam', home_team) &
+        id_mask(df, 'AwayTeam', away_team) &
+        id_mask(df, 'League', league)
     ].tail(1)
     
     if len(match) == 0:
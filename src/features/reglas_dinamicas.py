@@ -18,6 +18,15 @@ import numpy as np
 from datetime import datetime, date
 from typing import Dict, Optional
 
+from src.features.feature_store import FeatureStore, get_feature_store
+from src.utils.entity_ids import id_mask
+
+
+def _hasta_mask(df: pd.DataFrame, hasta_fecha: date) -> np.ndarray:
+    """Partidos con fecha <= hasta_fecha (comparación datetime64, sin convertir a objetos date)."""
+    limite = np.datetime64(pd.Timestamp(hasta_fecha) + pd.Timedelta(days=1), 'ns')
+    return pd.to_datetime(df['Date']).to_numpy() < limite
+
 
 def calcular_ultimos_8_liga(df: pd.DataFrame, equipo: str, liga: str, hasta_fecha: Optional[date] = None) -> Dict:
     """
@@ -45,13 +54,13 @@ def calcular_ultimos_8_liga(df: pd.DataFrame, equipo: str, liga: str, hasta_fech
     
     # Filtrar partidos de la liga hasta la fecha
     df_filtrado = df[
-        (df['League'] == liga) &
-        (pd.to_datetime(df['Date']).dt.date <= hasta_fecha)
+        id_mask(df, 'League', liga) &
+        _hasta_mask(df, hasta_fecha)
     ].copy()
     
     # Buscar partidos del equipo (como local O visitante)
-    partidos_home = df_filtrado[df_filtrado['HomeTeam'] == equipo]
-    partidos_away = df_filtrado[df_filtrado['AwayTeam'] == equipo]
+    partidos_home = df_filtrado[id_mask(df_filtrado, 'HomeTeam', equipo)]
+    partidos_away = df_filtrado[id_mask(df_filtrado, 'AwayTeam', equipo)]
     
     # Combinar y ordenar por fecha DESCENDENTE (más reciente primero)
     todos_partidos = pd.concat([partidos_home, partidos_away]).sort_values('Date', ascending=False)
@@ -138,9 +147,9 @@ def calcular_ultimos_5_local(df: pd.DataFrame, equipo: str, liga: str, hasta_fec
     
     # Filtrar SOLO partidos como local
     partidos_local = df[
-        (df['League'] == liga) &
-        (df['HomeTeam'] == equipo) &
-        (pd.to_datetime(df['Date']).dt.date <= hasta_fecha)
+        id_mask(df, 'League', liga) &
+        id_mask(df, 'HomeTeam', equipo) &
+        _hasta_mask(df, hasta_fecha)
     ].sort_values('Date', ascending=False).head(5)
     
     if len(partidos_local) == 0:
@@ -192,9 +201,9 @@ def calcular_ultimos_5_visitante(df: pd.DataFrame, equipo: str, liga: str, hasta
     
     # Filtrar SOLO partidos como visitante
     partidos_visitante = df[
-        (df['League'] == liga) &
-        (df['AwayTeam'] == equipo) &
-        (pd.to_datetime(df['Date']).dt.date <= hasta_fecha)
+        id_mask(df, 'League', liga) &
+        id_mask(df, 'AwayTeam', equipo) &
+        _hasta_mask(df, hasta_fecha)
     ].sort_values('Date', ascending=False).head(5)
     
     if len(partidos_visitante) == 0:
@@ -246,10 +255,10 @@ def calcular_h2h_ultimos_5(df: pd.DataFrame, equipo_home: str, equipo_away: str,
     
     # Buscar enfrentamientos directos (cualquier orden)
     h2h = df[
-        (pd.to_datetime(df['Date']).dt.date <= hasta_fecha) &
+        _hasta_mask(df, hasta_fecha) &
         (
-            ((df['HomeTeam'] == equipo_home) & (df['AwayTeam'] == equipo_away)) |
-            ((df['HomeTeam'] == equipo_away) & (df['AwayTeam'] == equipo_home))
+            (id_mask(df, 'HomeTeam', equipo_home) & id_mask(df, 'AwayTeam', equipo_away)) |
+            (id_mask(df, 'HomeTeam', equipo_away) & id_mask(df, 'AwayTeam', equipo_home))
         )
     ].sort_values('Date', ascending=False).head(5)
     
@@ -308,7 +317,8 @@ def calcular_reglas_dinamicas(df: pd.DataFrame,
                                equipo_home: str, 
                                equipo_away: str, 
                                liga: str,
-                               fecha_partido: Optional[date] = None) -> Dict:
+                               fecha_partido: Optional[date] = None,
+                               store: Optional[FeatureStore] = None) -> Dict:
     """
     Calcula TODAS las reglas dinámicamente para un partido futuro.
     
@@ -327,6 +337,8 @@ def calcular_reglas_dinamicas(df: pd.DataFrame,
         Código de la liga
     fecha_partido : date, optional
         Fecha del partido (default: HOY para predicciones futuras)
+    store : FeatureStore, optional
+        Store ya construido (default: el del histórico `df`, creado una vez por proceso)
         
     Returns:
     --------
@@ -345,18 +357,15 @@ def calcular_reglas_dinamicas(df: pd.DataFrame,
     print(f"   Liga: {liga}")
     print(f"   Hasta fecha: {hasta_fecha}")
     
-    # REGLA 1: Últimos 8 total
-    home_8 = calcular_ultimos_8_liga(df, equipo_home, liga, hasta_fecha)
-    away_8 = calcular_ultimos_8_liga(df, equipo_away, liga, hasta_fecha)
-    
-    # REGLA 2: Últimos 5 local
-    home_5_local = calcular_ultimos_5_local(df, equipo_home, liga, hasta_fecha)
-    
-    # REGLA 3: Últimos 5 visitante
-    away_5_visitante = calcular_ultimos_5_visitante(df, equipo_away, liga, hasta_fecha)
-    
-    # REGLA 4: H2H últimos 5
-    h2h = calcular_h2h_ultimos_5(df, equipo_home, equipo_away, hasta_fecha)
+    # REGLAS 1-4: lectura as-of del feature store (mismas tablas que el entrenamiento)
+    if store is None:
+        store = get_feature_store(df)
+    reglas_store = store.reglas(equipo_home, equipo_away, liga, hasta_fecha)
+    home_8 = reglas_store['ultimos_8_total']['home']
+    away_8 = reglas_store['ultimos_8_total']['away']
+    home_5_local = reglas_store['ultimos_5_local']
+    away_5_visitante = reglas_store['ultimos_5_visitante']
+    h2h = reglas_store['ultimos_5_h2h']
     
     # REGLA 5: Bajas (Integrado con FPL API)
     try:
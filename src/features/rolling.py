@@ -1,12 +1,114 @@
+"""
+ROLLING PREVIO AL PARTIDO
+=========================
+
+Kernel único para estadísticas rolling por equipo: agrupa una vez y, por
+columna, acumula los desfases 1..w (partidos previos del equipo) reutilizando
+la suma de la ventana menor para la mayor; sum/mean/std de todas las ventanas
+salen de una sola pasada (std en dos pasos, numéricamente estable).
+
+Las ventanas están desplazadas por construcción: la fila de un partido solo
+ve los partidos ANTERIORES del equipo (nunca el propio resultado).
+
+Uso:
+    from src.features.rolling import shifted_rolling
+    stats = shifted_rolling(df['HomeTeam'], {'gf': df['FTHG']}, windows=[5, 10], stats=('sum', 'mean'))
+    df['Home_GF_roll5'] = stats[('gf', 'sum', 5)]
+"""
+
+import numpy as np
 import pandas as pd
+from typing import Dict, Iterable, Optional, Tuple, Union
+
+STATS = ('sum', 'mean', 'std')
+
+
+def shifted_rolling(keys, values: Dict[str, object], windows: Iterable[int], stats: Iterable[str] = ('mean',),
+                    min_periods: Union[Optional[int], Dict[str, Optional[int]]] = 1) -> Dict[Tuple[str, str, int], np.ndarray]:
+    """
+    Estadísticas de los `window` partidos previos del mismo grupo `keys`, en el
+    orden de filas recibido (ordenar por fecha antes de llamar).
+
+    Parameters:
+    -----------
+    keys : array-like
+        Equipo de cada fila (filas con NaN no pertenecen a ningún grupo -> NaN)
+    values : dict
+        nombre -> columna numérica (los NaN se ignoran, como en pandas)
+    windows : lista de int
+        Ventanas en partidos
+    stats : lista
+        Subconjunto de 'sum', 'mean', 'std' (std con ddof=1, NaN con < 2 valores)
+    min_periods : int, None o dict nombre -> int/None
+        Valores no-NaN necesarios en la ventana; None = la ventana completa
+
+    Returns:
+    --------
+    dict (nombre, stat, ventana) -> array alineado con las filas de entrada
+    """
+    stats = tuple(stats)
+    unknown = set(stats) - set(STATS)
+    if unknown:
+        raise ValueError(f"Estadísticas no soportadas: {sorted(unknown)}")
+
+    codes = pd.factorize(pd.Series(np.asarray(keys, dtype=object)))[0]
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    n = len(order)
+    idx = np.arange(n)
+    first = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if n else np.zeros(0, bool)
+    start = np.maximum.accumulate(np.where(first, idx, 0)) if n else idx
+    no_group = sorted_codes < 0
+
+    out = {}
+    for name, col in values.items():
+        mp = min_periods.get(name, 1) if isinstance(min_periods, dict) else min_periods
+        v = np.asarray(col, dtype=float)[order]
+        ok = ~np.isnan(v)
+        # desfase k = k-ésimo partido anterior del grupo (None fuera del grupo)
+        lags = {}
+        for k in range(1, max(windows, default=0) + 1):
+            src = idx - k
+            inside = (src >= start) & ok[np.maximum(src, 0)]
+            lags[k] = (np.maximum(src, 0), inside)
+        total = np.zeros(n)
+        count = np.zeros(n, dtype=np.int64)
+        k = 0
+        for w in sorted(set(windows)):
+            # suma exacta por desfases (del más reciente al más antiguo): no depende
+            # de las filas de otros equipos, a diferencia de las sumas acumuladas
+            while k < w:
+                k += 1
+                src, inside = lags[k]
+                total = total + np.where(inside, v[src], 0.0)
+                count = count + inside
+            valid = (count >= (w if mp is None else mp)) & ~no_group
+            with np.errstate(invalid='ignore', divide='ignore'):
+                mean = total / count
+                for stat in stats:
+                    if stat == 'sum':
+                        res = total
+                    elif stat == 'mean':
+                        res = mean
+                    else:
+                        sq = np.zeros(n)
+                        for j in range(1, w + 1):
+                            src, inside = lags[j]
+                            sq += np.where(inside, v[src] - mean, 0.0) ** 2
+                        res = np.where(count >= 2, np.sqrt(sq / (count - 1)), np.nan)
+                    res = np.where(valid, res, np.nan)
+                    aligned = np.empty(n)
+                    aligned[order] = res
+                    out[(name, stat, w)] = aligned
+    return out
+
 
 def add_form(df, window=5):
+    """Goles a favor / en contra / diferencia en los `window` partidos previos en la misma condición."""
     df = df.sort_values('Date').copy()
-    def team_roll(team_col, gf_col, ga_col, prefix):
-        grp = df.groupby(team_col)
-        df[f'{prefix}_GF_roll{window}'] = grp[gf_col].rolling(window).sum().reset_index(level=0, drop=True)
-        df[f'{prefix}_GA_roll{window}'] = grp[ga_col].rolling(window).sum().reset_index(level=0, drop=True)
-        df[f'{prefix}_GD_roll{window}'] = grp.apply(lambda g: (g[gf_col]-g[ga_col]).rolling(window).sum()).reset_index(level=0, drop=True)
-    team_roll('HomeTeam', 'FTHG', 'FTAG', 'Home')
-    team_roll('AwayTeam', 'FTAG', 'FTHG', 'Away')
+    hg = df['FTHG'].to_numpy(dtype=float); ag = df['FTAG'].to_numpy(dtype=float)
+    for team_col, gf, ga, prefix in (('HomeTeam', hg, ag, 'Home'), ('AwayTeam', ag, hg, 'Away')):
+        stats = shifted_rolling(df[team_col], {'GF': gf, 'GA': ga, 'GD': gf - ga}, [window], ('sum',), min_periods=None)
+        for s in ('GF', 'GA', 'GD'):
+            df[f'{prefix}_{s}_roll{window}'] = stats[(s, 'sum', window)]
     return df
@@ -0,0 +1,138 @@
+"""
+CLASIFICACIÓN INCREMENTAL (AS-OF)
+=================================
+
+Reproduce los resultados en orden de fecha por liga y temporada, manteniendo
+puntos, goles y diferencia de goles en arrays, y toma una foto de la tabla
+ANTES de cada jornada (fecha): la posición de un partido solo usa resultados
+de fechas anteriores.
+
+Desempates: puntos, diferencia de goles, goles a favor y nombre.
+Un equipo que aún no ha jugado en la temporada tiene posición 0.
+
+Uso:
+    from src.features.standings import StandingsEngine
+    engine = StandingsEngine().fit(df)
+    pos = engine.match_positions()          # home/away_table_position por fila de df
+    tabla = engine.current_table('E0')      # tabla actual (última temporada)
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Optional, Tuple
+
+TABLE_COLUMNS = ['position', 'team', 'played', 'won', 'drawn', 'lost', 'gf', 'ga', 'gd', 'points']
+
+
+def season_of(dates: pd.Series) -> np.ndarray:
+    """Año de inicio de la temporada (julio-junio): 2024-08-16 -> 2024, 2025-03-01 -> 2024."""
+    d = pd.to_datetime(dates)
+    return np.where(d.dt.month >= 7, d.dt.year, d.dt.year - 1).astype(np.int32)
+
+
+class StandingsEngine:
+    """
+    Motor de clasificación por liga-temporada en una sola pasada.
+
+    Parameters:
+    -----------
+    points : tuple
+        Puntos por victoria, empate y derrota (default: 3, 1, 0)
+    """
+
+    def __init__(self, points: Tuple[int, int, int] = (3, 1, 0)):
+        self.points = points
+        self.tables: Dict[Tuple[str, int], pd.DataFrame] = {}
+        self._positions: Optional[pd.DataFrame] = None
+
+    @staticmethod
+    def _rank(pts, gd, gf, name_rank) -> np.ndarray:
+        """Posición 1..k por puntos, DG, GF y nombre."""
+        order = np.lexsort((name_rank, -gf, -gd, -pts))
+        pos = np.empty(len(order), dtype=np.int32)
+        pos[order] = np.arange(1, len(order) + 1)
+        return pos
+
+    def fit(self, df: pd.DataFrame, home: str = 'HomeTeam', away: str = 'AwayTeam',
+            hg: str = 'FTHG', ag: str = 'FTAG', league: str = 'League') -> 'StandingsEngine':
+        """
+        Recorre todos los partidos una vez. Guarda la posición previa de cada
+        partido (alineada con df.index) y la tabla final de cada liga-temporada.
+        """
+        w_pts, d_pts, l_pts = self.points
+        n = len(df)
+        home_pos = np.zeros(n, dtype=np.int32)
+        away_pos = np.zeros(n, dtype=np.int32)
+        home_pts_before = np.zeros(n, dtype=np.int32)
+        away_pts_before = np.zeros(n, dtype=np.int32)
+
+        dates = pd.to_datetime(df['Date']).to_numpy()
+        leagues = df[league].astype(str).to_numpy() if league in df.columns else np.full(n, '')
+        seasons = season_of(df['Date'])
+        hg_v = df[hg].to_numpy(); ag_v = df[ag].to_numpy()
+        played_mask = ~(pd.isna(hg_v) | pd.isna(ag_v))
+
+        groups = pd.DataFrame({'league': leagues, 'season': seasons}).groupby(['league', 'season'], sort=False).indices
+        for (lg, season), rows in groups.items():
+            rows = rows[np.argsort(dates[rows], kind='stable')]
+            teams, codes = np.unique(np.concatenate([df[home].to_numpy()[rows].astype(str),
+                                                     df[away].to_numpy()[rows].astype(str)]), return_inverse=True)
+            h = codes[:len(rows)]; a = codes[len(rows):]
+            k = len(teams)
+            name_rank = np.arange(k)        # np.unique ya ordena por nombre
+            pts = np.zeros(k, np.int32); gf = np.zeros(k, np.int32); ga = np.zeros(k, np.int32)
+            played = np.zeros(k, np.int32); won = np.zeros(k, np.int32); drawn = np.zeros(k, np.int32)
+
+            # Jornadas = fechas distintas (los partidos de una misma fecha no se ven entre sí)
+            day_dates = dates[rows]
+            bounds = np.flatnonzero(np.r_[True, day_dates[1:] != day_dates[:-1], True])
+            for s, e in zip(bounds[:-1], bounds[1:]):
+                pos = self._rank(pts, gf - ga, gf, name_rank)
+                pos = np.where(played > 0, pos, 0)
+                idx = rows[s:e]; hh = h[s:e]; aa = a[s:e]
+                home_pos[idx] = pos[hh]; away_pos[idx] = pos[aa]
+                home_pts_before[idx] = pts[hh]; away_pts_before[idx] = pts[aa]
+
+                ok = played_mask[idx]
+                hh, aa = hh[ok], aa[ok]
+                g_h = hg_v[idx][ok].astype(np.int32); g_a = ag_v[idx][ok].astype(np.int32)
+                hw = g_h > g_a; dr = g_h == g_a; aw = g_h < g_a
+                np.add.at(pts, hh, np.where(hw, w_pts, np.where(dr, d_pts, l_pts)))
+                np.add.at(pts, aa, np.where(aw, w_pts, np.where(dr, d_pts, l_pts)))
+                np.add.at(gf, hh, g_h); np.add.at(ga, hh, g_a)
+                np.add.at(gf, aa, g_a); np.add.at(ga, aa, g_h)
+                np.add.at(played, hh, 1); np.add.at(played, aa, 1)
+                np.add.at(won, hh, hw); np.add.at(won, aa, aw)
+                np.add.at(drawn, hh, dr); np.add.at(drawn, aa, dr)
+
+            table = pd.DataFrame({'team': teams, 'played': played, 'won': won, 'drawn': drawn,
+                                  'lost': played - won - drawn, 'gf': gf, 'ga': ga, 'gd': gf - ga, 'points': pts})
+            table['position'] = self._rank(pts, gf - ga, gf, name_rank)
+            self.tables[(lg, int(season))] = table.sort_values('position')[TABLE_COLUMNS].reset_index(drop=True)
+
+        self._positions = pd.DataFrame({
+            'home_table_position': home_pos, 'away_table_position': away_pos,
+            'home_points_before': home_pts_before, 'away_points_before': away_pts_before,
+        }, index=df.index)
+        return self
+
+    def match_positions(self) -> pd.DataFrame:
+        """Posición y puntos de cada equipo antes del partido (alineado con el df de fit)."""
+        if self._positions is None:
+            raise RuntimeError("Llama a fit() antes de match_positions()")
+        return self._positions
+
+    def current_table(self, league: str, season: Optional[int] = None) -> pd.DataFrame:
+        """Tabla tras el último partido registrado (por defecto, la temporada más reciente de la liga)."""
+        if season is None:
+            seasons = [s for (lg, s) in self.tables if lg == league]
+            if not seasons:
+                return pd.DataFrame(columns=TABLE_COLUMNS)
+            season = max(seasons)
+        return self.tables.get((league, int(season)), pd.DataFrame(columns=TABLE_COLUMNS))
+
+    def position_of(self, league: str, team: str, season: Optional[int] = None) -> int:
+        """Posición actual de un equipo (0 si no aparece), para partidos próximos."""
+        table = self.current_table(league, season)
+        hit = table.loc[table['team'] == team, 'position']
+        return int(hit.iloc[0]) if len(hit) else 0
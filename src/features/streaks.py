@@ -0,0 +1,127 @@
+"""
+RACHAS (STREAKS) VECTORIZADAS
+=============================
+
+Longitudes de racha por equipo con run-length encoding por grupos, sin bucles
+por equipo ni accesos escalares a pandas.
+
+Las rachas se definen como condiciones sobre (goles a favor, goles en contra)
+en STREAK_DEFINITIONS; se pueden añadir definiciones propias pasando un dict
+nombre -> función(gf, ga) -> array booleano.
+
+Vistas:
+- 'home': solo partidos de local del equipo (HomeTeam)
+- 'away': solo partidos de visitante (AwayTeam)
+- 'all' : todos los partidos del equipo (línea temporal local + visitante)
+
+Uso:
+    from src.features.streaks import add_streak_features
+    df = add_streak_features(df, definitions=['win', 'unbeaten'], venues=['home', 'all'])
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Callable, Dict, Iterable, Union
+
+from src.features.team_timeline import TeamTimeline, run_lengths
+
+STREAK_DEFINITIONS: Dict[str, Callable] = {
+    'win': lambda gf, ga: gf > ga,
+    'draw': lambda gf, ga: gf == ga,
+    'loss': lambda gf, ga: gf < ga,
+    'unbeaten': lambda gf, ga: gf >= ga,
+    'winless': lambda gf, ga: gf <= ga,
+    'scoring': lambda gf, ga: gf > 0,
+    'clean_sheet': lambda gf, ga: ga == 0,
+}
+
+VENUE_COLUMNS = {
+    'home': ('HomeTeam', 'FTHG', 'FTAG', 'Home'),
+    'away': ('AwayTeam', 'FTAG', 'FTHG', 'Away'),
+}
+
+
+def grouped_run_lengths(keys, flag: np.ndarray, previous: bool = False) -> np.ndarray:
+    """
+    Longitud del tramo de `flag` consecutivos que termina en cada fila (incluida),
+    contando solo filas del mismo grupo `keys` en el orden en que aparecen.
+    Con previous=True devuelve el tramo que termina en la fila anterior del grupo.
+    Las filas sin clave (NaN) no pertenecen a ningún grupo y valen 0.
+    """
+    codes = pd.factorize(pd.Series(keys).astype(object))[0]
+    order = np.argsort(codes, kind='stable')
+    sorted_codes = codes[order]
+    first = np.r_[True, sorted_codes[1:] != sorted_codes[:-1]] if len(order) else np.zeros(0, bool)
+    runs = run_lengths(np.asarray(flag, bool)[order] & (sorted_codes >= 0), first)
+    if previous:
+        runs = np.where(first, 0, np.r_[0, runs[:-1]])
+    out = np.empty(len(order), dtype=np.int64)
+    out[order] = runs
+    return out
+
+
+def _resolve(definitions) -> Dict[str, Callable]:
+    if isinstance(definitions, dict):
+        return definitions
+    return {name: STREAK_DEFINITIONS[name] for name in definitions}
+
+
+def venue_streak(df: pd.DataFrame, venue: str, condition: Union[str, Callable],
+                 include_current: bool = True) -> np.ndarray:
+    """
+    Racha de un tipo para el equipo local ('home') o visitante ('away') contando
+    solo sus partidos en esa condición, en el orden de filas de df.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos (el orden de filas define la secuencia)
+    venue : str
+        'home' o 'away'
+    condition : str o callable
+        Nombre en STREAK_DEFINITIONS o función(gf, ga) -> bool
+    include_current : bool
+        Si True la racha incluye el resultado de la propia fila; si False es la
+        racha previa al partido (sin fuga de información)
+    """
+    team_col, gf_col, ga_col, _ = VENUE_COLUMNS[venue]
+    cond = STREAK_DEFINITIONS[condition] if isinstance(condition, str) else condition
+    flag = np.asarray(cond(df[gf_col].to_numpy(dtype=float), df[ga_col].to_numpy(dtype=float)), bool)
+    return grouped_run_lengths(df[team_col].to_numpy(), flag, previous=not include_current)
+
+
+def add_streak_features(df: pd.DataFrame, definitions: Union[Iterable[str], Dict[str, Callable]] = ('win', 'unbeaten', 'scoring'),
+                        venues: Iterable[str] = ('home', 'away', 'all'), include_current: bool = False) -> pd.DataFrame:
+    """
+    Añade columnas de longitud de racha por definición y vista.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos ordenados por fecha
+    definitions : lista de nombres o dict nombre -> función(gf, ga)
+        Tipos de racha (default: win, unbeaten, scoring)
+    venues : lista
+        'home' (local en casa), 'away' (visitante fuera), 'all' (ambos equipos, todos sus partidos)
+    include_current : bool
+        Incluir el resultado del propio partido (default: False, racha previa)
+
+    Returns:
+    --------
+    df : pd.DataFrame
+        Columnas Home_<def>_streak_home, Away_<def>_streak_away,
+        Home_<def>_streak_all y Away_<def>_streak_all según las vistas
+    """
+    df = df.copy()
+    defs = _resolve(definitions)
+    timeline = TeamTimeline(df) if 'all' in venues else None
+    for name, cond in defs.items():
+        for venue in venues:
+            if venue == 'all':
+                flag = np.asarray(cond(timeline.gf, timeline.ga), bool)
+                runs = run_lengths(flag, timeline.first) if include_current else timeline.prev_run_length(flag)
+                df[f'Home_{name}_streak_all'], df[f'Away_{name}_streak_all'] = timeline.to_matches(runs)
+            else:
+                prefix = VENUE_COLUMNS[venue][3]
+                df[f'{prefix}_{name}_streak_{venue}'] = venue_streak(df, venue, cond, include_current)
+    return df
@@ -0,0 +1,116 @@
+"""
+LÍNEA TEMPORAL POR EQUIPO
+=========================
+
+Apila cada partido dos veces (una por equipo) y ordena por (equipo, fecha).
+Sobre esa línea temporal las features "antes del partido" son operaciones de
+array lineales:
+
+- conteos en ventanas de días con `searchsorted` sobre fechas ordenadas
+- sumas de los N partidos previos con sumas acumuladas por equipo
+- rachas con run-length encoding (longitud del tramo consecutivo previo)
+
+Uso:
+    from src.features.team_timeline import TeamTimeline
+    tl = TeamTimeline(df)
+    home_7d, away_7d = tl.to_matches(tl.count_in_window(7))
+    home_winless, away_winless = tl.to_matches(tl.prev_run_length(tl.result < 1))
+"""
+
+import numpy as np
+import pandas as pd
+
+from src.utils.entity_ids import team_codes
+
+_SECONDS_PER_DAY = 86400
+
+
+def run_lengths(flag: np.ndarray, group_start: np.ndarray) -> np.ndarray:
+    """
+    Longitud del tramo de True consecutivos que termina en cada posición (0 si
+    la posición es False). Los tramos se cortan al empezar un grupo nuevo.
+    """
+    n = len(flag)
+    idx = np.arange(n)
+    barrier = np.where(~flag, idx, -1)
+    barrier = np.maximum(barrier, np.where(group_start, idx - 1, -1))
+    last_break = np.maximum.accumulate(barrier) if n else barrier
+    return np.where(flag, idx - last_break, 0)
+
+
+class TeamTimeline:
+    """
+    Partidos apilados por equipo en orden cronológico.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Partidos con Date, HomeTeam, AwayTeam, FTHG, FTAG
+
+    Atributos (arrays de longitud 2 * len(df), orden equipo-fecha):
+    ---------------------------------------------------------------
+    row : posición del partido en df
+    team : id entero del equipo
+    is_home : True si el equipo jugaba de local
+    gf, ga : goles a favor / en contra
+    result : 1 victoria, 0 empate, -1 derrota
+    first : True en el primer partido de cada equipo
+    """
+
+    def __init__(self, df: pd.DataFrame, home: str = 'HomeTeam', away: str = 'AwayTeam',
+                 hg: str = 'FTHG', ag: str = 'FTAG'):
+        n = len(df)
+        self.n_matches = n
+        h_ids, a_ids = team_codes(df, home, away)
+        seconds = pd.to_datetime(df['Date']).to_numpy().astype('datetime64[s]').astype(np.int64)
+        hg_v = df[hg].to_numpy(dtype=float); ag_v = df[ag].to_numpy(dtype=float)
+
+        team = np.concatenate([h_ids, a_ids]).astype(np.int64)
+        secs = np.concatenate([seconds, seconds])
+        rows = np.concatenate([np.arange(n), np.arange(n)])
+        order = np.lexsort((rows, secs, team))
+
+        self.row = rows[order]
+        self.team = team[order]
+        self.seconds = secs[order]
+        self.is_home = np.concatenate([np.ones(n, bool), np.zeros(n, bool)])[order]
+        self.gf = np.concatenate([hg_v, ag_v])[order]
+        self.ga = np.concatenate([ag_v, hg_v])[order]
+        self.result = np.sign(self.gf - self.ga)     # NaN si el partido no tiene resultado
+        self.first = np.r_[True, self.team[1:] != self.team[:-1]] if len(order) else np.zeros(0, bool)
+        # clave monótona (equipo, instante) para búsquedas binarias globales
+        self._key = self.team * (10 ** 11) + self.seconds
+
+    # ------------------------------------------------------------------
+    def to_matches(self, values: np.ndarray):
+        """Reparte un array de la línea temporal en (valor local, valor visitante) por fila de df."""
+        home = np.empty(self.n_matches, dtype=np.asarray(values).dtype)
+        away = np.empty(self.n_matches, dtype=home.dtype)
+        home[self.row[self.is_home]] = values[self.is_home]
+        away[self.row[~self.is_home]] = values[~self.is_home]
+        return home, away
+
+    def count_in_window(self, days: float) -> np.ndarray:
+        """Partidos del equipo con fecha en [fecha - days, fecha) (estrictamente anteriores)."""
+        lo = np.searchsorted(self._key, self._key - int(days * _SECONDS_PER_DAY), side='left')
+        hi = np.searchsorted(self._key, self._key, side='left')
+        return hi - lo
+
+    def days_since_previous(self) -> np.ndarray:
+        """Días desde el partido anterior del equipo (NaN en su primer partido)."""
+        gap = np.r_[np.nan, np.diff(self.seconds) / _SECONDS_PER_DAY]
+        return np.where(self.first, np.nan, gap)
+
+    def prev_sum(self, values: np.ndarray, window: int) -> np.ndarray:
+        """Suma de `values` en los `window` partidos anteriores del equipo (sin el actual)."""
+        v = np.nan_to_num(np.asarray(values, dtype=float))
+        cs = np.r_[0.0, np.cumsum(v)]
+        idx = np.arange(len(v))
+        start = np.maximum.accumulate(np.where(self.first, idx, 0))     # primer índice del equipo
+        lo = np.maximum(idx - window, start)
+        return cs[idx] - cs[lo]
+
+    def prev_run_length(self, flag: np.ndarray) -> np.ndarray:
+        """Longitud del tramo consecutivo de `flag` que termina en el partido anterior del equipo."""
+        runs = run_lengths(np.asarray(flag, bool), self.first)
+        return np.where(self.first, 0, np.r_[0, runs[:-1]])
@@ -10,6 +10,36 @@ import pandas as pd
 from sklearn.isotonic import IsotonicRegression
 
 
+OUTCOMES = ['H', 'D', 'A']
+
+
+def calibrate_1x2(P, xs, ys):
+    """
+    Kernel fusionado de calibración: interpolación lineal por tramos sobre
+    las tablas de breakpoints (equivalente a IsotonicRegression.transform con
+    out_of_bounds='clip') y renormalización por fila, todo sobre un array (N,3).
+    
+    Parameters:
+    -----------
+    P : np.ndarray
+        Probabilidades (N,3) sin calibrar
+    xs, ys : sequence of np.ndarray
+        Breakpoints (X_thresholds_, y_thresholds_) de cada outcome
+    
+    Returns:
+    --------
+    out : np.ndarray
+        Probabilidades (N,3) calibradas y normalizadas
+    """
+    P = np.asarray(P, dtype=float).reshape(-1, 3)
+    out = np.empty_like(P)
+    for k in range(3):
+        out[:, k] = np.interp(P[:, k], xs[k], ys[k])
+    s = out.sum(axis=1, keepdims=True)
+    np.divide(out, s, out=out, where=s > 0)
+    return out
+
+
 class ProbabilityCalibrator:
     """
     Calibra probabilidades de modelos 1X2 usando regresión isotónica.
@@ -30,6 +60,9 @@ class ProbabilityCalibrator:
             'D': IsotonicRegression(out_of_bounds='clip', y_min=0.0, y_max=1.0),
             'A': IsotonicRegression(out_of_bounds='clip', y_min=0.0, y_max=1.0)
         }
+        # Tablas compactas de breakpoints (una por outcome) usadas por transform
+        self.xs_ = None
+        self.ys_ = None
         self.is_fitted = False
     
     def fit(self, y_true, probs_df):
@@ -69,9 +102,48 @@ class ProbabilityCalibrator:
             # Entrenar calibrador isotónico
             self.calibrators[outcome].fit(p_pred, y_binary)
         
+        self.xs_ = [self.calibrators[o].X_thresholds_.astype(float) for o in OUTCOMES]
+        self.ys_ = [self.calibrators[o].y_thresholds_.astype(float) for o in OUTCOMES]
         self.is_fitted = True
         return self
     
+    def transform_array(self, P):
+        """
+        Camino rápido: calibra un array (N,3) [pH, pD, pA] y retorna un array (N,3).
+        
+        No construye DataFrames ni llama a sklearn; el coste es un np.interp por outcome.
+        """
+        if not self.is_fitted:
+            raise ValueError("Calibrador no ha sido entrenado. Llama a fit() primero.")
+        return calibrate_1x2(P, self.xs_, self.ys_)
+    
+    def to_arrays(self):
+        """
+        Exporta el calibrador como arrays de breakpoints (serializable junto al modelo,
+        p.ej. con np.savez o pickle).
+        
+        Returns:
+        --------
+        tables : dict
+            {'x_H', 'y_H', 'x_D', 'y_D', 'x_A', 'y_A'} -> np.ndarray
+        """
+        if not self.is_fitted:
+            raise ValueError("Calibrador no ha sido entrenado. Llama a fit() primero.")
+        tables = {}
+        for k, o in enumerate(OUTCOMES):
+            tables[f'x_{o}'] = self.xs_[k]
+            tables[f'y_{o}'] = self.ys_[k]
+        return tables
+    
+    @classmethod
+    def from_arrays(cls, tables):
+        """Reconstruye un calibrador (sólo transform) desde la salida de to_arrays()."""
+        cal = cls()
+        cal.xs_ = [np.asarray(tables[f'x_{o}'], dtype=float) for o in OUTCOMES]
+        cal.ys_ = [np.asarray(tables[f'y_{o}'], dtype=float) for o in OUTCOMES]
+        cal.is_fitted = True
+        return cal
+    
     def transform(self, probs_df):
         """
         Aplica calibración a probabilidades nuevas.
@@ -86,29 +158,13 @@ class ProbabilityCalibrator:
         calibrated_df : pd.DataFrame
             DataFrame con probabilidades calibradas y normalizadas
         """
-        if not self.is_fitted:
-            raise ValueError("Calibrador no ha sido entrenado. Llama a fit() primero.")
-        
-        # Convertir a DataFrame si es necesario
-        if not isinstance(probs_df, pd.DataFrame):
-            probs_df = pd.DataFrame(probs_df, columns=['pH', 'pD', 'pA'])
-        
-        calibrated = {}
-        
-        # Aplicar calibración a cada outcome
-        for outcome in ['H', 'D', 'A']:
-            p_pred = probs_df[f'p{outcome}'].values
-            calibrated[f'p{outcome}'] = self.calibrators[outcome].transform(p_pred)
+        if isinstance(probs_df, pd.DataFrame):
+            P = probs_df[['pH', 'pD', 'pA']].to_numpy(dtype=float)
+        else:
+            P = np.asarray(probs_df, dtype=float)
         
-        # Convertir a DataFrame
-        calibrated_df = pd.DataFrame(calibrated)
-        
-        # Renormalizar para que sumen 1.0
-        row_sums = calibrated_df.sum(axis=1)
-        for col in calibrated_df.columns:
-            calibrated_df[col] = calibrated_df[col] / row_sums
-        
-        return calibrated_df
+        # Interpolación + renormalización en un solo kernel
+        return pd.DataFrame(self.transform_array(P), columns=['pH', 'pD', 'pA'])
     
     def fit_transform(self, y_true, probs_df):
         """
@@ -175,24 +231,14 @@ class BlendCalibrator:
         blended : pd.DataFrame
             Probabilidades combinadas y normalizadas
         """
-        blended = {}
-        
-        for outcome in ['H', 'D', 'A']:
-            p_model = probs_model[f'p{outcome}'].values
-            p_market = probs_market[f'p{outcome}_mkt'].values
-            
-            # Blend: alpha*modelo + (1-alpha)*mercado
-            blended[f'p{outcome}'] = self.alpha * p_model + (1 - self.alpha) * p_market
-        
-        # Convertir a DataFrame
-        blended_df = pd.DataFrame(blended)
+        p_model = probs_model[['pH', 'pD', 'pA']].to_numpy(dtype=float)
+        p_market = probs_market[['pH_mkt', 'pD_mkt', 'pA_mkt']].to_numpy(dtype=float)
         
-        # Renormalizar
-        row_sums = blended_df.sum(axis=1)
-        for col in blended_df.columns:
-            blended_df[col] = blended_df[col] / row_sums
+        # Blend: alpha*modelo + (1-alpha)*mercado, renormalizado por fila
+        blended = self.alpha * p_model + (1 - self.alpha) * p_market
+        blended /= blended.sum(axis=1, keepdims=True)
         
-        return blended_df
+        return pd.DataFrame(blended, columns=['pH', 'pD', 'pA'])
 
 
 def evaluate_calibration(y_true, probs_df, n_bins=10):
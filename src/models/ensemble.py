@@ -1,20 +1,71 @@
 import numpy as np
 import pandas as pd
 from sklearn.linear_model import LogisticRegression
+from sklearn.isotonic import IsotonicRegression
+from src.models.calibration import calibrate_1x2
 
 def logit(p):
     p = np.clip(p, 1e-6, 1-1e-6)
     return np.log(p/(1-p))
 
+def _as_probs(p) -> np.ndarray:
+    if isinstance(p, pd.DataFrame):
+        p = p.to_numpy(dtype=float)
+    return np.ascontiguousarray(p, dtype=float).reshape(-1, 3)
+
+def blend_design(p_model, p_mkt) -> np.ndarray:
+    """Matriz (N,6) contigua: logit del modelo | logit del mercado."""
+    X = np.empty((len(p_model), 6))
+    X[:, :3] = _as_probs(p_model); X[:, 3:] = _as_probs(p_mkt)
+    return logit(X)
+
 def fit_blender(p_model: pd.DataFrame, p_mkt: pd.DataFrame, y):
-    X = pd.concat([p_model.add_prefix('m_').apply(logit),
-                   p_mkt.add_prefix('mk_').apply(logit)], axis=1)
-    lr = LogisticRegression(max_iter=200, multi_class='multinomial')
-    lr.fit(X, y)
+    lr = LogisticRegression(max_iter=200)
+    lr.fit(blend_design(p_model, p_mkt), np.asarray(y))
     return lr
 
 def predict_blend(lr, p_model: pd.DataFrame, p_mkt: pd.DataFrame):
-    X = pd.concat([p_model.add_prefix('m_').apply(logit),
-                   p_mkt.add_prefix('mk_').apply(logit)], axis=1)
-    proba = lr.predict_proba(X)
+    proba = lr.predict_proba(blend_design(p_model, p_mkt))
     return pd.DataFrame(proba, columns=['pH','pD','pA'])
+
+
+class BlendPipeline:
+    """
+    Pipeline apilado logit-blend -> LR multinomial -> isotónica por clase,
+    todo sobre arrays (N,3) contiguos de modelo y mercado.
+
+    fit(P_model, P_mkt, y) entrena el blender y, sobre sus propias salidas,
+    los calibradores por clase (tablas de breakpoints + kernel calibrate_1x2).
+    transform() devuelve BLEND y CALIBRATED en una sola llamada.
+    """
+
+    def __init__(self, max_iter: int = 200, calibrate: bool = True):
+        self.max_iter = max_iter
+        self.calibrate = calibrate
+        self.lr_ = None
+        self.xs_ = None
+        self.ys_ = None
+
+    def fit(self, p_model, p_mkt, y):
+        y = np.asarray(y)
+        self.lr_ = LogisticRegression(max_iter=self.max_iter)
+        self.lr_.fit(blend_design(p_model, p_mkt), y)
+        if self.calibrate:
+            p_bl = self.predict_blend(p_model, p_mkt)
+            self.xs_, self.ys_ = [], []
+            for k in range(3):
+                ir = IsotonicRegression(out_of_bounds='clip').fit(p_bl[:, k], (y == k).astype(float))
+                self.xs_.append(ir.X_thresholds_.astype(float)); self.ys_.append(ir.y_thresholds_.astype(float))
+        return self
+
+    def predict_blend(self, p_model, p_mkt) -> np.ndarray:
+        return self.lr_.predict_proba(blend_design(p_model, p_mkt))
+
+    def transform(self, p_model, p_mkt):
+        """Retorna (p_blend, p_calibrated) como arrays (N,3)."""
+        p_bl = self.predict_blend(p_model, p_mkt)
+        p_cal = calibrate_1x2(p_bl, self.xs_, self.ys_) if self.xs_ is not None else p_bl
+        return p_bl, p_cal
+
+    def predict(self, p_model, p_mkt) -> np.ndarray:
+        return self.transform(p_model, p_mkt)[1]
@@ -0,0 +1,150 @@
+"""
+Matrices de features compactas (float32) para entrenamiento y predicción.
+
+Un FeatureMatrix es un bloque float32 C-contiguo (filas contiguas) con un
+esquema de columnas fijo, construido una vez por versión del dataset:
+
+- los folds de entrenamiento/test son vistas de filas (sin copia si el rango
+  es contiguo, como en walk-forward)
+- fits y predicciones sobre el mismo DataFrame reutilizan el mismo buffer
+- sklearn y XGBoost lo consumen directamente (`__array__` y `columns`), y
+  como ya es float32 no hacen la conversión que harían desde float64
+
+Uso:
+    from src.models.feature_matrix import feature_matrix
+    X = feature_matrix(df, ['EloHome', 'EloAway'], derived={'elo_diff': lambda d: d['EloHome'] - d['EloAway']})
+    model.fit(X.rows(slice(0, 1000)), y[:1000])
+    model.predict_proba(X.rows(slice(1000, None)))
+"""
+
+import threading
+import weakref
+from collections import OrderedDict
+from typing import Callable, Dict, Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+DTYPE = np.float32
+_CACHE_SIZE = 8
+
+_matrices: "OrderedDict[tuple, tuple]" = OrderedDict()     # clave -> (weakref(df), matriz)
+_matrices_lock = threading.Lock()
+
+
+class FeatureMatrix:
+    """
+    Bloque (n_filas, n_columnas) float32 de solo lectura con esquema fijo.
+
+    Atributos:
+    ----------
+    values : np.ndarray
+        Datos float32 C-contiguos (vista de solo lectura del buffer)
+    columns : pd.Index
+        Esquema de columnas
+    index : pd.Index
+        Índice de las filas del DataFrame de origen
+    """
+
+    def __init__(self, values: np.ndarray, columns: Iterable[str], index: pd.Index):
+        self.values = values
+        self.columns = pd.Index(list(columns))
+        self.index = index
+
+    @property
+    def shape(self):
+        return self.values.shape
+
+    def __len__(self):
+        return self.values.shape[0]
+
+    def __array__(self, dtype=None, copy=None):
+        if dtype is None or np.dtype(dtype) == self.values.dtype:
+            return self.values.copy() if copy else self.values
+        return self.values.astype(dtype)
+
+    def __getitem__(self, key):
+        # X[filas] (como hace sklearn al indexar folds) o X[filas, columnas]
+        if isinstance(key, tuple):
+            return self.values[key]
+        return self.rows(key)
+
+    def rows(self, rows: Union[slice, np.ndarray]) -> 'FeatureMatrix':
+        """Filas por posición: un slice devuelve una vista; un array de posiciones o máscara, una copia."""
+        return FeatureMatrix(self.values[rows], self.columns, self.index[rows])
+
+    def loc(self, labels) -> 'FeatureMatrix':
+        """Filas de un subconjunto de df por etiquetas de índice (vista si son un rango contiguo)."""
+        pos = self.index.get_indexer(pd.Index(labels))
+        if (pos < 0).any():
+            raise KeyError("Filas que no están en la matriz de features")
+        if len(pos) and np.array_equal(pos, np.arange(pos[0], pos[0] + len(pos))):
+            return self.rows(slice(pos[0], pos[0] + len(pos)))
+        return self.rows(pos)
+
+    def to_frame(self) -> pd.DataFrame:
+        return pd.DataFrame(self.values, columns=self.columns, index=self.index)
+
+
+def build_feature_matrix(df: pd.DataFrame, columns: Iterable[str],
+                         derived: Optional[Dict[str, Callable[[pd.DataFrame], object]]] = None,
+                         fill: Union[None, float, Dict[str, float]] = None) -> FeatureMatrix:
+    """
+    Construye la matriz escribiendo cada columna directamente en el buffer float32.
+
+    Parameters:
+    -----------
+    df : pd.DataFrame
+        Dataset de origen
+    columns : lista
+        Esquema de salida en orden; una columna que no existe en df ni en
+        `derived` (o cuyas entradas faltan) se rellena con `fill` (o NaN)
+    derived : dict, optional
+        nombre -> función(df) -> array para features calculadas
+    fill : float o dict columna -> float, optional
+        Valor para los NaN (None = se conservan, XGBoost los trata como ausentes)
+    """
+    columns = list(columns)
+    derived = derived or {}
+    values = np.empty((len(df), len(columns)), dtype=DTYPE, order='C')
+    for j, col in enumerate(columns):
+        if col in derived:
+            try:
+                data = np.asarray(derived[col](df), dtype=float)
+            except KeyError:        # faltan sus columnas de entrada
+                data = np.nan
+        elif col in df.columns:
+            data = df[col].to_numpy(dtype=float, na_value=np.nan)
+        else:
+            data = np.nan
+        value = fill.get(col) if isinstance(fill, dict) else fill
+        values[:, j] = data
+        if value is not None:
+            np.nan_to_num(values[:, j], copy=False, nan=value)
+    values.flags.writeable = False      # buffer compartido entre fits y predicciones
+    return FeatureMatrix(values, columns, df.index)
+
+
+def feature_matrix(df: pd.DataFrame, columns: Iterable[str],
+                   derived: Optional[Dict[str, Callable[[pd.DataFrame], object]]] = None,
+                   fill: Union[None, float, Dict[str, float]] = None) -> FeatureMatrix:
+    """
+    Como build_feature_matrix, pero construida una vez por versión del dataset y
+    esquema: llamadas repetidas con el mismo DataFrame devuelven el mismo buffer.
+    Las funciones de `derived` se identifican por nombre de columna.
+    """
+    columns = tuple(columns)
+    fill_key = tuple(sorted(fill.items())) if isinstance(fill, dict) else fill
+    version = (id(df), len(df), str(df['Date'].iloc[-1]) if 'Date' in df.columns and len(df) else '')
+    key = version + (columns, tuple(sorted(derived or ())), fill_key)
+    with _matrices_lock:
+        entry = _matrices.get(key)
+        if entry is not None and entry[0]() is df:     # el id pudo reutilizarse tras liberar otro df
+            _matrices.move_to_end(key)
+            return entry[1]
+    matrix = build_feature_matrix(df, columns, derived, fill)
+    with _matrices_lock:
+        _matrices[key] = (weakref.ref(df), matrix)
+        while len(_matrices) > _CACHE_SIZE:
+            _matrices.popitem(last=False)
+    return matrix
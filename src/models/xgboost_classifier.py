@@ -8,7 +8,24 @@ al capturar patrones no-lineales y usar features adicionales.
 import numpy as np
 import pandas as pd
 import xgboost as xgb
-from sklearn.preprocessing import StandardScaler
+
+from src.models.feature_matrix import FeatureMatrix, feature_matrix
+
+
+def _market_probs(df, col):
+    """Probabilidad implícita de las cuotas B365 sin overround."""
+    total = 1.0 / df['B365H'] + 1.0 / df['B365D'] + 1.0 / df['B365A']
+    return (1.0 / df[col]) / total
+
+
+# features calculadas (a nivel de módulo: la caché de matrices las identifica por nombre)
+_DERIVED = {
+    'EloDiff': lambda d: d['EloHome'] - d['EloAway'],
+    'GD_roll5_diff': lambda d: d['Home_GD_roll5'] - d['Away_GD_roll5'],
+    'mkt_pH': lambda d: _market_probs(d, 'B365H'),
+    'mkt_pD': lambda d: _market_probs(d, 'B365D'),
+    'mkt_pA': lambda d: _market_probs(d, 'B365A'),
+}
 
 
 class XGBoost1X2Classifier:
@@ -21,6 +38,10 @@ class XGBoost1X2Classifier:
     - Home/Away strength
     - Head-to-head histórico
     - Gol difference
+    
+    El esquema de columnas se fija en fit(); fit y predict_proba leen una
+    matriz float32 compartida (ver src.models.feature_matrix), así que en
+    walk-forward los folds son vistas de la misma matriz y no copias.
     """
     
     def __init__(self, n_estimators=100, max_depth=5, learning_rate=0.1):
@@ -46,64 +67,79 @@ class XGBoost1X2Classifier:
             use_label_encoder=False,
             eval_metric='mlogloss'
         )
-        self.scaler = StandardScaler()
+        self.feature_names = None
+        self._fill = {}
         self.is_fitted = False
     
-    def _create_features(self, df):
+    def _feature_schema(self, df):
         """
-        Crea features para el modelo.
-        
-        Parameters:
-        -----------
-        df : pd.DataFrame
-            DataFrame con datos de partidos
+        Columnas del modelo según las disponibles en el dataset de entrenamiento.
         
         Returns:
         --------
-        X : np.ndarray
-            Matriz de features
+        columns : list
+            Nombres de columnas en orden
+        fill : dict
+            Valor de relleno de NaN por columna (las demás quedan como ausentes)
         """
-        features = []
+        columns, fill = [], {}
         
         # 1. ELO features
         if 'EloHome' in df.columns and 'EloAway' in df.columns:
-            features.append(df['EloHome'].values)
-            features.append(df['EloAway'].values)
-            features.append((df['EloHome'] - df['EloAway']).values)
+            columns += ['EloHome', 'EloAway', 'EloDiff']
         
         # 2. Form features (rolling últimos 5)
         form_cols = [c for c in df.columns if 'roll5' in c.lower()]
-        for col in form_cols:
-            features.append(df[col].fillna(0).values)
+        columns += form_cols
+        fill.update(dict.fromkeys(form_cols, 0.0))
         
-        # 3. Home advantage implícito
-        if 'EloHome' in df.columns:
-            # Asumimos que hay ventaja de local en el ELO
-            pass
-        
-        # 4. Goal difference reciente
+        # 3. Goal difference reciente
         if 'Home_GD_roll5' in df.columns and 'Away_GD_roll5' in df.columns:
-            features.append((df['Home_GD_roll5'] - df['Away_GD_roll5']).fillna(0).values)
+            columns.append('GD_roll5_diff')
+            fill['GD_roll5_diff'] = 0.0
         
-        # 5. Odds como feature (refleja opinión del mercado)
+        # 4. Odds como feature (probabilidades implícitas, refleja opinión del mercado)
         if 'B365H' in df.columns:
-            # Convertir odds a probabilidades implícitas
-            prob_h = 1.0 / df['B365H'].values
-            prob_d = 1.0 / df['B365D'].values
-            prob_a = 1.0 / df['B365A'].values
-            
-            # Normalizar (quitar overround)
-            total = prob_h + prob_d + prob_a
-            features.append(prob_h / total)
-            features.append(prob_d / total)
-            features.append(prob_a / total)
-        
-        # Combinar todos los features
-        X = np.column_stack(features) if features else np.zeros((len(df), 1))
-        
-        return X
+            columns += ['mkt_pH', 'mkt_pD', 'mkt_pA']
+        
+        return columns, fill
+    
+    def _create_features(self, df, features=None):
+        """
+        Matriz de features con el esquema fijado en fit().
+        
+        Parameters:
+        -----------
+        df : pd.DataFrame o FeatureMatrix
+            DataFrame con datos de partidos
+        features : FeatureMatrix, optional
+            Matriz de un dataset que contiene las filas de df (p. ej. el
+            dataset completo de un walk-forward); se toman sus filas sin copiar
+        
+        Returns:
+        --------
+        X : np.ndarray
+            Matriz float32 (n_partidos, n_features)
+        """
+        if features is not None:
+            return features.loc(df.index).values
+        if isinstance(df, FeatureMatrix):
+            df = df.to_frame()
+        if not self.feature_names:
+            return np.zeros((len(df), 1), dtype=np.float32)
+        return feature_matrix(df, self.feature_names, _DERIVED, self._fill).values
     
-    def fit(self, df):
+    def feature_matrix(self, df):
+        """
+        Matriz del dataset completo para reutilizar en varios fits/predicciones
+        (pasarla como `features` a fit y predict_proba). Requiere el esquema:
+        llamar después de fit() o usar el mismo df con el que se entrenará.
+        """
+        if self.feature_names is None:
+            self.feature_names, self._fill = self._feature_schema(df)
+        return feature_matrix(df, self.feature_names, _DERIVED, self._fill)
+    
+    def fit(self, df, features=None):
         """
         Entrena el modelo XGBoost.
         
@@ -112,24 +148,27 @@ class XGBoost1X2Classifier:
         df : pd.DataFrame
             DataFrame con datos de entrenamiento
             Debe contener columna 'y' con outcomes (0=H, 1=D, 2=A)
+        features : FeatureMatrix, optional
+            Matriz ya construida que contiene las filas de df (ver feature_matrix)
         
         Returns:
         --------
         self : XGBoost1X2Classifier
         """
-        X = self._create_features(df)
+        if features is not None:
+            self.feature_names = list(features.columns)
+        else:
+            self.feature_names, self._fill = self._feature_schema(df)
+        X = self._create_features(df, features)
         y = df['y'].values
         
-        # Escalar features
-        X_scaled = self.scaler.fit_transform(X)
-        
-        # Entrenar modelo
-        self.model.fit(X_scaled, y, verbose=False)
+        # Sin escalado: los árboles son invariantes a transformaciones monótonas
+        self.model.fit(X, y, verbose=False)
         
         self.is_fitted = True
         return self
     
-    def predict_proba(self, df):
+    def predict_proba(self, df, features=None):
         """
         Predice probabilidades 1X2.
         
@@ -137,6 +176,8 @@ class XGBoost1X2Classifier:
         -----------
         df : pd.DataFrame
             DataFrame con datos de partidos
+        features : FeatureMatrix, optional
+            Matriz ya construida que contiene las filas de df
         
         Returns:
         --------
@@ -146,11 +187,10 @@ class XGBoost1X2Classifier:
         if not self.is_fitted:
             raise ValueError("Modelo no entrenado. Llamar a fit() primero.")
         
-        X = self._create_features(df)
-        X_scaled = self.scaler.transform(X)
+        X = self._create_features(df, features)
         
         # Predecir probabilidades
-        probs = self.model.predict_proba(X_scaled)
+        probs = self.model.predict_proba(X)
         
         # Convertir a DataFrame
         probs_df = pd.DataFrame(probs, columns=['pH', 'pD', 'pA'])
@@ -27,3 +27,83 @@ def choose_close_row(row):
         if all(c in row.index for c in cols) and row[cols].notna().all():
             return row[cols].astype(float).values
     return np.array([np.nan, np.nan, np.nan], dtype=float)
+
+# Bloques de cuotas de cierre por mercado: (prefijos por preferencia, sufijos por selección, selecciones)
+CLOSE_BLOCKS = {
+    '1X2':   (('PSC', 'B365C', 'AvgC', 'PS'), ('H', 'D', 'A'), ('H', 'D', 'A')),
+    'OU2.5': (('PC', 'B365C', 'AvgC', 'P'), ('>2.5', '<2.5'), ('Over', 'Under')),
+    'AH':    (('PC', 'B365C', 'AvgC'), ('AHH', 'AHA'), ('Home', 'Away')),
+}
+
+def coalesce_close_block(df: pd.DataFrame, prefs, suffixes):
+    """
+    Resuelve la fuente de cierre para todas las filas a la vez: el primer bloque
+    de columnas (p.ej. PSCH/PSCD/PSCA) completo en cada fila.
+    Retorna (matriz N×k de cuotas, índice de la fuente en `prefs` o -1).
+    """
+    n = len(df); k = len(suffixes)
+    out = np.full((n, k), np.nan)
+    src = np.full(n, -1, dtype=np.int8)
+    for i, pref in enumerate(prefs):
+        cols = [f"{pref}{s}" for s in suffixes]
+        if not all(c in df.columns for c in cols):
+            continue
+        block = df[cols].to_numpy(dtype=float)
+        take = (src < 0) & np.isfinite(block).all(axis=1) & (block > 1.0).all(axis=1)
+        out[take] = block[take]; src[take] = i
+        if (src >= 0).all():
+            break
+    return out, src
+
+def compute_clv(df: pd.DataFrame, odds_col: str = 'odds_open', line_col: str = 'line') -> pd.DataFrame:
+    """
+    CLV vectorizado sobre el log unido al dataset (columnas market/selection/odds_open + cierres).
+
+    Columnas añadidas:
+    - close_odds / close_source: cuota de cierre de la selección y bloque usado
+    - clv:       odds_tomada / odds_cierre - 1
+    - clv_fair:  odds_tomada * p_cierre_sin_margen - 1  (CLV contra el cierre de-margined)
+    - beat_close: 1 si la cuota tomada supera el cierre
+    """
+    n = len(df)
+    close = np.full(n, np.nan); fair_p = np.full(n, np.nan)
+    source = np.full(n, None, dtype=object)
+    market = df['market'].astype(str).to_numpy()
+    sel = df['selection'].astype(str).to_numpy()
+    for mkt, (prefs, suffixes, names) in CLOSE_BLOCKS.items():
+        rows = np.flatnonzero(market == mkt)
+        if len(rows) == 0:
+            continue
+        sub = df.iloc[rows]
+        odds, src = coalesce_close_block(sub, prefs, suffixes)
+        if mkt == 'AH' and 'AHCh' in sub.columns and line_col in sub.columns:
+            # el cierre sólo es comparable si la línea de cierre es la misma que la apostada
+            same_line = np.isclose(sub['AHCh'].to_numpy(float), sub[line_col].to_numpy(float))
+            src[~same_line] = -1; odds[~same_line] = np.nan
+        idx = pd.Series(sel[rows]).map({s: i for i, s in enumerate(names)}).fillna(-1).to_numpy(int)
+        ok = (idx >= 0) & (src >= 0)
+        r = rows[ok]; j = idx[ok]; o = odds[ok]
+        close[r] = o[np.arange(len(r)), j]
+        inv = 1.0 / o
+        fair_p[r] = inv[np.arange(len(r)), j] / inv.sum(axis=1)
+        source[r] = np.array(prefs, dtype=object)[src[ok]]
+    taken = df[odds_col].to_numpy(float)
+    out = df.copy()
+    out['close_odds'] = close
+    out['close_source'] = source
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['clv'] = taken / close - 1.0
+        out['clv_fair'] = taken * fair_p - 1.0
+    out['beat_close'] = np.where(np.isfinite(close), (taken > close).astype(float), np.nan)
+    return out
+
+def clv_summary(df: pd.DataFrame, by=('league', 'market')) -> dict:
+    """Agregados de CLV (media, de-margined, beat-the-close, cobertura) globales y por cada dimensión."""
+    def agg(g):
+        return g.agg(bets=('clv', 'size'), with_close=('clv', 'count'), clv_mean=('clv', 'mean'),
+                     clv_fair_mean=('clv_fair', 'mean'), beat_close_rate=('beat_close', 'mean'))
+    out = {'total': agg(df.assign(_all='ALL').groupby('_all')).reset_index(drop=True)}
+    for col in by:
+        if col in df.columns:
+            out[f'per_{col}'] = agg(df.groupby(col, dropna=False)).reset_index()
+    return out
@@ -1,6 +1,10 @@
 import pandas as pd
 import numpy as np
 
+# Bandas de cuota usadas en reportes (mismas etiquetas que generate_report.band)
+ODDS_BAND_EDGES  = np.array([2.0, 3.0, 5.0])
+ODDS_BAND_LABELS = np.array(["<2.0", "2.0–2.99", "3.0–4.99", ">=5.0", "N/A"], dtype=object)
+
 def drawdown(equity: pd.Series) -> pd.DataFrame:
     run_max = equity.cummax()
     dd = equity - run_max
@@ -17,3 +21,153 @@ def summarize_log(df: pd.DataFrame) -> dict:
     dd = drawdown(df['equity'])
     return dict(n_bets=int(len(df)), turnover=float(turnover), pnl=float(pnl), roi=float(roi),
                 hit_rate=float(hit_rate), max_drawdown=float(dd['drawdown'].min()), max_drawdown_pct=float(dd['drawdown_pct'].min()))
+
+def odds_band_codes(odds) -> np.ndarray:
+    """Código de banda (índice en ODDS_BAND_LABELS) para un array de cuotas."""
+    odds = np.asarray(odds, dtype=float)
+    codes = np.searchsorted(ODDS_BAND_EDGES, odds, side='right')
+    codes[np.isnan(odds)] = len(ODDS_BAND_LABELS) - 1
+    return codes
+
+def rolling_roi(df: pd.DataFrame, window: int = 100) -> pd.Series:
+    """ROI móvil de las últimas `window` apuestas (sumas acumuladas, sin rolling de pandas)."""
+    stake = df['stake'].to_numpy(float); pnl = df['pnl'].to_numpy(float)
+    cs = np.concatenate([[0.0], np.cumsum(stake)]); cp = np.concatenate([[0.0], np.cumsum(pnl)])
+    hi = np.arange(1, len(stake)+1); lo = np.maximum(hi - window, 0)
+    turn = cs[hi] - cs[lo]
+    with np.errstate(invalid='ignore', divide='ignore'):
+        roi = np.where(turn > 0, (cp[hi] - cp[lo]) / turn, 0.0)
+    return pd.Series(roi, index=df.index, name=f'roi_roll{window}')
+
+def _drawdown_stats(equity: np.ndarray, peak0: float = -np.inf, since_peak0: int = 0):
+    """max drawdown (abs y %), duración máxima bajo el pico y estado final (peak, apuestas desde el pico)."""
+    run_max = np.maximum.accumulate(np.concatenate([[peak0], equity]))[1:]
+    dd = equity - run_max
+    with np.errstate(invalid='ignore', divide='ignore'):
+        dd_pct = np.where(run_max != 0, dd / run_max, np.nan)
+    # duración: apuestas transcurridas desde el último máximo
+    idx = np.arange(1, len(equity)+1)
+    last_peak = np.maximum.accumulate(np.where(dd >= 0, idx, 0))
+    since_peak = np.where(last_peak > 0, idx - last_peak, since_peak0 + idx)
+    return dict(max_drawdown=float(dd.min()), max_drawdown_pct=float(np.nanmin(dd_pct)) if np.isfinite(dd_pct).any() else 0.0,
+                max_drawdown_duration=int(since_peak.max()), peak=float(run_max[-1]), since_peak=int(since_peak[-1]))
+
+def _group_table(codes: np.ndarray, labels, sums: np.ndarray, name: str) -> pd.DataFrame:
+    """Agrega (stake, pnl, win) por código con bincount: una sola pasada por dimensión."""
+    k = len(labels)
+    turnover = np.bincount(codes, weights=sums[0], minlength=k)
+    pnl      = np.bincount(codes, weights=sums[1], minlength=k)
+    wins     = np.bincount(codes, weights=sums[2], minlength=k)
+    bets     = np.bincount(codes, minlength=k)
+    keep = bets > 0
+    out = pd.DataFrame({name: np.asarray(labels, dtype=object)[keep], 'turnover': turnover[keep], 'pnl': pnl[keep],
+                        'bets': bets[keep], 'wins': wins[keep].astype(int)})
+    with np.errstate(invalid='ignore', divide='ignore'):
+        out['roi'] = np.where(out['turnover'] > 0, out['pnl'] / out['turnover'], 0.0)
+        out['hit_rate'] = out['wins'] / out['bets']
+    return out
+
+def compute_metrics(df: pd.DataFrame, window: int = 100) -> dict:
+    """
+    KPIs completos del log de apuestas en una sola pasada vectorizada:
+    resumen (ROI, hit-rate, sharpe por apuesta, drawdown y su duración),
+    ROI móvil y desgloses por mercado, liga, banda de cuota y mercado×banda.
+    """
+    acc = MetricsAccumulator(window=window)
+    acc.update(df)
+    out = acc.tables()
+    out['summary'] = acc.summary()
+    out['rolling_roi'] = rolling_roi(df, window) if len(df) else pd.Series(dtype=float)
+    return out
+
+
+class MetricsAccumulator:
+    """
+    Acumulador incremental de métricas: `update()` con las apuestas nuevas del log
+    actualiza totales, drawdown y desgloses sin recorrer el historial de nuevo.
+    """
+
+    DIMENSIONS = ('market', 'league', 'odds_band', 'market_band')
+
+    def __init__(self, window: int = 100):
+        self.window = window
+        self.n = 0; self.turnover = 0.0; self.pnl = 0.0; self.wins = 0
+        self.ret_sum = 0.0; self.ret_sq = 0.0
+        self.peak = -np.inf; self.since_peak = 0
+        self.max_dd = 0.0; self.max_dd_pct = 0.0; self.max_dd_dur = 0
+        self.last_equity = np.nan
+        self._tail = np.zeros((2, 0))  # stake/pnl de las últimas `window` apuestas
+        self._groups = {d: {} for d in self.DIMENSIONS}
+
+    def update(self, df: pd.DataFrame) -> "MetricsAccumulator":
+        if df is None or len(df) == 0:
+            return self
+        stake = df['stake'].to_numpy(float); pnl = df['pnl'].to_numpy(float)
+        win = (df['result'].to_numpy() == 'WIN').astype(float)
+        self.n += len(df); self.turnover += stake.sum(); self.pnl += pnl.sum(); self.wins += int(win.sum())
+        with np.errstate(invalid='ignore', divide='ignore'):
+            ret = np.where(stake > 0, pnl / stake, 0.0)
+        self.ret_sum += ret.sum(); self.ret_sq += (ret**2).sum()
+
+        if 'equity' in df.columns:
+            eq = df['equity'].to_numpy(float)
+            st = _drawdown_stats(eq, self.peak, self.since_peak)
+            self.max_dd = min(self.max_dd, st['max_drawdown'])
+            self.max_dd_pct = min(self.max_dd_pct, st['max_drawdown_pct'])
+            self.max_dd_dur = max(self.max_dd_dur, st['max_drawdown_duration'])
+            self.peak, self.since_peak = st['peak'], st['since_peak']
+            self.last_equity = float(eq[-1])
+        self._tail = np.concatenate([self._tail, np.vstack([stake, pnl])], axis=1)[:, -self.window:]
+
+        sums = np.vstack([stake, pnl, win])
+        n = len(df)
+        m_codes, m_labels = pd.factorize(df['market'].astype(str)) if 'market' in df.columns else (np.zeros(n, int), np.array(['']))
+        l_codes, l_labels = pd.factorize(df['league'].fillna('').astype(str)) if 'league' in df.columns else (np.zeros(n, int), np.array(['']))
+        b_codes = odds_band_codes(df['odds_open']) if 'odds_open' in df.columns else np.full(n, len(ODDS_BAND_LABELS)-1)
+        nb = len(ODDS_BAND_LABELS)
+        mb_labels = [f"{m}|{b}" for m in m_labels for b in ODDS_BAND_LABELS]
+        groups = {'market': (m_codes, m_labels), 'league': (l_codes, l_labels),
+                  'odds_band': (b_codes, ODDS_BAND_LABELS), 'market_band': (m_codes * nb + b_codes, mb_labels)}
+        for dim, (codes, labels) in groups.items():
+            tab = _group_table(codes, labels, sums, dim)
+            store = self._groups[dim]
+            for key, vals in zip(tab[dim], tab[['turnover', 'pnl', 'bets', 'wins']].to_numpy(float)):
+                prev = store.get(key)
+                store[key] = vals if prev is None else prev + vals
+        return self
+
+    def summary(self) -> dict:
+        n = self.n
+        mean = self.ret_sum / n if n else 0.0
+        var = self.ret_sq / n - mean**2 if n else 0.0
+        std = np.sqrt(max(var, 0.0))
+        tail_turn = self._tail[0].sum()
+        return dict(n_bets=int(n), turnover=float(self.turnover), pnl=float(self.pnl),
+                    roi=float(self.pnl / self.turnover) if self.turnover > 0 else 0.0,
+                    hit_rate=float(self.wins / n) if n else 0.0,
+                    sharpe=float(mean / std) if std > 0 else 0.0,
+                    sharpe_sqrt_n=float(mean / std * np.sqrt(n)) if std > 0 else 0.0,
+                    max_drawdown=float(self.max_dd), max_drawdown_pct=float(self.max_dd_pct),
+                    max_drawdown_duration=int(self.max_dd_dur), current_drawdown_duration=int(self.since_peak),
+                    equity=float(self.last_equity),
+                    roi_last_window=float(self._tail[1].sum() / tail_turn) if tail_turn > 0 else 0.0)
+
+    def tables(self) -> dict:
+        out = {}
+        for dim, store in self._groups.items():
+            if not store:
+                keys = ['market', 'odds_band'] if dim == 'market_band' else [dim]
+                out[f'per_{dim}'] = pd.DataFrame(columns=keys + ['turnover', 'pnl', 'bets', 'wins', 'roi', 'hit_rate'])
+                continue
+            keys = sorted(store)
+            arr = np.vstack([store[k] for k in keys])
+            tab = pd.DataFrame({dim: keys, 'turnover': arr[:, 0], 'pnl': arr[:, 1],
+                                'bets': arr[:, 2].astype(int), 'wins': arr[:, 3].astype(int)})
+            with np.errstate(invalid='ignore', divide='ignore'):
+                tab['roi'] = np.where(tab['turnover'] > 0, tab['pnl'] / tab['turnover'], 0.0)
+                tab['hit_rate'] = tab['wins'] / tab['bets']
+            if dim == 'market_band':
+                tab[['market', 'odds_band']] = tab[dim].str.split('|', n=1, expand=True)
+                tab = tab.drop(columns=[dim])[['market', 'odds_band', 'turnover', 'pnl', 'bets', 'wins', 'roi', 'hit_rate']]
+            out[f'per_{dim}'] = tab
+        return out
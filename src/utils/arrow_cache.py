@@ -0,0 +1,122 @@
+"""
+Copia Arrow IPC (Feather v2 sin compresión) de los datasets procesados.
+
+El ETL escribe data/processed/<nombre>.arrow junto a cada .parquet. Los lectores
+lo abren con memory-map: las páginas del fichero las comparte el sistema
+operativo entre todos los procesos (workers de gunicorn, Streamlit, scripts) y
+abrirlo no paga la decodificación de parquet.
+
+- load_table(): pa.Table mapeada en memoria (una por proceso y fichero).
+- load_dataset()/load_matches(): DataFrame. Por defecto las columnas numéricas
+  son vistas de solo lectura sobre el mapeo (sin copia); con writable=True se
+  devuelve una copia privada que se puede modificar in-place.
+
+Si el .arrow no existe o es más antiguo que el .parquet se regenera al leer;
+si el directorio no es escribible se lee el .parquet directamente. Los .arrow
+son derivados: están en .gitignore y no se versionan.
+
+Uso:
+    from src.utils.arrow_cache import load_matches
+    df = load_matches()                                      # vistas compartidas
+    df = load_matches(columns=['Date', 'HomeTeam', 'AwayTeam'])
+    df = load_matches(writable=True)                         # copia modificable
+"""
+import os
+import threading
+from pathlib import Path
+from typing import Dict, Iterable, Optional, Tuple
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.feather as feather
+import pyarrow.parquet as pq
+
+PROC = Path("data/processed")
+
+_tables: Dict[Path, Tuple[float, pa.Table]] = {}
+_tables_lock = threading.Lock()
+
+
+def arrow_path(name: str, base: Path = PROC) -> Path:
+    return Path(base) / f"{name}.arrow"
+
+
+def write_arrow(df: pd.DataFrame, path: Path):
+    """Escribe `df` como Feather v2 sin compresión (requisito para mapearlo sin copia)."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(df, tmp, compression='uncompressed')
+    tmp.replace(path)   # los procesos con el fichero anterior mapeado siguen leyendo su versión
+
+
+def ensure_arrow(name: str, base: Path = PROC) -> Optional[Path]:
+    """
+    Ruta del .arrow, regenerándolo desde el .parquet si falta o está desactualizado.
+    Devuelve None si hace falta regenerarlo y el directorio no es escribible
+    (despliegue de solo lectura): el llamador lee el .parquet.
+    """
+    target = arrow_path(name, base)
+    source = Path(base) / f"{name}.parquet"
+    if source.exists() and (not target.exists() or target.stat().st_mtime < source.stat().st_mtime):
+        if not os.access(target.parent, os.W_OK):
+            return None
+        tmp = target.with_name(f"{target.name}.{os.getpid()}.tmp")
+        try:
+            feather.write_feather(pq.read_table(source), tmp, compression='uncompressed')
+            tmp.replace(target)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return None
+    if not target.exists():
+        raise FileNotFoundError(f"No existe {source} ni {target}")
+    return target
+
+
+def load_table(name: str = 'matches', base: Path = PROC) -> pa.Table:
+    """
+    Tabla Arrow mapeada en memoria; se reabre si el fichero cambió en disco.
+    Sin .arrow utilizable (directorio de solo lectura) se lee el .parquet.
+    """
+    path = ensure_arrow(name, base)
+    if path is None:
+        path = Path(base) / f"{name}.parquet"
+    mtime = path.stat().st_mtime
+    with _tables_lock:
+        cached = _tables.get(path)
+        if cached is None or cached[0] != mtime:
+            if path.suffix == '.parquet':
+                cached = (mtime, pq.read_table(path))
+            else:
+                source = pa.memory_map(str(path), 'r')
+                cached = (mtime, pa.ipc.open_file(source).read_all())
+            _tables[path] = cached
+        return cached[1]
+
+
+def load_dataset(name: str = 'matches', columns: Optional[Iterable[str]] = None,
+                 writable: bool = False, base: Path = PROC) -> pd.DataFrame:
+    """
+    Dataset procesado como DataFrame.
+
+    Parameters:
+    -----------
+    name : str
+        Nombre del fichero en data/processed sin extensión
+    columns : lista, optional
+        Columnas a cargar (las que no existan se ignoran)
+    writable : bool
+        False: columnas numéricas de solo lectura compartidas con el mapeo.
+        True: copia privada (para código que modifica columnas in-place).
+    """
+    table = load_table(name, base)
+    if columns is not None:
+        table = table.select([c for c in columns if c in table.column_names])
+    if writable:
+        return table.to_pandas()
+    return table.to_pandas(split_blocks=True)
+
+
+def load_matches(columns: Optional[Iterable[str]] = None, writable: bool = False) -> pd.DataFrame:
+    """Histórico de partidos (data/processed/matches)."""
+    return load_dataset('matches', columns, writable)
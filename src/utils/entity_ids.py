@@ -0,0 +1,180 @@
+"""
+Diccionario global equipo/liga -> id entero estable (int32).
+
+Los ids se asignan en el ETL (prepare_dataset_pro) y se guardan como columnas
+HomeId / AwayId / LeagueId en matches.parquet. El diccionario vive en
+data/processed/entity_ids.json y solo crece: un id nunca cambia de nombre.
+Los filtros comparan enteros y los nombres se decodifican solo en la UI.
+Si el diccionario no está o no corresponde a los ids del DataFrame (otro
+build), los filtros comparan nombres: nunca devuelven una máscara vacía por
+un id desconocido.
+
+Uso:
+    from src.utils.entity_ids import add_ids, id_mask
+    df = add_ids(df)                                 # ETL: asigna y guarda ids
+    m = id_mask(df, 'HomeTeam', 'Arsenal')           # filtro por id (o por nombre si no hay ids)
+"""
+import json
+import threading
+import weakref
+from collections import OrderedDict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+import numpy as np
+import pandas as pd
+
+IDS_PATH = Path(__file__).resolve().parents[2] / "data" / "processed" / "entity_ids.json"
+# columna de nombre -> (columna de id, tipo de entidad)
+ID_COLUMNS = {'HomeTeam': ('HomeId', 'team'), 'AwayTeam': ('AwayId', 'team'), 'League': ('LeagueId', 'league')}
+UNKNOWN = -1
+
+
+class EntityIndex:
+    """Nombres por tipo ('team', 'league'); el id es la posición en la lista."""
+
+    def __init__(self, names: Optional[Dict[str, List[str]]] = None):
+        self.names = {'team': [], 'league': []}
+        self.names.update({k: list(v) for k, v in (names or {}).items()})
+        self._index = {k: pd.Index(v) for k, v in self.names.items()}
+        self._ids = {k: {n: i for i, n in enumerate(v)} for k, v in self.names.items()}
+
+    @classmethod
+    def load(cls, path: Path = IDS_PATH) -> "EntityIndex":
+        path = Path(path)
+        if path.exists():
+            return cls(json.loads(path.read_text(encoding='utf-8')))
+        return cls()
+
+    def save(self, path: Path = IDS_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.tmp')
+        tmp.write_text(json.dumps(self.names, ensure_ascii=False, indent=1), encoding='utf-8')
+        tmp.replace(path)
+
+    def add(self, kind: str, values: Iterable) -> int:
+        """Registra los nombres nuevos (al final, ids crecientes). Devuelve cuántos se añadieron."""
+        known = self._index[kind]
+        new = [v for v in pd.unique(pd.Series(list(values), dtype=object).dropna().astype(str)) if v not in known]
+        if new:
+            self._ids[kind].update({n: len(self.names[kind]) + i for i, n in enumerate(new)})
+            self.names[kind].extend(new)
+            self._index[kind] = pd.Index(self.names[kind])
+        return len(new)
+
+    def encode(self, kind: str, values) -> np.ndarray:
+        """Nombres -> ids int32 (UNKNOWN si no está en el diccionario)."""
+        s = pd.Series(values)
+        if isinstance(s.dtype, pd.CategoricalDtype):
+            # una búsqueda por categoría en lugar de por fila
+            lut = self._index[kind].get_indexer(s.cat.categories.astype(str)).astype(np.int32)
+            codes = s.cat.codes.to_numpy()
+            return np.where(codes >= 0, lut[codes], UNKNOWN).astype(np.int32)
+        return self._index[kind].get_indexer(s.astype(str)).astype(np.int32)
+
+    def decode(self, kind: str, ids) -> np.ndarray:
+        names = np.asarray(self.names[kind] + [None], dtype=object)
+        ids = np.asarray(ids)
+        return names[np.where((ids >= 0) & (ids < len(names) - 1), ids, -1)]
+
+    def id_of(self, kind: str, name) -> int:
+        return self._ids[kind].get(str(name), UNKNOWN)
+
+
+_index: Optional[EntityIndex] = None
+_index_mtime = None
+_index_lock = threading.Lock()
+
+
+def get_entity_index(path: Path = IDS_PATH) -> EntityIndex:
+    """Índice compartido del proceso (se recarga si el ETL reescribió el fichero)."""
+    global _index, _index_mtime
+    path = Path(path)
+    mtime = path.stat().st_mtime if path.exists() else None
+    with _index_lock:
+        if _index is None or mtime != _index_mtime:
+            _index, _index_mtime = EntityIndex.load(path), mtime
+        return _index
+
+
+def add_ids(df: pd.DataFrame, path: Path = IDS_PATH, save: bool = True) -> pd.DataFrame:
+    """Añade HomeId/AwayId/LeagueId (int32) registrando equipos y ligas nuevos en el diccionario."""
+    index = EntityIndex.load(path)
+    for col, (_, kind) in ID_COLUMNS.items():
+        if col in df.columns:
+            index.add(kind, df[col])
+    out = df.copy()
+    for col, (id_col, kind) in ID_COLUMNS.items():
+        if col in out.columns:
+            out[id_col] = index.encode(kind, out[col])
+    if save:
+        index.save(path)
+    return out
+
+
+def _index_matches(df: pd.DataFrame, col: str, id_col: str, kind: str, index: EntityIndex,
+                   sample: int = 32) -> bool:
+    """Comprueba en una muestra de filas que el diccionario decodifica los ids del DataFrame a sus nombres."""
+    n = len(df)
+    if n == 0:
+        return True
+    pos = np.unique(np.linspace(0, n - 1, num=min(n, sample)).astype(int))
+    names = df[col].iloc[pos]
+    ok = names.notna().to_numpy()
+    decoded = index.decode(kind, df[id_col].iloc[pos].to_numpy())
+    return bool(np.all(decoded[ok] == names[ok].astype(str).to_numpy()))
+
+
+_checked: "OrderedDict[tuple, tuple]" = OrderedDict()     # (id(df), col, len) -> (weakref(df), índice, ok)
+_checked_lock = threading.Lock()
+_CHECKED_SIZE = 64
+
+
+def _ids_usable(df: pd.DataFrame, col: str, id_col: str, kind: str, index: EntityIndex) -> bool:
+    """_index_matches una sola vez por DataFrame, columna y versión del diccionario."""
+    key = (id(df), col, len(df))
+    with _checked_lock:
+        entry = _checked.get(key)
+        if entry is not None and entry[0]() is df and entry[1] is index:
+            _checked.move_to_end(key)
+            return entry[2]
+    ok = _index_matches(df, col, id_col, kind, index)
+    with _checked_lock:
+        _checked[key] = (weakref.ref(df), index, ok)
+        while len(_checked) > _CHECKED_SIZE:
+            _checked.popitem(last=False)
+    return ok
+
+
+def id_mask(df: pd.DataFrame, col: str, name) -> np.ndarray:
+    """
+    Máscara booleana `df[col] == name`. Si el DataFrame trae la columna de id y
+    el diccionario la decodifica correctamente compara enteros; si no (nombre
+    desconocido, diccionario ausente o de otro build), compara nombres.
+    """
+    id_col, kind = ID_COLUMNS[col]
+    if id_col in df.columns:
+        index = get_entity_index()
+        ident = index.id_of(kind, name)
+        if col not in df.columns:
+            return df[id_col].to_numpy() == ident
+        if ident != UNKNOWN and _ids_usable(df, col, id_col, kind, index):
+            return df[id_col].to_numpy() == ident
+    return (df[col] == name).to_numpy()
+
+
+def team_codes(df: pd.DataFrame, home: str = 'HomeTeam', away: str = 'AwayTeam'):
+    """
+    Ids enteros (local, visitante) en un mismo espacio: los del ETL si existen
+    y cubren todas las filas, si no una factorización conjunta de ambas columnas.
+    """
+    if home == 'HomeTeam' and away == 'AwayTeam' and {'HomeId', 'AwayId'} <= set(df.columns):
+        h_ids = df['HomeId'].to_numpy()
+        a_ids = df['AwayId'].to_numpy()
+        # filas sin id (p. ej. fixtures añadidos después del ETL) -> factorizar nombres
+        if h_ids.dtype.kind in 'iu' and a_ids.dtype.kind in 'iu' and (h_ids >= 0).all() and (a_ids >= 0).all():
+            return h_ids, a_ids
+    codes, _ = pd.factorize(pd.concat([df[home].astype(object), df[away].astype(object)], ignore_index=True))
+    n = len(df)
+    return codes[:n].astype(np.int32), codes[n:].astype(np.int32)
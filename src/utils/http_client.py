@@ -0,0 +1,197 @@
+"""
+Cliente HTTP compartido por las fuentes ETL y la API de fixtures.
+
+- Pool de conexiones (una requests.Session con HTTPAdapter dimensionado).
+- Límite de tasa por host con token bucket (HOST_LIMITS) en lugar de sleeps fijos.
+- Concurrencia acotada (semáforo global) y `map()` con pool de hilos.
+- Reintentos con backoff exponencial + jitter; respeta Retry-After en 429/503
+  y bloquea el host entero mientras dura la espera.
+
+Uso:
+    from src.utils.http_client import get_client
+    http = get_client()
+    r = http.get(url, params=..., headers=...)
+    r.raise_for_status()
+"""
+import random
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import parsedate_to_datetime
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+# Límites por proveedor: host -> (peticiones, por_segundos[, ráfaga])
+HOST_LIMITS: Dict[str, Tuple] = {
+    "api.football-data.org": (10, 60.0, 1),            # plan gratuito: 10 req/min
+    "www.football-data.co.uk": (5, 1.0, 5),
+    "understat.com": (4, 1.0, 4),
+    "fbref.com": (15, 60.0, 1),                        # bot-traffic: <20 req/min
+    "api-football-v1.p.rapidapi.com": (5, 1.0, 5),
+    "api.the-odds-api.com": (2, 1.0, 2),
+    "www.thesportsdb.com": (30, 60.0, 2),
+    "api.footystats.org": (1, 1.0, 1),
+}
+DEFAULT_LIMIT = (5, 1.0, 5)
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+DEFAULT_HEADERS = {"User-Agent": "SportsForecasting/1.0 (Educational)"}
+
+
+class TokenBucket:
+    """Token bucket con reserva: cada `acquire()` consume un token y duerme lo necesario fuera del lock."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = float(rate)          # tokens por segundo
+        self.burst = max(1, int(burst))
+        self.tokens = float(self.burst)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0         # fijado por Retry-After
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1.0
+            wait = max(-self.tokens / self.rate if self.tokens < 0 else 0.0, self.blocked_until - now)
+        if wait > 0:
+            time.sleep(wait)
+
+    def block(self, seconds: float):
+        """Pausa el host durante `seconds` (todas las peticiones pendientes esperan)."""
+        with self._lock:
+            self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """Segundos de espera a partir de una cabecera Retry-After (segundos o fecha HTTP)."""
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        dt = parsedate_to_datetime(value)
+        return max(0.0, dt.timestamp() - time.time())
+    except Exception:
+        return None
+
+
+class HttpClient:
+    """Cliente HTTP con pooling, límites por host, concurrencia acotada y reintentos."""
+
+    def __init__(self, max_concurrency: int = 8, max_retries: int = 4, backoff: float = 1.0,
+                 max_backoff: float = 60.0, timeout: float = 30.0, limits: Optional[Dict[str, Tuple]] = None,
+                 headers: Optional[Dict[str, str]] = None, verbose: bool = True):
+        self.max_concurrency = max_concurrency
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.timeout = timeout
+        self.verbose = verbose
+        self.limits = dict(HOST_LIMITS if limits is None else limits)
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=16, pool_maxsize=max(max_concurrency, 10))
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        self.session.headers.update(headers or DEFAULT_HEADERS)
+        self._sem = threading.BoundedSemaphore(max_concurrency)
+        self._buckets: Dict[str, TokenBucket] = {}
+        self._lock = threading.Lock()
+
+    # ------------------------------------------------------------------
+    def set_rate_limit(self, host: str, n: int, per_seconds: float = 1.0, burst: Optional[int] = None):
+        """Fija (o cambia) el límite de un host: `n` peticiones cada `per_seconds`."""
+        with self._lock:
+            self.limits[host] = (n, per_seconds, burst or 1)
+            self._buckets.pop(host, None)
+
+    def bucket(self, host: str) -> TokenBucket:
+        with self._lock:
+            b = self._buckets.get(host)
+            if b is None:
+                n, per, *rest = self.limits.get(host, DEFAULT_LIMIT)
+                b = self._buckets[host] = TokenBucket(n / per, rest[0] if rest else 1)
+            return b
+
+    def _sleep_backoff(self, attempt: int, retry_after: Optional[float], bucket: TokenBucket):
+        if retry_after is not None:
+            wait = min(retry_after, self.max_backoff * 5)
+            bucket.block(wait)
+        else:
+            # full jitter: U(0, min(max, base * 2^n))
+            wait = random.uniform(0, min(self.max_backoff, self.backoff * (2 ** attempt)))
+        time.sleep(wait)
+
+    def request(self, method: str, url: str, **kwargs) -> requests.Response:
+        """
+        Petición con límite por host y reintentos. Devuelve la última respuesta
+        (aunque sea un error HTTP: el llamador decide con status_code/raise_for_status);
+        relanza la excepción de red si se agotan los reintentos.
+        """
+        host = urlsplit(url).netloc
+        bucket = self.bucket(host)
+        kwargs.setdefault("timeout", self.timeout)
+        for attempt in range(self.max_retries + 1):
+            bucket.acquire()
+            try:
+                with self._sem:
+                    resp = self.session.request(method, url, **kwargs)
+            except (requests.ConnectionError, requests.Timeout) as e:
+                if attempt >= self.max_retries:
+                    raise
+                if self.verbose:
+                    print(f"[http] {host}: {type(e).__name__}, reintento {attempt + 1}/{self.max_retries}")
+                self._sleep_backoff(attempt, None, bucket)
+                continue
+            if resp.status_code not in RETRY_STATUS or attempt >= self.max_retries:
+                return resp
+            retry_after = parse_retry_after(resp.headers.get("Retry-After"))
+            if self.verbose:
+                extra = f", Retry-After {retry_after:.0f}s" if retry_after is not None else ""
+                print(f"[http] {host}: HTTP {resp.status_code}{extra}, reintento {attempt + 1}/{self.max_retries}")
+            self._sleep_backoff(attempt, retry_after, bucket)
+        return resp
+
+    def get(self, url: str, **kwargs) -> requests.Response:
+        return self.request("GET", url, **kwargs)
+
+    def get_json(self, url: str, **kwargs):
+        r = self.get(url, **kwargs)
+        r.raise_for_status()
+        return r.json()
+
+    def get_text(self, url: str, **kwargs) -> str:
+        r = self.get(url, **kwargs)
+        r.raise_for_status()
+        return r.text
+
+    def map(self, fn: Callable, items: Iterable, max_workers: Optional[int] = None) -> List:
+        """Aplica `fn` a `items` en paralelo (orden preservado); el ritmo lo marcan los buckets por host."""
+        items = list(items)
+        if not items:
+            return []
+        with ThreadPoolExecutor(max_workers=min(max_workers or self.max_concurrency, len(items))) as ex:
+            return list(ex.map(fn, items))
+
+    def close(self):
+        self.session.close()
+
+
+_client: Optional[HttpClient] = None
+_client_lock = threading.Lock()
+
+
+def get_client() -> HttpClient:
+    """Cliente compartido del proceso (mismo pool y mismos buckets para todos los módulos)."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            _client = HttpClient()
+        return _client
@@ -12,6 +12,11 @@ from difflib import SequenceMatcher
 from typing import Dict, Tuple, Optional
 import numpy as np
 
+try:
+    from src.utils.arrow_cache import load_dataset, load_matches
+except ImportError:  # main.py añade src/ al sys.path
+    from utils.arrow_cache import load_dataset, load_matches
+
 
 class MapeadorDinamicoNombres:
     """
@@ -28,11 +33,11 @@ class MapeadorDinamicoNombres:
         """Carga todos los nombres únicos de equipos"""
         try:
             # Cargar datos históricos
-            df_historico = pd.read_parquet('data/processed/matches.parquet')
+            df_historico = load_matches(columns=['HomeTeam', 'AwayTeam'])
             self.nombres_historicos = set(df_historico['HomeTeam'].unique()) | set(df_historico['AwayTeam'].unique())
             
             # Cargar fixtures actuales
-            df_fixtures = pd.read_parquet('data/processed/upcoming_fixtures.parquet')
+            df_fixtures = load_dataset('upcoming_fixtures', columns=['HomeTeam', 'AwayTeam'])
             self.nombres_fixtures = set(df_fixtures['HomeTeam'].unique()) | set(df_fixtures['AwayTeam'].unique())
             
             # MAPEOS MANUALES EXPLÍCITOS (prioridad sobre algoritmo)
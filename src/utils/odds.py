@@ -14,6 +14,11 @@ def market_probs_1x2(row, cols=('B365H','B365D','B365A')) -> np.ndarray:
     ip = implied_probs_from_odds(odds)
     return remove_overround(ip)
 
+def market_probs_1x2_frame(df, cols=('B365H','B365D','B365A')) -> np.ndarray:
+    """market_probs_1x2 para todo un DataFrame a la vez: array (N,3) sin overround."""
+    ip = 1.0 / df[list(cols)].to_numpy(dtype=float)
+    return ip / ip.sum(axis=1, keepdims=True)
+
 def closing_odds_1x2(row):
     # Prefer Pinnacle closing (PSCH/PSCD/PSCA), luego Bet365 closing (B365CH/B365CD/B365CA), luego promedio (AvgCH/D/A)
     for pref in ('PSC','B365C','AvgC','PS'):
@@ -0,0 +1,310 @@
+"""
+Caché HTTP persistente (SQLite) compartida entre procesos/workers.
+
+- TTL por endpoint (ENDPOINT_TTLS: patrón de URL -> (ttl, ventana stale)).
+- Stale-while-revalidate: pasado el TTL, y dentro de la ventana stale, se
+  devuelve la copia guardada y un único proceso la refresca en segundo plano.
+- Bloqueo entre procesos con un lease en la tabla `locks`: solo el worker que
+  lo obtiene llama al proveedor; el resto espera a que aparezca la respuesta y,
+  si no llega, sirve la copia caducada o una respuesta vacía (nunca repite la
+  consulta sin el lease).
+- Si el proveedor falla y hay una copia (aunque esté caducada), se devuelve esa.
+
+Uso:
+    from src.utils.response_cache import get_response_cache
+    cache = get_response_cache()
+    r = cache.get(url, params=..., headers=...)      # interfaz de requests.Response
+    if r.status_code == 200:
+        data = r.json()
+    fixtures = cache.get_or_refresh("fixtures:7", lambda: compute(), ttl=300)
+"""
+import hashlib
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Callable, Optional, Tuple
+from urllib.parse import urlencode
+
+try:
+    from src.utils.http_client import get_client
+except ImportError:  # main.py añade src/ al sys.path
+    from utils.http_client import get_client
+
+DEFAULT_PATH = Path(os.environ.get("HTTP_CACHE_PATH", "data/cache/http_cache.sqlite"))
+
+# patrón (re.search sobre la URL) -> (ttl_segundos, ventana_stale_segundos)
+ENDPOINT_TTLS = [
+    (r"api\.football-data\.org/v4/competitions/?$", (86400, 7 * 86400)),
+    (r"api\.football-data\.org/v4/competitions/[^/]+/matches", (300, 3600)),
+    (r"api\.football-data\.org/v4/matches", (300, 3600)),
+    (r"thesportsdb\.com/.*/(all_leagues|search_all_leagues|lookupleague)", (86400, 7 * 86400)),
+    (r"thesportsdb\.com/.*/events", (1800, 6 * 3600)),
+    (r"api\.footystats\.org", (1800, 6 * 3600)),
+    (r"api-football-v1\.p\.rapidapi\.com/v3/fixtures", (600, 3600)),
+    (r"premierleague\.com/fixtures|laliga\.com/.*/fixture", (3600, 6 * 3600)),
+]
+DEFAULT_TTL = (300, 1800)
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS responses (
+    key          TEXT PRIMARY KEY,
+    url          TEXT,
+    status       INTEGER,
+    content_type TEXT,
+    body         BLOB,
+    fetched_at   REAL,
+    expires_at   REAL,
+    stale_until  REAL
+);
+CREATE TABLE IF NOT EXISTS locks (
+    key        TEXT PRIMARY KEY,
+    owner      TEXT,
+    expires_at REAL
+);
+"""
+
+
+class CachedResponse:
+    """Respuesta servida desde la caché con la parte de la interfaz de requests.Response que usamos."""
+
+    def __init__(self, row: sqlite3.Row, stale: bool = False):
+        self.url = row["url"]
+        self.status_code = row["status"]
+        self.content = row["body"]
+        self.headers = {"Content-Type": row["content_type"] or ""}
+        self.fetched_at = row["fetched_at"]
+        self.from_cache = True
+        self.stale = stale
+
+    @property
+    def text(self) -> str:
+        return self.content.decode("utf-8", errors="replace")
+
+    def json(self):
+        return json.loads(self.content)
+
+    def raise_for_status(self):
+        pass  # solo se guardan respuestas 200
+
+
+class TimeoutResponse:
+    """Respuesta vacía (504) para quien se cansa de esperar a otro worker y no hay copia que servir."""
+
+    status_code = 504
+    content = b""
+    text = ""
+    from_cache = True
+    stale = False
+
+    def __init__(self, url: str):
+        self.url = url
+        self.headers = {"Content-Type": ""}
+
+    def json(self):
+        raise ValueError("Sin respuesta: otro worker está consultando el proveedor")
+
+    def raise_for_status(self):
+        raise RuntimeError(f"504: sin respuesta en caché para {self.url}")
+
+
+class ResponseCache:
+    """Caché clave -> respuesta en SQLite (WAL) con TTL, stale-while-revalidate y lease entre procesos."""
+
+    def __init__(self, path=DEFAULT_PATH, lock_lease: float = 60.0, wait_timeout: float = 20.0):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock_lease = lock_lease        # un worker caído no bloquea la clave más de esto
+        self.wait_timeout = wait_timeout    # espera máxima a que otro worker rellene la clave
+        self.owner = f"{os.getpid()}-{uuid.uuid4().hex[:8]}"
+        self._local = threading.local()
+        conn = self._conn()
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.executescript(_SCHEMA)
+        self.purge()
+
+    def _conn(self) -> sqlite3.Connection:
+        # sqlite3 no comparte conexiones entre hilos: una por hilo
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30, isolation_level=None)
+            conn.row_factory = sqlite3.Row
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    # ------------------------------------------------------------------
+    # Claves, TTL y almacenamiento
+    # ------------------------------------------------------------------
+    @staticmethod
+    def make_key(url: str, params: Optional[dict] = None, method: str = "GET") -> str:
+        """Clave estable: método + URL + parámetros ordenados (las cabeceras de auth no cuentan)."""
+        qs = urlencode(sorted((params or {}).items()), doseq=True)
+        return hashlib.sha256(f"{method} {url}?{qs}".encode("utf-8")).hexdigest()
+
+    @staticmethod
+    def ttl_for(url: str) -> Tuple[float, float]:
+        for pattern, ttl in ENDPOINT_TTLS:
+            if re.search(pattern, url):
+                return ttl
+        return DEFAULT_TTL
+
+    def _read(self, key: str) -> Optional[sqlite3.Row]:
+        return self._conn().execute("SELECT * FROM responses WHERE key = ?", (key,)).fetchone()
+
+    def _store(self, key: str, url: str, status: int, body: bytes, content_type: Optional[str],
+               ttl: float, stale: float):
+        now = time.time()
+        self._conn().execute(
+            "INSERT OR REPLACE INTO responses (key, url, status, content_type, body, fetched_at, expires_at, stale_until) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?, ?)", (key, url, status, content_type, body, now, now + ttl, now + ttl + stale))
+
+    def _acquire(self, key: str, lease: Optional[float] = None) -> bool:
+        """Lease sobre `key`: solo se concede si no existe o el anterior caducó."""
+        now = time.time()
+        cur = self._conn().execute(
+            "INSERT INTO locks (key, owner, expires_at) VALUES (?, ?, ?) "
+            "ON CONFLICT(key) DO UPDATE SET owner = excluded.owner, expires_at = excluded.expires_at "
+            "WHERE locks.expires_at < ?", (key, self.owner, now + (lease or self.lock_lease), now))
+        return cur.rowcount == 1
+
+    def _lease(self, key: str) -> Optional[sqlite3.Row]:
+        return self._conn().execute("SELECT * FROM locks WHERE key = ?", (key,)).fetchone()
+
+    def _release(self, key: str):
+        self._conn().execute("DELETE FROM locks WHERE key = ? AND owner = ?", (key, self.owner))
+
+    def purge(self) -> int:
+        """Borra entradas fuera de su ventana stale y leases caducados."""
+        now = time.time()
+        conn = self._conn()
+        n = conn.execute("DELETE FROM responses WHERE stale_until < ?", (now,)).rowcount
+        conn.execute("DELETE FROM locks WHERE expires_at < ?", (now,))
+        return n
+
+    def invalidate(self, key: str):
+        self._conn().execute("DELETE FROM responses WHERE key = ?", (key,))
+
+    # ------------------------------------------------------------------
+    # Lectura con refresco
+    # ------------------------------------------------------------------
+    def _through(self, key: str, fetch: Callable, wrap: Callable, fallback: Callable,
+                 wait_timeout: Optional[float] = None):
+        """
+        Devuelve wrap(fila) si la copia es fresca o está en la ventana stale (y lanza
+        el refresco en segundo plano); si no hay copia, un solo proceso ejecuta
+        `fetch()` (que guarda lo cacheable) y los demás esperan su resultado.
+
+        Un worker que espera nunca llama al proveedor sin el lease: si el dueño lo
+        suelta sin guardar nada o se agota `wait_timeout`, devuelve la copia
+        caducada si la hay o `fallback()`. Solo si el lease caduca (dueño caído)
+        lo toma y ejecuta `fetch()`.
+        """
+        wait_timeout = self.wait_timeout if wait_timeout is None else wait_timeout
+        lease = max(self.lock_lease, wait_timeout)
+        started = time.time()
+        row = self._read(key)
+        if row is not None and started < row["expires_at"]:
+            return wrap(row, False)
+        if row is not None and started < row["stale_until"]:
+            if self._acquire(key, lease):
+                threading.Thread(target=self._background_refresh, args=(key, fetch), daemon=True).start()
+            return wrap(row, True)
+
+        def expired():
+            return wrap(row, True) if row is not None else fallback()
+
+        while True:
+            if self._acquire(key, lease):
+                try:
+                    return fetch()
+                except Exception:
+                    if row is not None:   # stale-if-error
+                        return wrap(row, True)
+                    raise
+                finally:
+                    self._release(key)
+            while True:
+                time.sleep(0.1)
+                fresh = self._read(key)
+                if fresh is not None and fresh["fetched_at"] >= started:
+                    return wrap(fresh, False)
+                holder = self._lease(key)
+                if holder is None:
+                    # el dueño terminó sin guardar (error o respuesta no cacheable);
+                    # relectura por si guardó justo antes de soltar el lease
+                    fresh = self._read(key)
+                    if fresh is not None and fresh["fetched_at"] >= started:
+                        return wrap(fresh, False)
+                    return expired()
+                if time.time() - started > wait_timeout:
+                    return expired()   # el otro worker no terminó a tiempo
+                if holder["expires_at"] < time.time():
+                    break              # dueño caído: intentar tomar el lease
+
+    def _background_refresh(self, key: str, fetch: Callable):
+        try:
+            fetch()
+        except Exception as e:
+            print(f"[cache] refresco de {key[:12]} falló: {e}")
+        finally:
+            self._release(key)
+
+    def get(self, url: str, params: Optional[dict] = None, headers: Optional[dict] = None,
+            ttl: Optional[float] = None, stale: Optional[float] = None, **kwargs):
+        """
+        GET cacheado con la interfaz de requests.Response (status_code, json(), text).
+        Solo se guardan respuestas 200; los errores se devuelven tal cual y no se cachean.
+        """
+        default_ttl, default_stale = self.ttl_for(url)
+        ttl = default_ttl if ttl is None else ttl
+        stale = default_stale if stale is None else stale
+        key = self.make_key(url, params)
+
+        def fetch():
+            r = get_client().get(url, params=params, headers=headers, **kwargs)
+            if r.status_code == 200:
+                self._store(key, url, r.status_code, r.content, r.headers.get("Content-Type"), ttl, stale)
+            return r
+
+        return self._through(key, fetch, lambda row, is_stale: CachedResponse(row, is_stale),
+                             lambda: TimeoutResponse(url))
+
+    def get_or_refresh(self, key: str, compute: Callable, ttl: float = 300, stale: float = 1800,
+                       empty_ttl: float = 30, wait_timeout: Optional[float] = None):
+        """
+        Valor JSON-serializable calculado por `compute()` y compartido entre procesos.
+        Los resultados vacíos (None, [] o {}) se guardan solo `empty_ttl` segundos y
+        sin ventana stale. `wait_timeout` debe cubrir lo que tarda `compute()`; si se
+        agota, se devuelve la copia caducada o None.
+        """
+        key = f"value:{key}"
+
+        def fetch():
+            value = compute()
+            body = json.dumps(value).encode("utf-8")
+            if value:
+                self._store(key, key, 200, body, "application/json", ttl, stale)
+            else:
+                self._store(key, key, 200, body, "application/json", empty_ttl, 0)
+            return value
+
+        return self._through(key, fetch, lambda row, is_stale: json.loads(row["body"]),
+                             lambda: None, wait_timeout)
+
+
+_cache: Optional[ResponseCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_response_cache() -> ResponseCache:
+    """Caché compartida del proceso (todos los procesos apuntan al mismo fichero SQLite)."""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache()
+        return _cache